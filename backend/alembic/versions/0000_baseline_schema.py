@@ -0,0 +1,149 @@
+"""Baseline schema: users, datasets, purchases, ratings and transactions
+
+The tables as they stood before the first migration, so `alembic upgrade
+head` builds a complete schema on an empty database. Databases created by
+init_db() already have these tables and skip them.
+
+Revision ID: 0000
+Revises:
+Create Date: 2024-01-15 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0000"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _timestamps():
+    return [
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False)
+    ]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("wallet_address", sa.String(50), nullable=False),
+            sa.Column("username", sa.String(50), nullable=True),
+            sa.Column("email", sa.String(100), nullable=True),
+            sa.Column("display_name", sa.String(100), nullable=True),
+            sa.Column("bio", sa.Text(), nullable=True),
+            sa.Column("avatar_url", sa.String(255), nullable=True),
+            sa.Column("website", sa.String(255), nullable=True),
+            sa.Column("is_verified", sa.Boolean(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("is_banned", sa.Boolean(), nullable=False),
+            sa.Column("reputation_score", sa.Float(), nullable=False),
+            sa.Column("total_uploads", sa.Integer(), nullable=False),
+            sa.Column("total_purchases", sa.Integer(), nullable=False),
+            sa.Column("total_earnings", sa.Float(), nullable=False),
+            *_timestamps()
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_wallet_address", "users", ["wallet_address"], unique=True)
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if not inspector.has_table("datasets"):
+        op.create_table(
+            "datasets",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("blockchain_id", sa.Integer(), nullable=True),
+            sa.Column("title", sa.String(200), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("tags", sa.JSON(), nullable=True),
+            sa.Column("filename", sa.String(255), nullable=False),
+            sa.Column("file_type", sa.String(10), nullable=False),
+            sa.Column("file_size", sa.Integer(), nullable=False),
+            sa.Column("ipfs_hash", sa.String(100), nullable=False),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("is_free", sa.Boolean(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("records_count", sa.Integer(), nullable=False),
+            sa.Column("columns_count", sa.Integer(), nullable=False),
+            sa.Column("metadata", sa.JSON(), nullable=True),
+            sa.Column("preview_data", sa.JSON(), nullable=True),
+            sa.Column("quality_score", sa.Float(), nullable=False),
+            sa.Column("average_rating", sa.Float(), nullable=False),
+            sa.Column("rating_count", sa.Integer(), nullable=False),
+            sa.Column("total_sales", sa.Integer(), nullable=False),
+            sa.Column("total_revenue", sa.Float(), nullable=False),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            *_timestamps()
+        )
+        op.create_index("ix_datasets_id", "datasets", ["id"])
+        op.create_index("ix_datasets_blockchain_id", "datasets", ["blockchain_id"], unique=True)
+        op.create_index("ix_datasets_title", "datasets", ["title"])
+        op.create_index("ix_datasets_ipfs_hash", "datasets", ["ipfs_hash"])
+
+    if not inspector.has_table("dataset_access"):
+        op.create_table(
+            "dataset_access",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("dataset_id", sa.Integer(), sa.ForeignKey("datasets.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("transaction_hash", sa.String(100), nullable=True),
+            sa.Column("price_paid", sa.Float(), nullable=False),
+            sa.Column("access_granted", sa.Boolean(), nullable=False),
+            sa.Column("download_count", sa.Integer(), nullable=False),
+            sa.Column("last_accessed", sa.DateTime(), nullable=True),
+            *_timestamps()
+        )
+        op.create_index("ix_dataset_access_id", "dataset_access", ["id"])
+
+    if not inspector.has_table("dataset_ratings"):
+        op.create_table(
+            "dataset_ratings",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("dataset_id", sa.Integer(), sa.ForeignKey("datasets.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("rating", sa.Integer(), nullable=False),
+            sa.Column("review", sa.Text(), nullable=True),
+            sa.Column("is_verified_purchase", sa.Boolean(), nullable=False),
+            *_timestamps()
+        )
+        op.create_index("ix_dataset_ratings_id", "dataset_ratings", ["id"])
+
+    if not inspector.has_table("transactions"):
+        op.create_table(
+            "transactions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("transaction_hash", sa.String(100), nullable=False),
+            sa.Column("block_height", sa.Integer(), nullable=True),
+            sa.Column("transaction_type", sa.Enum(
+                "DATASET_PURCHASE", "DATASET_SALE", "PLATFORM_FEE", "WITHDRAWAL",
+                name="transactiontype"
+            ), nullable=False),
+            sa.Column("status", sa.Enum(
+                "PENDING", "CONFIRMED", "FAILED", "CANCELLED",
+                name="transactionstatus"
+            ), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("fee", sa.Float(), nullable=False),
+            sa.Column("platform_fee", sa.Float(), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("dataset_id", sa.Integer(), sa.ForeignKey("datasets.id"), nullable=True),
+            sa.Column("metadata", sa.String(500), nullable=True),
+            *_timestamps()
+        )
+        op.create_index("ix_transactions_id", "transactions", ["id"])
+        op.create_index("ix_transactions_transaction_hash", "transactions", ["transaction_hash"], unique=True)
+
+
+def downgrade():
+    op.drop_table("transactions")
+    op.drop_table("dataset_ratings")
+    op.drop_table("dataset_access")
+    op.drop_table("datasets")
+    op.drop_table("users")
+    sa.Enum(name="transactionstatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="transactiontype").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,46 @@
+"""Indexes for hot access paths
+
+Databases created by init_db() already get these indexes from the models;
+older ones pick them up here. On PostgreSQL they are built CONCURRENTLY,
+outside the migration transaction, so live tables stay writable.
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2024-02-01 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = "0000"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_dataset_access_dataset_user", "dataset_access", ["dataset_id", "user_id"]),
+    ("ix_dataset_access_user_created", "dataset_access", ["user_id", "created_at"]),
+    ("ix_dataset_access_created_at", "dataset_access", ["created_at"]),
+    ("ix_users_created_at", "users", ["created_at"]),
+    ("ix_datasets_active_created", "datasets", ["is_active", "created_at", "id"]),
+    ("ix_datasets_owner_active", "datasets", ["owner_id", "is_active", "created_at"]),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if name not in _existing_indexes(table):
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            if name in _existing_indexes(table):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,43 @@
+"""Listings table for bulk imports
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-02-08 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("listings"):
+        return
+
+    op.create_table(
+        "listings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("car_name", sa.String(200), nullable=False),
+        sa.Column("brand", sa.String(50), nullable=True),
+        sa.Column("year", sa.Integer(), nullable=True),
+        sa.Column("color", sa.String(50), nullable=True),
+        sa.Column("condition", sa.String(50), nullable=True),
+        sa.Column("mileage", sa.Float(), nullable=True),
+        sa.Column("price", sa.Float(), nullable=True),
+        sa.Column("region", sa.String(100), nullable=True),
+        sa.Column("source", sa.String(255), nullable=False),
+        sa.Column("dataset_id", sa.Integer(), sa.ForeignKey("datasets.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False)
+    )
+    op.create_index("ix_listings_id", "listings", ["id"])
+    op.create_index("ix_listings_source", "listings", ["source"])
+    op.create_index("ix_listings_brand_year", "listings", ["brand", "year"])
+
+
+def downgrade():
+    op.drop_table("listings")
@@ -0,0 +1,33 @@
+"""Counter delta journal
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-02-15 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("counter_deltas"):
+        return
+
+    op.create_table(
+        "counter_deltas",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("target_table", sa.String(50), nullable=False),
+        sa.Column("target_id", sa.Integer(), nullable=False),
+        sa.Column("field", sa.String(50), nullable=False),
+        sa.Column("delta", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now())
+    )
+
+
+def downgrade():
+    op.drop_table("counter_deltas")
@@ -0,0 +1,36 @@
+"""Pin job queue
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-02-22 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("pin_jobs"):
+        return
+
+    op.create_table(
+        "pin_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ipfs_hash", sa.String(100), nullable=False, unique=True),
+        sa.Column("action", sa.String(10), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now())
+    )
+    op.create_index("ix_pin_jobs_next_attempt", "pin_jobs", ["next_attempt_at"])
+
+
+def downgrade():
+    op.drop_index("ix_pin_jobs_next_attempt", table_name="pin_jobs")
+    op.drop_table("pin_jobs")
@@ -0,0 +1,58 @@
+"""Chain indexer cursor, recent block hashes and indexed access rows
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-03-01 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("indexer_state"):
+        op.create_table(
+            "indexer_state",
+            sa.Column("name", sa.String(50), primary_key=True),
+            sa.Column("block_height", sa.Integer(), nullable=False),
+            sa.Column("block_hash", sa.String(100), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now())
+        )
+
+    if not inspector.has_table("indexed_blocks"):
+        op.create_table(
+            "indexed_blocks",
+            sa.Column("height", sa.Integer(), primary_key=True),
+            sa.Column("block_hash", sa.String(100), nullable=False),
+            sa.Column("parent_hash", sa.String(100), nullable=False),
+            sa.Column("indexed_at", sa.DateTime(), nullable=False, server_default=sa.func.now())
+        )
+
+    columns = {column["name"] for column in inspector.get_columns("dataset_access")}
+    if "block_height" not in columns:
+        op.add_column("dataset_access", sa.Column("block_height", sa.Integer(), nullable=True))
+    indexes = {index["name"] for index in inspector.get_indexes("dataset_access")}
+    if "ix_dataset_access_block_height" not in indexes:
+        op.create_index("ix_dataset_access_block_height", "dataset_access", ["block_height"])
+    if "ix_dataset_access_transaction_hash" not in indexes:
+        op.create_index("ix_dataset_access_transaction_hash", "dataset_access", ["transaction_hash"])
+
+    indexes = {index["name"] for index in inspector.get_indexes("transactions")}
+    if "ix_transactions_block_height" not in indexes:
+        op.create_index("ix_transactions_block_height", "transactions", ["block_height"])
+
+
+def downgrade():
+    op.drop_index("ix_transactions_block_height", table_name="transactions")
+    op.drop_index("ix_dataset_access_transaction_hash", table_name="dataset_access")
+    op.drop_index("ix_dataset_access_block_height", table_name="dataset_access")
+    op.drop_column("dataset_access", "block_height")
+    op.drop_table("indexed_blocks")
+    op.drop_table("indexer_state")
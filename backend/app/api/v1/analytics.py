@@ -3,13 +3,13 @@ Analytics endpoints
 """
 
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import logging
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.core.security import get_optional_user
 from app.models.dataset import Dataset, DatasetAccess
 from app.models.user import User
@@ -21,52 +21,52 @@ router = APIRouter()
 
 @router.get("/marketplace-stats")
 async def get_marketplace_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Optional[Dict[str, Any]] = Depends(get_optional_user)
 ):
     """Get marketplace statistics"""
     try:
         # Basic counts
-        total_datasets = db.query(Dataset).filter(Dataset.is_active == True).count()
-        total_users = db.query(User).filter(User.is_active == True).count()
-        total_transactions = db.query(DatasetAccess).count()
+        total_datasets = await db.scalar(select(func.count(Dataset.id)).where(Dataset.is_active == True))
+        total_users = await db.scalar(select(func.count(User.id)).where(User.is_active == True))
+        total_transactions = await db.scalar(select(func.count(DatasetAccess.id)))
 
         # Revenue statistics
-        total_revenue = db.query(func.sum(DatasetAccess.price_paid)).scalar() or 0
+        total_revenue = await db.scalar(select(func.sum(DatasetAccess.price_paid))) or 0
 
         # Recent activity (last 30 days)
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_datasets = db.query(Dataset).filter(
+        recent_datasets = await db.scalar(select(func.count(Dataset.id)).where(
             Dataset.created_at >= thirty_days_ago,
             Dataset.is_active == True
-        ).count()
+        ))
 
-        recent_transactions = db.query(DatasetAccess).filter(
+        recent_transactions = await db.scalar(select(func.count(DatasetAccess.id)).where(
             DatasetAccess.created_at >= thirty_days_ago
-        ).count()
+        ))
 
         # Top datasets by sales
-        top_datasets = db.query(
+        top_datasets = (await db.execute(select(
             Dataset.id,
             Dataset.title,
             Dataset.total_sales,
             Dataset.total_revenue
-        ).filter(
+        ).where(
             Dataset.is_active == True
-        ).order_by(desc(Dataset.total_sales)).limit(5).all()
+        ).order_by(desc(Dataset.total_sales)).limit(5))).all()
 
         # Top sellers
-        top_sellers = db.query(
+        top_sellers = (await db.execute(select(
             User.id,
             User.wallet_address,
             User.username,
             User.display_name,
             User.total_uploads,
             User.total_earnings
-        ).filter(
+        ).where(
             User.is_active == True,
             User.total_uploads > 0
-        ).order_by(desc(User.total_earnings)).limit(5).all()
+        ).order_by(desc(User.total_earnings)).limit(5))).all()
 
         return {
             "overview": {
@@ -112,27 +112,27 @@ async def get_marketplace_stats(
 @router.get("/price-trends")
 async def get_price_trends(
     days: int = 30,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get price trends over time"""
     try:
         start_date = datetime.utcnow() - timedelta(days=days)
 
         # Get daily average prices
-        daily_prices = db.query(
+        daily_prices = (await db.execute(select(
             func.date(DatasetAccess.created_at).label('date'),
             func.avg(DatasetAccess.price_paid).label('avg_price'),
             func.count(DatasetAccess.id).label('transaction_count')
-        ).filter(
+        ).where(
             DatasetAccess.created_at >= start_date
         ).group_by(
             func.date(DatasetAccess.created_at)
-        ).order_by('date').all()
+        ).order_by('date'))).all()
 
         return {
             "price_trends": [
                 {
-                    "date": trend.date.isoformat(),
+                    "date": str(trend.date),
                     "average_price": round(float(trend.avg_price), 2),
                     "transaction_count": trend.transaction_count
                 }
@@ -150,15 +150,15 @@ async def get_price_trends(
 
 @router.get("/category-distribution")
 async def get_category_distribution(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get distribution of datasets by category/tags"""
     try:
         # Get all datasets with tags
-        datasets = db.query(Dataset.tags).filter(
+        datasets = (await db.execute(select(Dataset.tags).where(
             Dataset.is_active == True,
             Dataset.tags.isnot(None)
-        ).all()
+        ))).all()
 
         # Count tag occurrences
         tag_counts = {}
@@ -191,7 +191,7 @@ async def get_category_distribution(
 
 @router.get("/quality-metrics")
 async def get_quality_metrics(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get quality metrics across all datasets"""
     try:
@@ -206,11 +206,11 @@ async def get_quality_metrics(
 
         quality_distribution = []
         for min_score, max_score, label in quality_ranges:
-            count = db.query(Dataset).filter(
+            count = await db.scalar(select(func.count(Dataset.id)).where(
                 Dataset.is_active == True,
                 Dataset.quality_score >= min_score,
                 Dataset.quality_score <= max_score
-            ).count()
+            ))
 
             quality_distribution.append({
                 "range": f"{min_score}-{max_score}",
@@ -219,18 +219,18 @@ async def get_quality_metrics(
             })
 
         # Average quality score
-        avg_quality = db.query(func.avg(Dataset.quality_score)).filter(
+        avg_quality = await db.scalar(select(func.avg(Dataset.quality_score)).where(
             Dataset.is_active == True
-        ).scalar() or 0
+        )) or 0
 
         # Rating distribution
         rating_distribution = []
         for rating in range(1, 6):
-            count = db.query(Dataset).filter(
+            count = await db.scalar(select(func.count(Dataset.id)).where(
                 Dataset.is_active == True,
                 Dataset.average_rating >= rating,
                 Dataset.average_rating < rating + 1
-            ).count()
+            ))
 
             rating_distribution.append({
                 "rating": rating,
@@ -254,35 +254,35 @@ async def get_quality_metrics(
 @router.get("/user-activity")
 async def get_user_activity(
     days: int = 30,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user activity metrics"""
     try:
         start_date = datetime.utcnow() - timedelta(days=days)
 
         # New users over time
-        daily_signups = db.query(
+        daily_signups = (await db.execute(select(
             func.date(User.created_at).label('date'),
             func.count(User.id).label('new_users')
-        ).filter(
+        ).where(
             User.created_at >= start_date,
             User.is_active == True
         ).group_by(
             func.date(User.created_at)
-        ).order_by('date').all()
+        ).order_by('date'))).all()
 
         # Active users (users who made transactions)
-        active_users = db.query(func.count(func.distinct(DatasetAccess.user_id))).filter(
+        active_users = await db.scalar(select(func.count(func.distinct(DatasetAccess.user_id))).where(
             DatasetAccess.created_at >= start_date
-        ).scalar() or 0
+        )) or 0
 
         # User engagement metrics
-        total_active_users = db.query(User).filter(User.is_active == True).count()
+        total_active_users = await db.scalar(select(func.count(User.id)).where(User.is_active == True))
 
         return {
             "daily_signups": [
                 {
-                    "date": signup.date.isoformat(),
+                    "date": str(signup.date),
                     "new_users": signup.new_users
                 }
                 for signup in daily_signups
@@ -305,7 +305,7 @@ async def get_market_data(
     time_range: str = "30d",
     state: str = "all",
     brand: str = "all",
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get comprehensive Nigerian car market analytics data"""
     try:
@@ -3,10 +3,11 @@ Authentication endpoints
 """
 
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Dict, Any
-from app.core.database import get_db
+from app.core.database import get_read_db, get_write_db
 from app.core.security import verify_wallet_signature, create_access_token, get_current_user
 from app.models.user import User
 import logging
@@ -32,7 +33,7 @@ class AuthResponse(BaseModel):
 @router.post("/wallet", response_model=AuthResponse)
 async def authenticate_wallet(
     auth_request: WalletAuthRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Authenticate user with wallet signature"""
     try:
@@ -50,14 +51,15 @@ async def authenticate_wallet(
             )
         
         # Get or create user
-        user = db.query(User).filter(User.wallet_address == auth_request.wallet_address).first()
+        result = await db.execute(select(User).where(User.wallet_address == auth_request.wallet_address))
+        user = result.scalars().first()
         
         if not user:
             # Create new user
             user = User(wallet_address=auth_request.wallet_address)
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             logger.info(f"Created new user: {auth_request.wallet_address}")
         
         # Check if user is active
@@ -97,11 +99,11 @@ async def authenticate_wallet(
 @router.get("/me")
 async def get_current_user_info(
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get current user information"""
     try:
-        user = db.query(User).filter(User.id == current_user["id"]).first()
+        user = await db.get(User, current_user["id"])
         
         if not user:
             raise HTTPException(
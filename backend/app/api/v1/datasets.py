@@ -2,23 +2,42 @@
 Dataset endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 import logging
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_read_db, get_write_db
+from app.core.http_cache import make_etag, not_modified_response, set_cache_headers
+from app.core.http_range import parse_range_header, if_range_allows
+from app.core.limits import KeyedConcurrencyLimiter
+from app.core.serialization import dataset_to_dict, json_response
+from app.core.pagination import encode_cursor, decode_cursor, keyset_condition, listing_count_cache
 from app.core.security import get_current_user, get_optional_user, check_dataset_access
-from app.models.dataset import Dataset, DatasetAccess, DatasetRating
+from app.models.dataset import Dataset
 from app.models.user import User
 from app.services.storage import IPFSService
+from app.services.compression import IDENTITY, accepts_encoding, decompress_stream
 from app.services.data_processor import DataProcessor
-from app.services.blockchain import StacksService
+from app.services.search import search_index
+from app.services.counters import record_counters
+from app.services.pinning import queue_pins
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Open download streams per user
+download_limiter = KeyedConcurrencyLimiter(
+    settings.DOWNLOAD_MAX_CONCURRENT_PER_USER,
+    detail="Too many concurrent downloads"
+)
+
 
 class DatasetResponse(BaseModel):
     """Response model for dataset"""
@@ -40,94 +59,197 @@ class DatasetResponse(BaseModel):
 class DatasetListResponse(BaseModel):
     """Response model for dataset list"""
     datasets: List[DatasetResponse]
-    total: int
+    total: Optional[int]
+    total_is_estimate: bool = False
     page: int
     per_page: int
+    next_cursor: Optional[str] = None
+
+
+# Columns the catalog can be sorted on (plus "relevance" for searches)
+SORT_COLUMNS = {
+    "created_at": Dataset.created_at,
+    "price": Dataset.price,
+    "title": Dataset.title,
+    "quality_score": Dataset.quality_score,
+    "average_rating": Dataset.average_rating,
+    "total_sales": Dataset.total_sales,
+    "records_count": Dataset.records_count
+}
 
 
 @router.get("/", response_model=DatasetListResponse)
 async def list_datasets(
+    request: Request,
     page: int = 1,
     per_page: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     search: Optional[str] = None,
     tags: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    sort_by: str = "created_at",
+    sort_by: Optional[str] = None,
     sort_order: str = "desc",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Optional[Dict[str, Any]] = Depends(get_optional_user)
 ):
-    """List datasets with filtering and pagination"""
+    """List datasets with filtering and pagination
+
+    Searches are answered from the in-process search index and sorted by
+    relevance unless another sort_by is given.
+
+    Pages are keyed on (sort column, id): pass the returned next_cursor to
+    fetch the following page at constant cost. ``page`` is still honoured
+    for clients that do not send a cursor. The total is served from a
+    short-lived cache unless include_total is set.
+
+    The ETag covers the query and the version of every row on the page. The
+    page is first chosen on row versions alone, so a matching If-None-Match
+    is answered with 304 before the full rows are loaded or serialized.
+    Rows are encoded directly; DatasetListResponse documents the shape.
+    """
     try:
-        query = db.query(Dataset).filter(Dataset.is_active == True)
+        per_page = max(1, min(per_page, settings.LISTING_MAX_PER_PAGE))
+        sort_order = sort_order.lower()
+        if sort_order not in ("asc", "desc"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="sort_order must be 'asc' or 'desc'"
+            )
+        descending = sort_order == "desc"
+        
+        conditions = [Dataset.is_active == True]
         
         # Apply filters
+        scores = None
         if search:
-            query = query.filter(
-                Dataset.title.ilike(f"%{search}%") |
-                Dataset.description.ilike(f"%{search}%")
+            await db.run_sync(search_index.sync)
+            scores = dict(search_index.search(search, limit=settings.SEARCH_MAX_RESULTS))
+            if scores:
+                conditions.append(Dataset.id.in_(list(scores)))
+        
+        if sort_by is None:
+            sort_by = "relevance" if scores is not None else "created_at"
+        
+        if sort_by not in SORT_COLUMNS and not (sort_by == "relevance" and scores is not None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot sort by '{sort_by}'"
             )
         
         if tags:
             tag_list = [tag.strip() for tag in tags.split(",")]
             for tag in tag_list:
-                query = query.filter(Dataset.tags.contains([tag]))
+                conditions.append(Dataset.tags.contains([tag]))
         
         if min_price is not None:
-            query = query.filter(Dataset.price >= min_price)
+            conditions.append(Dataset.price >= min_price)
         
         if max_price is not None:
-            query = query.filter(Dataset.price <= max_price)
+            conditions.append(Dataset.price <= max_price)
         
-        # Apply sorting
-        if sort_order.lower() == "desc":
-            query = query.order_by(getattr(Dataset, sort_by).desc())
-        else:
-            query = query.order_by(getattr(Dataset, sort_by).asc())
+        offset = (page - 1) * per_page if not cursor else 0
+        total_is_estimate = False
+        next_cursor = None
         
-        # Get total count
-        total = query.count()
+        # The page is chosen on row versions alone; full rows load only on an ETag miss
+        versions = select(
+            Dataset.id,
+            Dataset.updated_at.label("dataset_version"),
+            User.updated_at.label("owner_version")
+        ).join(User, User.id == Dataset.owner_id)
         
-        # Apply pagination
-        offset = (page - 1) * per_page
-        datasets = query.offset(offset).limit(per_page).all()
-        
-        # Format response
-        dataset_responses = []
-        for dataset in datasets:
-            owner = db.query(User).filter(User.id == dataset.owner_id).first()
+        if scores is not None and not scores:
+            # Nothing matches the search
+            page_rows, total = [], 0
+        elif sort_by == "relevance":
+            # Rank the filtered candidates by score, then read only the page
+            matching_ids = list((await db.execute(select(Dataset.id).where(*conditions))).scalars())
+            rank_key = lambda dataset_id: (-scores[dataset_id], dataset_id)
+            matching_ids.sort(key=rank_key, reverse=not descending)
+            total = len(matching_ids)
+            
+            if cursor:
+                last_score, last_id = decode_cursor(cursor, sort_by, sort_order)
+                last_key = (-last_score, last_id)
+                matching_ids = [
+                    dataset_id for dataset_id in matching_ids
+                    if (rank_key(dataset_id) > last_key if descending else rank_key(dataset_id) < last_key)
+                ]
+            
+            page_ids = matching_ids[offset:offset + per_page]
+            found = {row.id: row for row in (await db.execute(versions.where(Dataset.id.in_(page_ids)))).all()}
+            page_rows = [found[dataset_id] for dataset_id in page_ids if dataset_id in found]
+            
+            if len(matching_ids) > offset + per_page and page_rows:
+                last_id = page_rows[-1].id
+                next_cursor = encode_cursor(sort_by, sort_order, scores[last_id], last_id)
+        else:
+            sort_column = SORT_COLUMNS[sort_by]
+            count_query = select(func.count()).select_from(Dataset).where(*conditions)
+            
+            # Get total count
+            if include_total:
+                total = await db.scalar(count_query)
+            else:
+                count_key = f"{search}|{tags}|{min_price}|{max_price}"
+                total = await listing_count_cache.get_or_compute(count_key, lambda: db.scalar(count_query))
+                total_is_estimate = True
+            
+            query = versions.add_columns(sort_column.label("sort_value")).where(*conditions)
+            if cursor:
+                last_value, last_id = decode_cursor(cursor, sort_by, sort_order)
+                query = query.where(keyset_condition(sort_column, Dataset.id, last_value, last_id, descending))
             
-            dataset_responses.append(DatasetResponse(
-                id=dataset.id,
-                title=dataset.title,
-                description=dataset.description,
-                tags=dataset.tags or [],
-                price=dataset.price,
-                records_count=dataset.records_count,
-                quality_score=dataset.quality_score,
-                average_rating=dataset.average_rating,
-                rating_count=dataset.rating_count,
-                total_sales=dataset.total_sales,
-                owner={
-                    "id": owner.id,
-                    "wallet_address": owner.wallet_address,
-                    "username": owner.username,
-                    "display_name": owner.display_name,
-                    "is_verified": owner.is_verified,
-                    "reputation_score": owner.reputation_score
-                },
-                created_at=dataset.created_at.isoformat(),
-                preview_data=dataset.preview_data
-            ))
-        
-        return DatasetListResponse(
-            datasets=dataset_responses,
-            total=total,
-            page=page,
-            per_page=per_page
+            # Apply sorting
+            if descending:
+                query = query.order_by(sort_column.desc(), Dataset.id.desc())
+            else:
+                query = query.order_by(sort_column.asc(), Dataset.id.asc())
+            
+            # Apply pagination, fetching one extra row to detect a next page
+            page_rows = list((await db.execute(query.offset(offset).limit(per_page + 1))).all())
+            if len(page_rows) > per_page:
+                page_rows = page_rows[:per_page]
+                last = page_rows[-1]
+                next_cursor = encode_cursor(sort_by, sort_order, last.sort_value, last.id)
+        
+        etag = make_etag(
+            request.url.query,
+            total,
+            next_cursor,
+            *[part for row in page_rows for part in (row.id, row.dataset_version, row.owner_version)],
+            weak=True
         )
+        cached = not_modified_response(request, etag, settings.LISTING_CACHE_MAX_AGE)
+        if cached:
+            return cached
+        
+        datasets = []
+        if page_rows:
+            page_ids = [row.id for row in page_rows]
+            loaded = {
+                dataset.id: dataset
+                for dataset in (await db.execute(
+                    select(Dataset).options(joinedload(Dataset.owner)).where(Dataset.id.in_(page_ids))
+                )).scalars()
+            }
+            datasets = [loaded[dataset_id] for dataset_id in page_ids if dataset_id in loaded]
         
+        result = json_response({
+            "datasets": [dataset_to_dict(dataset) for dataset in datasets],
+            "total": total,
+            "total_is_estimate": total_is_estimate,
+            "page": page,
+            "per_page": per_page,
+            "next_cursor": next_cursor
+        }, DatasetListResponse)
+        set_cache_headers(result, etag, settings.LISTING_CACHE_MAX_AGE)
+        return result
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to list datasets: {e}")
         raise HTTPException(
@@ -139,15 +261,38 @@ async def list_datasets(
 @router.get("/{dataset_id}", response_model=DatasetResponse)
 async def get_dataset(
     dataset_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     current_user: Optional[Dict[str, Any]] = Depends(get_optional_user)
 ):
-    """Get dataset by ID"""
+    """Get dataset by ID
+
+    Revalidation only reads the row versions; preview_data and the owner
+    are loaded when the client's copy is stale.
+    """
     try:
-        dataset = db.query(Dataset).filter(
+        versions = (await db.execute(select(Dataset.updated_at, User.updated_at).join(
+            User, User.id == Dataset.owner_id
+        ).where(
             Dataset.id == dataset_id,
             Dataset.is_active == True
-        ).first()
+        ))).first()
+        
+        if not versions:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dataset not found"
+            )
+        
+        etag = make_etag(dataset_id, *versions, weak=True)
+        cached = not_modified_response(request, etag, settings.DATASET_CACHE_MAX_AGE)
+        if cached:
+            return cached
+        
+        dataset = await db.scalar(select(Dataset).options(joinedload(Dataset.owner)).where(
+            Dataset.id == dataset_id,
+            Dataset.is_active == True
+        ))
         
         if not dataset:
             raise HTTPException(
@@ -155,30 +300,9 @@ async def get_dataset(
                 detail="Dataset not found"
             )
         
-        owner = db.query(User).filter(User.id == dataset.owner_id).first()
-        
-        return DatasetResponse(
-            id=dataset.id,
-            title=dataset.title,
-            description=dataset.description,
-            tags=dataset.tags or [],
-            price=dataset.price,
-            records_count=dataset.records_count,
-            quality_score=dataset.quality_score,
-            average_rating=dataset.average_rating,
-            rating_count=dataset.rating_count,
-            total_sales=dataset.total_sales,
-            owner={
-                "id": owner.id,
-                "wallet_address": owner.wallet_address,
-                "username": owner.username,
-                "display_name": owner.display_name,
-                "is_verified": owner.is_verified,
-                "reputation_score": owner.reputation_score
-            },
-            created_at=dataset.created_at.isoformat(),
-            preview_data=dataset.preview_data
-        )
+        result = json_response(dataset_to_dict(dataset), DatasetResponse)
+        set_cache_headers(result, etag, settings.DATASET_CACHE_MAX_AGE)
+        return result
         
     except HTTPException:
         raise
@@ -190,6 +314,130 @@ async def get_dataset(
         )
 
 
+@router.get("/{dataset_id}/download")
+async def download_dataset(
+    dataset_id: int,
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Stream a purchased or owned dataset from IPFS
+
+    Content is relayed in DOWNLOAD_CHUNK_SIZE pieces. Payloads stored
+    compressed are sent as-is with Content-Encoding to clients that accept
+    the codec and decompressed on the fly for the rest. A single byte range
+    (Range / If-Range) over the sent representation is answered with 206 so
+    interrupted downloads resume where they stopped.
+    """
+    try:
+        storage = Dataset.dataset_metadata["storage"]
+        dataset = (await db.execute(select(
+            Dataset.ipfs_hash,
+            storage["codec"].as_string().label("codec"),
+            storage["size"].as_integer().label("size")
+        ).where(
+            Dataset.id == dataset_id,
+            Dataset.is_active == True
+        ))).first()
+        
+        if not dataset:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dataset not found"
+            )
+        
+        if not await check_dataset_access(dataset_id, current_user["id"], db, current_user["wallet_address"]):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied. Purchase required."
+            )
+        
+        codec = dataset.codec or IDENTITY
+        decode = not accepts_encoding(request.headers.get("accept-encoding"), codec)
+        
+        slot = download_limiter.acquire(current_user["id"])
+        try:
+            ipfs_service = IPFSService()
+            # Content-addressed, so the hash is a strong validator for the stored bytes
+            etag = f'"{dataset.ipfs_hash}-{IDENTITY}"' if decode else f'"{dataset.ipfs_hash}"'
+            
+            byte_range = None
+            if decode:
+                # Decoded on the fly: the length comes from metadata and ranges are not offered
+                size = dataset.size
+            else:
+                size = await ipfs_service.get_file_size(dataset.ipfs_hash)
+                if size is not None and if_range_allows(request, etag):
+                    byte_range = parse_range_header(request.headers.get("range"), size)
+            
+            if byte_range:
+                offset, length = byte_range[0], byte_range[1] - byte_range[0] + 1
+            else:
+                offset, length = 0, None
+            
+            stream = await ipfs_service.open_stream(dataset.ipfs_hash, offset, length)
+            if stream is None:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Dataset content is temporarily unavailable"
+                )
+        except BaseException:
+            slot.release()
+            raise
+        
+        headers = {
+            "Accept-Ranges": "none" if decode else "bytes",
+            "ETag": etag,
+            "Cache-Control": "private, no-store",
+            "Content-Disposition": f'attachment; filename="dataset_{dataset_id}.json"'
+        }
+        if codec != IDENTITY:
+            headers["Vary"] = "Accept-Encoding"
+            if not decode:
+                headers["Content-Encoding"] = codec
+        if byte_range:
+            headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+            headers["Content-Length"] = str(length)
+        elif size is not None:
+            headers["Content-Length"] = str(size)
+        
+        chunks = decompress_stream(stream, codec) if decode else stream
+        released = False
+        
+        async def release():
+            nonlocal released
+            if not released:
+                released = True
+                slot.release()
+                await stream.aclose()
+        
+        async def body():
+            # Releases when the body is sent or reading it fails
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                await release()
+        
+        return StreamingResponse(
+            body(),
+            status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+            media_type="application/octet-stream",
+            headers=headers,
+            # Backstop for client disconnects, which abandon body() mid-iteration
+            background=BackgroundTask(release)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to download dataset {dataset_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Download failed"
+        )
+
+
 @router.post("/upload")
 async def upload_dataset(
     title: str = Form(...),
@@ -198,7 +446,7 @@ async def upload_dataset(
     price: float = Form(...),
     file: UploadFile = File(...),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Upload a new dataset"""
     try:
@@ -209,15 +457,16 @@ async def upload_dataset(
         data_processor = DataProcessor()
         processed_data = await data_processor.process_upload(file_content, file.filename)
         
-        # Upload to IPFS
+        # Upload to IPFS (compressed per STORAGE_COMPRESSION); pinned by the pin manager
         ipfs_service = IPFSService()
-        ipfs_hash = await ipfs_service.upload_json(processed_data)
+        stored = await ipfs_service.store_json(processed_data, pin=False)
         
-        if not ipfs_hash:
+        if not stored:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to upload file to IPFS"
             )
+        ipfs_hash = stored.pop("ipfs_hash")
         
         # Create dataset record
         tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
@@ -234,20 +483,25 @@ async def upload_dataset(
             is_free=price == 0,
             records_count=processed_data["metadata"]["records_count"],
             columns_count=processed_data["metadata"]["columns_count"],
-            metadata=processed_data["metadata"],
+            # Codec the IPFS payload was stored with; downloads rely on it
+            dataset_metadata={**processed_data["metadata"], "storage": stored},
             preview_data=processed_data["preview"],
             quality_score=processed_data["quality_score"],
             owner_id=current_user["id"]
         )
         
         db.add(dataset)
-        db.commit()
-        db.refresh(dataset)
         
-        # Update user stats
-        user = db.query(User).filter(User.id == current_user["id"]).first()
-        user.total_uploads += 1
-        db.commit()
+        # Update user stats (applied by the counter flusher)
+        record_counters(db, User, current_user["id"], total_uploads=1)
+        
+        # Pin intent commits with the dataset row
+        await queue_pins(db, [ipfs_hash])
+        
+        await db.commit()
+        await db.refresh(dataset)
+        
+        search_index.add_dataset(dataset)
         
         logger.info(f"Dataset uploaded successfully: {dataset.id}")
         
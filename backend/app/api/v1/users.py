@@ -3,13 +3,16 @@ User endpoints
 """
 
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 import logging
 
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_read_db, get_write_db
+from app.core.security import get_current_user, invalidate_principal
+from app.core.serialization import json_response, user_to_dict
 from app.models.user import User
 from app.models.dataset import Dataset, DatasetAccess
 
@@ -46,11 +49,11 @@ class UserResponse(BaseModel):
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_profile(
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get current user profile"""
     try:
-        user = db.query(User).filter(User.id == current_user["id"]).first()
+        user = await db.get(User, current_user["id"])
         
         if not user:
             raise HTTPException(
@@ -58,21 +61,7 @@ async def get_current_user_profile(
                 detail="User not found"
             )
         
-        return UserResponse(
-            id=user.id,
-            wallet_address=user.wallet_address,
-            username=user.username,
-            email=user.email,
-            display_name=user.display_name,
-            bio=user.bio,
-            website=user.website,
-            is_verified=user.is_verified,
-            reputation_score=user.reputation_score,
-            total_uploads=user.total_uploads,
-            total_purchases=user.total_purchases,
-            total_earnings=user.total_earnings,
-            created_at=user.created_at.isoformat()
-        )
+        return json_response(user_to_dict(user), UserResponse)
         
     except HTTPException:
         raise
@@ -88,11 +77,11 @@ async def get_current_user_profile(
 async def update_user_profile(
     profile_update: UserProfileUpdate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Update current user profile"""
     try:
-        user = db.query(User).filter(User.id == current_user["id"]).first()
+        user = await db.get(User, current_user["id"])
         
         if not user:
             raise HTTPException(
@@ -105,10 +94,10 @@ async def update_user_profile(
         
         # Check username uniqueness
         if "username" in update_data and update_data["username"]:
-            existing_user = db.query(User).filter(
+            existing_user = await db.scalar(select(User.id).where(
                 User.username == update_data["username"],
                 User.id != user.id
-            ).first()
+            ).limit(1))
             if existing_user:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -117,10 +106,10 @@ async def update_user_profile(
         
         # Check email uniqueness
         if "email" in update_data and update_data["email"]:
-            existing_user = db.query(User).filter(
+            existing_user = await db.scalar(select(User.id).where(
                 User.email == update_data["email"],
                 User.id != user.id
-            ).first()
+            ).limit(1))
             if existing_user:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -131,24 +120,11 @@ async def update_user_profile(
         for field, value in update_data.items():
             setattr(user, field, value)
         
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        invalidate_principal(user.wallet_address)
         
-        return UserResponse(
-            id=user.id,
-            wallet_address=user.wallet_address,
-            username=user.username,
-            email=user.email,
-            display_name=user.display_name,
-            bio=user.bio,
-            website=user.website,
-            is_verified=user.is_verified,
-            reputation_score=user.reputation_score,
-            total_uploads=user.total_uploads,
-            total_purchases=user.total_purchases,
-            total_earnings=user.total_earnings,
-            created_at=user.created_at.isoformat()
-        )
+        return json_response(user_to_dict(user), UserResponse)
         
     except HTTPException:
         raise
@@ -163,16 +139,17 @@ async def update_user_profile(
 @router.get("/me/datasets")
 async def get_user_datasets(
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get current user's datasets"""
     try:
-        datasets = db.query(Dataset).filter(
+        result = await db.execute(select(Dataset).where(
             Dataset.owner_id == current_user["id"],
             Dataset.is_active == True
-        ).order_by(Dataset.created_at.desc()).all()
+        ).order_by(Dataset.created_at.desc()))
+        datasets = result.scalars().all()
         
-        return {
+        return json_response({
             "datasets": [
                 {
                     "id": dataset.id,
@@ -189,7 +166,7 @@ async def get_user_datasets(
                 for dataset in datasets
             ],
             "total": len(datasets)
-        }
+        })
         
     except Exception as e:
         logger.error(f"Failed to get user datasets: {e}")
@@ -202,18 +179,19 @@ async def get_user_datasets(
 @router.get("/me/purchases")
 async def get_user_purchases(
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get current user's purchases"""
     try:
-        purchases = db.query(DatasetAccess).filter(
+        result = await db.execute(select(DatasetAccess).options(joinedload(DatasetAccess.dataset)).where(
             DatasetAccess.user_id == current_user["id"],
             DatasetAccess.access_granted == True
-        ).order_by(DatasetAccess.created_at.desc()).all()
+        ).order_by(DatasetAccess.created_at.desc()))
+        purchases = result.scalars().all()
         
         purchase_data = []
         for purchase in purchases:
-            dataset = db.query(Dataset).filter(Dataset.id == purchase.dataset_id).first()
+            dataset = purchase.dataset
             if dataset:
                 purchase_data.append({
                     "id": purchase.id,
@@ -230,10 +208,10 @@ async def get_user_purchases(
                     "last_accessed": purchase.last_accessed.isoformat() if purchase.last_accessed else None
                 })
         
-        return {
+        return json_response({
             "purchases": purchase_data,
             "total": len(purchase_data)
-        }
+        })
         
     except Exception as e:
         logger.error(f"Failed to get user purchases: {e}")
@@ -246,14 +224,14 @@ async def get_user_purchases(
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user by ID (public profile)"""
     try:
-        user = db.query(User).filter(
+        user = await db.scalar(select(User).where(
             User.id == user_id,
             User.is_active == True
-        ).first()
+        ))
         
         if not user:
             raise HTTPException(
@@ -262,21 +240,7 @@ async def get_user_by_id(
             )
         
         # Return public profile (limited information)
-        return UserResponse(
-            id=user.id,
-            wallet_address=user.wallet_address,
-            username=user.username,
-            email=None,  # Don't expose email in public profile
-            display_name=user.display_name,
-            bio=user.bio,
-            website=user.website,
-            is_verified=user.is_verified,
-            reputation_score=user.reputation_score,
-            total_uploads=user.total_uploads,
-            total_purchases=user.total_purchases,
-            total_earnings=0.0,  # Don't expose earnings in public profile
-            created_at=user.created_at.isoformat()
-        )
+        return json_response(user_to_dict(user, public=True), UserResponse)
         
     except HTTPException:
         raise
@@ -0,0 +1,172 @@
+"""
+Circuit breakers for external dependencies
+
+A breaker counts consecutive failures of calls to one dependency. After
+failure_threshold of them it opens and further calls fail immediately with
+CircuitOpenError instead of waiting on a dependency that is down. Once
+reset_seconds have passed it goes half-open and lets a limited number of
+trial calls through: a success closes it, a failure opens it again.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple, Type
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = registry.gauge(
+    "circuit_breaker_state",
+    "Breaker state per dependency (0 closed, 1 half-open, 2 open)",
+    ["breaker"]
+)
+BREAKER_TRANSITIONS = registry.counter(
+    "circuit_breaker_transitions_total",
+    "Breaker state changes",
+    ["breaker", "state"]
+)
+BREAKER_REJECTED = registry.counter(
+    "circuit_breaker_rejected_total",
+    "Calls failed fast because the breaker was open",
+    ["breaker"]
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with half-open trial calls
+
+    Exceptions listed in ignored pass through without counting as a
+    failure or a success (for example local admission-control errors).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = None,
+        reset_seconds: float = None,
+        half_open_calls: int = None,
+        ignored: Tuple[Type[BaseException], ...] = ()
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.BREAKER_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds or settings.BREAKER_RESET_SECONDS
+        self.half_open_calls = half_open_calls or settings.BREAKER_HALF_OPEN_CALLS
+        self.ignored = ignored
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self.last_error = None
+
+        BREAKER_STATE.set_function(lambda: STATE_VALUES[self.state], breaker=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance(time.monotonic())
+            return self._state
+
+    def _transition(self, state: str):
+        if state != self._state:
+            self._state = state
+            BREAKER_TRANSITIONS.inc(breaker=self.name, state=state)
+            log = logger.warning if state == OPEN else logger.info
+            log(f"Circuit breaker {self.name} is now {state}")
+
+    def _advance(self, now: float):
+        if self._state == OPEN and now - self._opened_at >= self.reset_seconds:
+            self._trials = 0
+            self._transition(HALF_OPEN)
+
+    def acquire(self):
+        """Admit one call or raise CircuitOpenError"""
+        with self._lock:
+            self._advance(time.monotonic())
+            if self._state == OPEN or (self._state == HALF_OPEN and self._trials >= self.half_open_calls):
+                BREAKER_REJECTED.inc(breaker=self.name)
+                raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+            if self._state == HALF_OPEN:
+                self._trials += 1
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state == HALF_OPEN:
+                self._trials = max(self._trials - 1, 0)
+                self._transition(CLOSED)
+
+    def record_failure(self, error: BaseException = None):
+        with self._lock:
+            self.last_error = repr(error) if error is not None else None
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def _release(self):
+        """Give back a half-open trial slot without a verdict (e.g. cancellation)"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trials = max(self._trials - 1, 0)
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Wrap one call to the dependency; usable around awaits
+
+            with stacks_breaker.guard():
+                response = await client.get(url)
+        """
+        self.acquire()
+        try:
+            yield
+        except self.ignored:
+            self._release()
+            raise
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            self._release()
+            raise
+        else:
+            self.record_success()
+
+    def snapshot(self) -> Dict[str, object]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "last_error": self.last_error
+        }
+
+
+class BreakerRegistry:
+    """Named breakers, so /health can report all of them"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str, **kwargs) -> CircuitBreaker:
+        if name not in self._breakers:
+            self._breakers[name] = CircuitBreaker(name, **kwargs)
+        return self._breakers[name]
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        return {name: breaker.snapshot() for name, breaker in self._breakers.items()}
+
+
+breakers = BreakerRegistry()
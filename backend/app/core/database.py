@@ -2,37 +2,357 @@
 Database configuration and session management
 """
 
-from sqlalchemy import create_engine
+import itertools
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Any, Dict, List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event, exc, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 from app.core.config import settings
+from app.core.metrics import registry
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    poolclass=StaticPool,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=settings.LOG_LEVEL == "DEBUG"
+# Connection pool metrics, labelled by engine
+POOL_CHECKED_OUT = registry.gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ["engine"]
 )
+POOL_SIZE = registry.gauge(
+    "db_pool_size",
+    "Configured number of persistent pool connections",
+    ["engine"]
+)
+POOL_OVERFLOW = registry.gauge(
+    "db_pool_overflow_connections",
+    "Connections open beyond pool_size",
+    ["engine"]
+)
+POOL_WAITS = registry.counter(
+    "db_pool_waits_total",
+    "Checkouts that found the pool exhausted and had to wait",
+    ["engine"]
+)
+POOL_TIMEOUTS = registry.counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+    ["engine"]
+)
+POOL_CHECKOUT_SECONDS = registry.histogram(
+    "db_pool_checkout_seconds",
+    "Time spent acquiring a connection from the pool",
+    ["engine"]
+)
+
+
+class CheckoutTimingMixin:
+    """Records checkout latency and exhaustion for a queue pool"""
+
+    metrics_label = "primary"
+
+    def _do_get(self):
+        # max_overflow=-1 never blocks: a checkout finding no idle connection opens one
+        if self._max_overflow > -1 and self.checkedin() == 0 and self.overflow() >= self._max_overflow:
+            POOL_WAITS.inc(engine=self.metrics_label)
+
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(engine=self.metrics_label)
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, engine=self.metrics_label)
+
+
+class InstrumentedQueuePool(CheckoutTimingMixin, QueuePool):
+    """QueuePool for the synchronous engine"""
+
+
+class InstrumentedAsyncQueuePool(CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    """QueuePool for asyncio engines"""
+
+
+def engine_options(url: str, use_async: bool = False) -> Dict[str, Any]:
+    """Pool settings for a database URL
+
+    An in-memory SQLite database exists only on its one connection, so it
+    is shared through a StaticPool. A SQLite file gets a default-sized
+    pool: concurrent sessions (requests and the background services) must
+    not share a connection, or one session's rollback discards another's
+    uncommitted writes. Every other backend gets a sized, pre-pinged
+    QueuePool.
+    """
+    if url.startswith("sqlite"):
+        if make_url(url).database in (None, "", ":memory:"):
+            return {
+                "poolclass": StaticPool,
+                "connect_args": {"check_same_thread": False}
+            }
+        return {
+            "poolclass": InstrumentedAsyncQueuePool if use_async else InstrumentedQueuePool,
+            "connect_args": {"check_same_thread": False}
+        }
+
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if use_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
+
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def instrument_pool(engine: Engine, label: str):
+    """Export checked-out, size and overflow gauges for an engine's pool"""
+    pool = engine.pool
+    if isinstance(pool, CheckoutTimingMixin):
+        pool.metrics_label = label
+        POOL_SIZE.set(pool.size(), engine=label)
+        POOL_OVERFLOW.set_function(lambda: max(pool.overflow(), 0), engine=label)
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKED_OUT.inc(engine=label)
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.dec(engine=label)
+
+
+def async_database_url(url: str) -> str:
+    """Translate a database URL to its asyncio driver"""
+    scheme, _, rest = url.partition("://")
+    backend = scheme.split("+")[0]
+    if backend in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+def get_pool_status(engine: Engine) -> Dict[str, Any]:
+    """Snapshot of an engine's pool for health and debugging output"""
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow()
+        })
+    return status
+
+
+# Synchronous engine for scripts and offline jobs. The API only uses the
+# async engine below, so this one (and its pool) is created on first use.
+_sync_engine: Optional[Engine] = None
+
+# Unbound; sync_session() binds sessions to the sync engine
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def get_sync_engine() -> Engine:
+    """The synchronous primary engine, created on first call"""
+    global _sync_engine
+    if _sync_engine is None:
+        _sync_engine = create_engine(
+            settings.DATABASE_URL,
+            echo=settings.LOG_LEVEL == "DEBUG",
+            **engine_options(settings.DATABASE_URL)
+        )
+        instrument_pool(_sync_engine, "primary")
+    return _sync_engine
+
+
+def sync_session() -> Session:
+    """A session on the synchronous engine"""
+    return SessionLocal(bind=get_sync_engine())
+
+
+class WriteSession(Session):
+    """Session bound to the primary; commits that wrote open a read-your-writes window"""
+
+
+class ReadSession(Session):
+    """Session bound to a replica; flushing is refused"""
+
+
+# Async engine used by the API, its startup tasks and background services
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    echo=settings.LOG_LEVEL == "DEBUG",
+    **engine_options(settings.DATABASE_URL, use_async=True)
+)
+instrument_pool(async_engine.sync_engine, "primary_async")
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=WriteSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Read replicas (DATABASE_REPLICA_URLS); reads use the primary when none are set
+replica_engines = []
+for index, replica_url in enumerate(settings.replica_urls):
+    replica_engine = create_async_engine(
+        async_database_url(replica_url),
+        echo=settings.LOG_LEVEL == "DEBUG",
+        **engine_options(replica_url, use_async=True)
+    )
+    instrument_pool(replica_engine.sync_engine, f"replica_{index}")
+    replica_engines.append(replica_engine)
+
+ReplicaSessionLocals: List[async_sessionmaker] = [
+    async_sessionmaker(
+        replica_engine,
+        class_=AsyncSession,
+        sync_session_class=ReadSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+    for replica_engine in replica_engines
+]
+_replica_cycle = itertools.cycle(ReplicaSessionLocals) if ReplicaSessionLocals else None
+
+# Per-request routing state installed by ReadYourWritesMiddleware. The last
+# write time goes out as a cookie and as a header that clients without
+# cookie credentials can echo back.
+LAST_WRITE_COOKIE = "db_last_write"
+LAST_WRITE_HEADER = "x-db-last-write"
+_routing_state: ContextVar[Optional[Dict[str, float]]] = ContextVar("db_routing_state", default=None)
+
+
+@event.listens_for(WriteSession, "after_flush")
+def _mark_pending_flush(session, flush_context):
+    session.info["pending_write"] = True
+
+
+@event.listens_for(WriteSession, "do_orm_execute")
+def _mark_pending_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["pending_write"] = True
+
+
+@event.listens_for(WriteSession, "after_commit")
+def _record_commit(session):
+    if session.info.pop("pending_write", False):
+        state = _routing_state.get()
+        if state is not None:
+            state["last_write"] = time.time()
+
+
+@event.listens_for(WriteSession, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop("pending_write", None)
+
+
+@event.listens_for(ReadSession, "before_flush")
+def _refuse_replica_flush(session, flush_context, instances):
+    raise RuntimeError("Read sessions are bound to a replica and cannot write")
+
+
+def wrote_recently(request: Request) -> bool:
+    """Whether this client committed a write within the replica lag window"""
+    state = _routing_state.get()
+    if state is not None and state.get("last_write"):
+        return True
+
+    try:
+        last_write = float(request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < settings.DB_REPLICA_LAG_SECONDS
 
 
 def get_db() -> Session:
     """Get database session"""
-    db = SessionLocal()
+    db = sync_session()
     try:
         yield db
     finally:
         db.close()
 
 
+async def get_write_db() -> AsyncSession:
+    """Get async database session on the primary"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """Get async database session for read-only work
+
+    Uses a replica unless none are configured or the client wrote within
+    DB_REPLICA_LAG_SECONDS, in which case it reads from the primary.
+    """
+    if _replica_cycle is None or wrote_recently(request):
+        session_factory = AsyncSessionLocal
+    else:
+        session_factory = next(_replica_cycle)
+
+    async with session_factory() as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware that pins recent writers to the primary
+
+    A request whose write session committed changes gets a short-lived
+    HttpOnly cookie and an X-DB-Last-Write response header carrying the
+    commit time; get_read_db sends that client's reads to the primary until
+    the replicas have had DB_REPLICA_LAG_SECONDS to catch up.
+
+    A cross-origin frontend only sends the cookie back with credentials
+    ("include") from an origin in ALLOWED_ORIGINS; otherwise it should copy
+    the header value into an X-DB-Last-Write request header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state: Dict[str, float] = {}
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and state.get("last_write"):
+                value = f"{state['last_write']:.3f}"
+                cookie = SimpleCookie()
+                cookie[LAST_WRITE_COOKIE] = value
+                cookie[LAST_WRITE_COOKIE]["max-age"] = settings.DB_REPLICA_LAG_SECONDS
+                cookie[LAST_WRITE_COOKIE]["path"] = "/"
+                cookie[LAST_WRITE_COOKIE]["httponly"] = True
+                cookie[LAST_WRITE_COOKIE]["samesite"] = "lax"
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.output(header="").strip().encode("latin-1")))
+                headers.append((LAST_WRITE_HEADER.encode("latin-1"), value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _routing_state.set(state)
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _routing_state.reset(token)
+
+
 def init_db():
     """Initialize database tables"""
     from app.models import Base
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_sync_engine())
     logger.info("Database tables created successfully")
@@ -0,0 +1,138 @@
+"""
+Bounded thread pools for blocking client libraries
+
+asyncio's default executor is shared by every run_in_executor/to_thread
+caller and queues without limit, so a burst of slow calls to one backend
+delays unrelated work. A BoundedExecutor gives a backend its own threads,
+rejects work once its queue is full instead of growing without bound,
+applies a timeout to each call and exports its depth as metrics.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_IN_FLIGHT = registry.gauge(
+    "executor_in_flight",
+    "Calls currently running on an executor's threads",
+    ["executor"]
+)
+EXECUTOR_QUEUE_DEPTH = registry.gauge(
+    "executor_queue_depth",
+    "Calls admitted to an executor and waiting for a thread",
+    ["executor"]
+)
+EXECUTOR_REJECTED = registry.counter(
+    "executor_rejected_total",
+    "Calls refused because the executor queue was full",
+    ["executor", "operation"]
+)
+EXECUTOR_TIMEOUTS = registry.counter(
+    "executor_timeouts_total",
+    "Calls that exceeded their timeout",
+    ["executor", "operation"]
+)
+EXECUTOR_WAIT_SECONDS = registry.histogram(
+    "executor_wait_seconds",
+    "Time calls spent queued before a thread picked them up",
+    ["executor"]
+)
+EXECUTOR_RUN_SECONDS = registry.histogram(
+    "executor_run_seconds",
+    "Time calls spent running on an executor thread",
+    ["executor", "operation"]
+)
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a call is refused by admission control"""
+
+
+class BoundedExecutor:
+    """Fixed thread pool with a bounded queue and per-call timeouts
+
+    At most max_workers calls run and max_queue more wait; anything beyond
+    that raises ExecutorSaturated immediately. A call that times out is
+    cancelled if it has not started; one already running keeps its thread
+    (Python cannot interrupt it) and still counts against the bound until
+    it returns.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, default_timeout: Optional[float] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+
+        EXECUTOR_IN_FLIGHT.set_function(lambda: self._running, executor=name)
+        EXECUTOR_QUEUE_DEPTH.set_function(lambda: self._admitted - self._running, executor=name)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._pool
+
+    def _invoke(self, operation: str, submitted_at: float, fn: Callable[[], Any]) -> Any:
+        started_at = time.perf_counter()
+        EXECUTOR_WAIT_SECONDS.observe(started_at - submitted_at, executor=self.name)
+        with self._lock:
+            self._running += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._running -= 1
+            EXECUTOR_RUN_SECONDS.observe(time.perf_counter() - started_at, executor=self.name, operation=operation)
+
+    def _release(self, future):
+        with self._lock:
+            self._admitted -= 1
+
+    async def run(
+        self,
+        operation: str,
+        fn: Callable[..., Any],
+        *args,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result"""
+        with self._lock:
+            if self._admitted >= self.max_workers + self.max_queue:
+                EXECUTOR_REJECTED.inc(executor=self.name, operation=operation)
+                raise ExecutorSaturated(f"{self.name} executor is saturated ({self._admitted} calls pending)")
+            self._admitted += 1
+
+        call = functools.partial(fn, *args, **kwargs)
+        try:
+            future = self._get_pool().submit(self._invoke, operation, time.perf_counter(), call)
+        except BaseException:
+            with self._lock:
+                self._admitted -= 1
+            raise
+        future.add_done_callback(self._release)
+
+        timeout = timeout if timeout is not None else self.default_timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            EXECUTOR_TIMEOUTS.inc(executor=self.name, operation=operation)
+            future.cancel()
+            raise TimeoutError(f"{self.name} {operation} timed out after {timeout}s")
+
+    def shutdown(self, wait: bool = False):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
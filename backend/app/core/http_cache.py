@@ -0,0 +1,59 @@
+"""
+HTTP caching helpers: ETag validators and conditional GET handling
+"""
+
+import hashlib
+from typing import Any, Optional
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any, weak: bool = False) -> str:
+    """Build an ETag from the values that determine a representation
+
+    Pass weak=True when the parts are row timestamps: two writes within the
+    timestamp's precision (a second on SQLite) yield the same validator, so
+    it cannot promise byte-identical representations.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        value = part.isoformat() if hasattr(part, "isoformat") else str(part)
+        digest.update(value.encode("utf-8"))
+        digest.update(b"\x1f")
+    etag = f'"{digest.hexdigest()}"'
+    return f"W/{etag}" if weak else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison, per RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+
+    return False
+
+
+def set_cache_headers(response: Response, etag: str, max_age: int):
+    """Attach validator and freshness headers to a response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
+
+
+def not_modified_response(request: Request, etag: str, max_age: int) -> Optional[Response]:
+    """Return a 304 response when the client already holds this representation"""
+    if not etag_matches(request, etag):
+        return None
+
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag, max_age)
+    return response
@@ -0,0 +1,140 @@
+"""
+Shared outbound HTTP clients
+
+One pooled httpx.AsyncClient per upstream (Stacks API, IPFS API, IPFS
+gateway), opened in the application lifespan and reused by every call, so
+contract reads and gateway fetches ride on kept-alive connections instead of
+paying a TCP and TLS handshake each time. Each client targets a single host,
+so its connection limit is the per-host limit.
+"""
+
+import importlib.util
+import logging
+import time
+from typing import Dict
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+# httpx speaks HTTP/2 only when the optional h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = registry.counter(
+    "http_client_requests_total",
+    "Outbound HTTP requests by client and status class",
+    ["client", "status"]
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_client_request_seconds",
+    "Time to response headers for outbound HTTP requests",
+    ["client"]
+)
+HTTP_CONNECTIONS_OPENED = registry.counter(
+    "http_client_connections_opened_total",
+    "New TCP connections opened by outbound HTTP clients",
+    ["client"]
+)
+HTTP_POOL_CONNECTIONS = registry.gauge(
+    "http_client_pool_connections",
+    "Connections currently held in an outbound client's pool",
+    ["client"]
+)
+HTTP_POOL_IDLE = registry.gauge(
+    "http_client_pool_idle_connections",
+    "Pooled connections idle and available for reuse",
+    ["client"]
+)
+
+
+def _pool_connections(client: httpx.AsyncClient) -> list:
+    """Connections held by the client's httpcore pool (empty once closed)"""
+    transport = getattr(client, "_transport", None)
+    pool = getattr(transport, "_pool", None)
+    return list(getattr(pool, "connections", []))
+
+
+class HTTPClientRegistry:
+    """Named, lazily created, application-scoped AsyncClients"""
+
+    def __init__(self):
+        self._base_urls: Dict[str, str] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def register(self, name: str, base_url: str):
+        """Declare an upstream; its client is created on open() or first use"""
+        self._base_urls[name] = base_url.rstrip("/")
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+
+        async def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.complete":
+                HTTP_CONNECTIONS_OPENED.inc(client=name)
+
+        async def on_request(request: httpx.Request):
+            request.extensions["trace"] = trace
+            request.extensions["started_at"] = time.perf_counter()
+
+        async def on_response(response: httpx.Response):
+            started_at = response.request.extensions.get("started_at")
+            if started_at is not None:
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started_at, client=name)
+            HTTP_REQUESTS.inc(client=name, status=f"{response.status_code // 100}xx")
+
+        client = httpx.AsyncClient(
+            base_url=self._base_urls[name],
+            http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+            limits=limits,
+            timeout=timeout,
+            event_hooks={"request": [on_request], "response": [on_response]}
+        )
+        HTTP_POOL_CONNECTIONS.set_function(lambda: len(_pool_connections(client)), client=name)
+        HTTP_POOL_IDLE.set_function(
+            lambda: sum(1 for connection in _pool_connections(client) if connection.is_idle()),
+            client=name
+        )
+        return client
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """The shared client for an upstream, created if needed"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            if name not in self._base_urls:
+                raise KeyError(f"Unknown HTTP client: {name}")
+            client = self._create(name)
+            self._clients[name] = client
+        return client
+
+    def open(self):
+        """Create every registered client (application startup)"""
+        for name in self._base_urls:
+            self.get(name)
+        logger.info(
+            f"Opened HTTP clients: {', '.join(self._clients)} "
+            f"(http2={'on' if settings.HTTP2_ENABLED and HTTP2_AVAILABLE else 'off'})"
+        )
+
+    async def aclose(self):
+        """Close every client and its pooled connections (application shutdown)"""
+        clients, self._clients = self._clients, {}
+        for name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client {name}: {e}")
+
+
+http_clients = HTTPClientRegistry()
+http_clients.register("stacks", settings.STACKS_API_URL)
+http_clients.register("ipfs_api", settings.IPFS_API_URL)
+http_clients.register("ipfs_gateway", settings.IPFS_GATEWAY_URL)
+
@@ -0,0 +1,63 @@
+"""
+HTTP Range request helpers (RFC 9110 section 14)
+"""
+
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request, status
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Resolve a single byte range against a representation of `size` bytes
+
+    Returns (start, end) with end inclusive, or None when the whole
+    representation should be sent: no header, another unit, multiple ranges
+    or a malformed value, all of which a server may ignore. Raises 416 when
+    the range cannot be satisfied.
+    """
+    if not header:
+        return None
+
+    unit, _, spec = header.strip().partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+
+    try:
+        if first == "":
+            # Suffix range: the final N bytes
+            suffix = int(last)
+            if suffix == 0:
+                raise range_not_satisfiable(size)
+            start, end = max(size - suffix, 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+            end = min(end, size - 1)
+    except ValueError:
+        return None
+
+    if size == 0 or start >= size:
+        raise range_not_satisfiable(size)
+
+    return start, end
+
+
+def range_not_satisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"}
+    )
+
+
+def if_range_allows(request: Request, etag: str) -> bool:
+    """Honour Range only when If-Range (if sent) matches the current ETag"""
+    header = request.headers.get("if-range")
+    if not header:
+        return True
+    return header.strip() == etag
@@ -0,0 +1,53 @@
+"""
+Per-key concurrency limits
+"""
+
+from typing import Dict, Hashable
+from fastapi import HTTPException, status
+
+
+class ConcurrencySlot:
+    """A held slot; release() is idempotent so cleanup paths can overlap"""
+
+    def __init__(self, limiter: "KeyedConcurrencyLimiter", key: Hashable):
+        self._limiter = limiter
+        self._key = key
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._limiter._release(self._key)
+
+
+class KeyedConcurrencyLimiter:
+    """Caps how many operations a single key (e.g. a user) may run at once
+
+    State lives on the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, limit: int, detail: str = "Too many concurrent requests"):
+        self.limit = limit
+        self.detail = detail
+        self._active: Dict[Hashable, int] = {}
+
+    def active(self, key: Hashable) -> int:
+        return self._active.get(key, 0)
+
+    def acquire(self, key: Hashable) -> ConcurrencySlot:
+        """Take a slot or raise 429 when the key is at its limit"""
+        if self._active.get(key, 0) >= self.limit:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=self.detail,
+                headers={"Retry-After": "5"}
+            )
+        self._active[key] = self._active.get(key, 0) + 1
+        return ConcurrencySlot(self, key)
+
+    def _release(self, key: Hashable):
+        remaining = self._active.get(key, 0) - 1
+        if remaining > 0:
+            self._active[key] = remaining
+        else:
+            self._active.pop(key, None)
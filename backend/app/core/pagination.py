@@ -0,0 +1,92 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Awaitable, Callable, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from app.core.config import settings
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, row_id: int) -> str:
+    """Encode the last row of a page as an opaque cursor"""
+    if isinstance(value, datetime):
+        encoded_value = {"dt": value.isoformat()}
+    else:
+        encoded_value = {"v": value}
+
+    payload = {"s": sort_by, "o": sort_order, "k": encoded_value, "id": row_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """Decode a cursor into (sort value, id), validating it matches the sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = payload["k"]
+        value = datetime.fromisoformat(key["dt"]) if "dt" in key else key["v"]
+        row_id = int(payload["id"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    if payload.get("s") != sort_by or payload.get("o") != sort_order:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match the requested sort order"
+        )
+
+    return value, row_id
+
+
+def keyset_condition(sort_column, id_column, value: Any, row_id: int, descending: bool):
+    """Filter for rows strictly after (value, row_id) in (sort_column, id) order"""
+    if descending:
+        return or_(sort_column < value, and_(sort_column == value, id_column < row_id))
+    return or_(sort_column > value, and_(sort_column == value, id_column > row_id))
+
+
+class CountCache:
+    """Short-lived cache of COUNT(*) results keyed by filter signature"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[int]]) -> int:
+        """Return a cached count, recomputing it once the entry expires"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        count = await compute()
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl_seconds, count)
+
+        return count
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared cache for listing totals
+listing_count_cache = CountCache(ttl_seconds=settings.LISTING_COUNT_CACHE_SECONDS)
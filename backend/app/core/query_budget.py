@@ -0,0 +1,167 @@
+"""
+SQL statement counting and per-endpoint query budgets
+
+While QUERY_BUDGET_MODE is "warn" or "enforce", every statement executed
+through any SQLAlchemy engine is counted against the request that issued
+it, and QueryBudgetMiddleware compares the count with
+ENDPOINT_QUERY_BUDGETS. "warn" logs N+1 regressions; "enforce" (tests and
+CI) replaces an over-budget response with a 500 before it is sent and adds
+an X-Query-Count header to every response. The default, "off", installs
+no per-request counting.
+
+tests/test_query_budgets.py calls each budgeted endpoint in enforce mode.
+"""
+
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Maximum statements per endpoint, keyed by "METHOD route-path"
+ENDPOINT_QUERY_BUDGETS: Dict[str, int] = {
+    "POST /api/v1/auth/wallet": 3,
+    "GET /api/v1/auth/me": 2,
+    "GET /api/v1/datasets/": 5,
+    "GET /api/v1/datasets/{dataset_id}": 3,
+    "GET /api/v1/datasets/{dataset_id}/download": 4,
+    "POST /api/v1/datasets/upload": 5,
+    "GET /api/v1/users/me": 2,
+    "PUT /api/v1/users/me": 5,
+    "GET /api/v1/users/me/datasets": 2,
+    "GET /api/v1/users/me/purchases": 2,
+    "GET /api/v1/users/{user_id}": 1,
+    "GET /api/v1/analytics/marketplace-stats": 9,
+    "GET /api/v1/analytics/price-trends": 1,
+    "GET /api/v1/analytics/category-distribution": 1,
+    "GET /api/v1/analytics/quality-metrics": 11,
+    "GET /api/v1/analytics/user-activity": 3,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in enforce mode when an endpoint exceeds its query budget"""
+
+
+class QueryCounter:
+    """Collects the SQL statements executed within a scope"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+_current_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.statements.append(statement)
+
+
+def install_statement_counter():
+    """Hook statement counting into every engine (idempotent; off until first needed)"""
+    if not event.contains(Engine, "before_cursor_execute", _count_statement):
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+
+
+@contextmanager
+def count_queries():
+    """Count the statements executed inside the block
+
+    Usage:
+        with count_queries() as counter:
+            client.get("/api/v1/datasets/")
+        assert counter.count <= 3
+    """
+    install_statement_counter()
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+def budget_overrun(endpoint: str, counter: QueryCounter) -> Optional[str]:
+    """Description of the overrun if the counter exceeds the endpoint's budget"""
+    budget = ENDPOINT_QUERY_BUDGETS.get(endpoint)
+    if budget is None or counter.count <= budget:
+        return None
+    return f"{endpoint} executed {counter.count} SQL statements (budget {budget})"
+
+
+def check_query_budget(endpoint: str, counter: QueryCounter):
+    """Raise QueryBudgetExceeded if the counter exceeds the endpoint's budget"""
+    overrun = budget_overrun(endpoint, counter)
+    if overrun is not None:
+        raise QueryBudgetExceeded(overrun + ":\n" + "\n".join(counter.statements))
+
+
+class QueryBudgetMiddleware:
+    """ASGI middleware that checks each request against its query budget
+
+    In enforce mode the check runs when the handler starts its response, so
+    an overrun turns into a 500 the client sees. Statements a streaming body
+    runs after that point can only be logged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = settings.QUERY_BUDGET_MODE
+        if scope["type"] != "http" or mode not in ("warn", "enforce"):
+            await self.app(scope, receive, send)
+            return
+
+        def endpoint() -> Optional[str]:
+            # FastAPI routes record themselves in the scope once matched
+            route = scope.get("route")
+            return f"{scope['method']} {route.path}" if route is not None else None
+
+        rejected = False
+
+        async def send_checked(message):
+            nonlocal rejected
+            if rejected:
+                # The handler's own response was replaced; drop the rest of it
+                return
+            if message["type"] == "http.response.start" and mode == "enforce":
+                name = endpoint()
+                overrun = budget_overrun(name, counter) if name else None
+                count = str(counter.count).encode("ascii")
+                if overrun is not None:
+                    rejected = True
+                    logger.error(overrun + ":\n" + "\n".join(counter.statements))
+                    body = json.dumps({"detail": overrun}).encode("utf-8")
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [
+                            (b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode("ascii")),
+                            (b"x-query-count", count)
+                        ]
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-query-count", count)]}
+            await send(message)
+
+        with count_queries() as counter:
+            await self.app(scope, receive, send_checked)
+
+        name = endpoint()
+        overrun = budget_overrun(name, counter) if name and not rejected else None
+        if overrun is not None:
+            logger.warning(overrun)
@@ -0,0 +1,203 @@
+"""
+Query-plan regression checks
+
+hot_queries() mirrors the statements the analytics, datasets, users and
+security modules run per request; check() EXPLAINs each of them and
+reports the large tables it reads without an index. Used by
+tests/test_query_plans.py and scripts/check_query_plans.py.
+"""
+
+import random
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.core.pagination import keyset_condition
+from app.models.dataset import Dataset, DatasetAccess
+from app.models.user import User
+
+NOW = datetime(2024, 6, 1)
+
+# Tables large enough in production that a sequential scan is a regression
+WATCHED_TABLES = {User.__tablename__, Dataset.__tablename__, DatasetAccess.__tablename__}
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN wrapper that keeps the statement's bound parameters"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "sqlite")
+def _explain_sqlite(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
+
+
+@compiles(Explain)
+def _explain_default(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+def hot_queries():
+    """(name, statement) pairs mirroring the queries the API runs per request"""
+    month_ago = NOW - timedelta(days=30)
+    return [
+        ("security.get_current_user", select(User).where(
+            User.wallet_address == "SP000000000000000000000000000000000000042"
+        )),
+        ("security.check_dataset_access", select(DatasetAccess.id).where(
+            DatasetAccess.dataset_id == 42,
+            DatasetAccess.user_id == 7,
+            DatasetAccess.access_granted == True
+        ).limit(1)),
+        ("datasets.list_datasets", select(Dataset).where(
+            Dataset.is_active == True
+        ).order_by(Dataset.created_at.desc(), Dataset.id.desc()).limit(21)),
+        ("datasets.list_datasets cursor", select(Dataset).where(
+            Dataset.is_active == True,
+            keyset_condition(Dataset.created_at, Dataset.id, NOW - timedelta(days=200), 900, True)
+        ).order_by(Dataset.created_at.desc(), Dataset.id.desc()).limit(21)),
+        ("datasets.list_datasets count", select(func.count(Dataset.id)).where(Dataset.is_active == True)),
+        ("users.get_user_datasets", select(Dataset).where(
+            Dataset.owner_id == 7,
+            Dataset.is_active == True
+        ).order_by(Dataset.created_at.desc())),
+        ("users.get_user_purchases", select(DatasetAccess).where(
+            DatasetAccess.user_id == 7,
+            DatasetAccess.access_granted == True
+        ).order_by(DatasetAccess.created_at.desc())),
+        ("analytics.marketplace_stats recent datasets", select(func.count(Dataset.id)).where(
+            Dataset.created_at >= month_ago,
+            Dataset.is_active == True
+        )),
+        ("analytics.marketplace_stats recent transactions", select(func.count(DatasetAccess.id)).where(
+            DatasetAccess.created_at >= month_ago
+        )),
+        ("analytics.price_trends", select(
+            func.date(DatasetAccess.created_at).label("date"),
+            func.avg(DatasetAccess.price_paid),
+            func.count(DatasetAccess.id)
+        ).where(
+            DatasetAccess.created_at >= month_ago
+        ).group_by(func.date(DatasetAccess.created_at)).order_by(text("date"))),
+        ("analytics.user_activity signups", select(
+            func.date(User.created_at).label("date"),
+            func.count(User.id)
+        ).where(
+            User.created_at >= month_ago,
+            User.is_active == True
+        ).group_by(func.date(User.created_at)).order_by(text("date"))),
+        ("analytics.user_activity active users", select(func.count(func.distinct(DatasetAccess.user_id))).where(
+            DatasetAccess.created_at >= month_ago
+        )),
+    ]
+
+
+def seed(engine, users: int, datasets: int, accesses: int) -> Dict[str, int]:
+    """
+    Insert rows spread over three years so date filters are selective
+
+    Ids continue after any existing rows; returns the first seeded id per
+    table so callers sharing a database can remove the rows again.
+    """
+    rng = random.Random(1234)
+    span = 3 * 365 * 24 * 3600
+
+    def when():
+        return NOW - timedelta(seconds=rng.randrange(span))
+
+    with engine.begin() as conn:
+        first = {
+            model.__tablename__: conn.execute(select(func.coalesce(func.max(model.id), 0))).scalar() + 1
+            for model in (User, Dataset, DatasetAccess)
+        }
+        user_ids = range(first["users"], first["users"] + users)
+        dataset_ids = range(first["datasets"], first["datasets"] + datasets)
+        conn.execute(User.__table__.insert(), [
+            {
+                "id": i,
+                "wallet_address": f"SP{i:039d}",
+                "is_verified": False,
+                "is_active": rng.random() > 0.05,
+                "is_banned": False,
+                "reputation_score": 0.0,
+                "total_uploads": 0,
+                "total_purchases": 0,
+                "total_earnings": 0.0,
+                "created_at": when(),
+                "updated_at": NOW
+            }
+            for i in user_ids
+        ])
+        conn.execute(Dataset.__table__.insert(), [
+            {
+                "id": i,
+                "title": f"Dataset {i}",
+                "filename": f"dataset_{i}.csv",
+                "file_type": "csv",
+                "file_size": 1024,
+                "ipfs_hash": f"Qm{i:044d}",
+                "price": float(rng.randrange(1, 100)),
+                "is_free": False,
+                "is_active": rng.random() > 0.1,
+                "records_count": 1000,
+                "columns_count": 10,
+                "quality_score": float(rng.randrange(40, 100)),
+                "average_rating": 0.0,
+                "rating_count": 0,
+                "total_sales": 0,
+                "total_revenue": 0.0,
+                "owner_id": rng.choice(user_ids),
+                "created_at": when(),
+                "updated_at": NOW
+            }
+            for i in dataset_ids
+        ])
+        conn.execute(DatasetAccess.__table__.insert(), [
+            {
+                "id": i,
+                "dataset_id": rng.choice(dataset_ids),
+                "user_id": rng.choice(user_ids),
+                "price_paid": 10.0,
+                "access_granted": True,
+                "download_count": 0,
+                "created_at": when(),
+                "updated_at": NOW
+            }
+            for i in range(first["dataset_access"], first["dataset_access"] + accesses)
+        ])
+        conn.execute(text("ANALYZE"))
+    return first
+
+
+def sequential_scans(dialect: str, plan_lines, tables) -> list:
+    """Tables from `tables` that the plan reads without an index"""
+    scanned = []
+    for line in plan_lines:
+        if dialect == "sqlite":
+            match = re.match(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$", line.strip())
+        else:
+            match = re.search(r"Seq Scan on (\w+)", line)
+        if match and match.group(1) in tables:
+            scanned.append(match.group(1))
+    return scanned
+
+
+def explain(conn, statement) -> list:
+    rows = conn.execute(Explain(statement)).all()
+    # SQLite: (id, parent, notused, detail); PostgreSQL: one text column
+    return [row[-1] for row in rows]
+
+
+def check(conn) -> List[Tuple[str, List[str], List[str]]]:
+    """(name, plan lines, sequentially scanned tables) for each hot query"""
+    results = []
+    for name, statement in hot_queries():
+        plan = explain(conn, statement)
+        results.append((name, plan, sequential_scans(conn.dialect.name, plan, WATCHED_TABLES)))
+    return results
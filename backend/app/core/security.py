@@ -4,16 +4,89 @@ Security utilities for authentication and authorization
 
 import jwt
 import logging
-from typing import Optional, Dict, Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_write_db
+from app.core.metrics import registry
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+PRINCIPAL_CACHE_LOOKUPS = registry.counter(
+    "auth_principal_cache_lookups_total",
+    "Principal cache lookups by result",
+    ["result"]
+)
+
+
+class PrincipalCache:
+    """Bounded TTL cache of resolved principals keyed by wallet address
+
+    Entries are dropped whenever a user row is updated through the ORM (see
+    the after_update listener below), so bans, deactivations and profile
+    edits take effect immediately in this process. Invalidation is not
+    broadcast: other workers serve their cached copy until it expires, so
+    AUTH_CACHE_TTL_SECONDS is the upper bound on cross-worker staleness.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, wallet_address: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(wallet_address)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[wallet_address]
+                return None
+            self._entries.move_to_end(wallet_address)
+            return entry[1]
+
+    def set(self, wallet_address: str, principal: Dict[str, Any]):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[wallet_address] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(wallet_address)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, wallet_address: str):
+        with self._lock:
+            self._entries.pop(wallet_address, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES
+)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_updated_principal(mapper, connection, target):
+    principal_cache.invalidate(target.wallet_address)
+
+
+def invalidate_principal(wallet_address: str):
+    """Drop a cached principal in this process, e.g. after banning a user"""
+    principal_cache.invalidate(wallet_address)
 
 
 def verify_wallet_signature(signature: str, message: str, wallet_address: str) -> bool:
@@ -74,9 +147,9 @@ def verify_token(token: str) -> Dict[str, Any]:
         )
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ) -> Dict[str, Any]:
     """Get current authenticated user"""
     try:
@@ -90,15 +163,22 @@ def get_current_user(
                 detail="Invalid token payload"
             )
         
+        principal = principal_cache.get(wallet_address)
+        if principal is not None:
+            PRINCIPAL_CACHE_LOOKUPS.inc(result="hit")
+            return principal
+        PRINCIPAL_CACHE_LOOKUPS.inc(result="miss")
+        
         # Get or create user
-        user = db.query(User).filter(User.wallet_address == wallet_address).first()
+        result = await db.execute(select(User).where(User.wallet_address == wallet_address))
+        user = result.scalars().first()
         
         if not user:
             # Create new user
             user = User(wallet_address=wallet_address)
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             logger.info(f"Created new user: {wallet_address}")
         
         # Check if user is active
@@ -115,13 +195,16 @@ def get_current_user(
                 detail="User account is banned"
             )
         
-        return {
+        principal = {
             "id": user.id,
             "wallet_address": user.wallet_address,
             "username": user.username,
             "is_verified": user.is_verified,
             "reputation_score": user.reputation_score
         }
+        principal_cache.set(wallet_address, principal)
+        
+        return principal
         
     except HTTPException:
         raise
@@ -133,16 +216,16 @@ def get_current_user(
         )
 
 
-def get_optional_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncSession = Depends(get_write_db)
 ) -> Optional[Dict[str, Any]]:
     """Get current user if authenticated, otherwise return None"""
     if not credentials:
         return None
     
     try:
-        return get_current_user(credentials, db)
+        return await get_current_user(credentials, db)
     except HTTPException:
         return None
 
@@ -160,24 +243,40 @@ def require_verified_user(
     return current_user
 
 
-def check_dataset_access(
+async def check_dataset_access(
     dataset_id: int,
     user_id: int,
-    db: Session
+    db: AsyncSession,
+    wallet_address: Optional[str] = None
 ) -> bool:
-    """Check if user has access to dataset"""
+    """Check if user has access to dataset
+
+    Answered from dataset_access, which the chain indexer fills. Purchases
+    it has not indexed (made before INDEXER_START_HEIGHT, or in blocks it
+    has not reached yet) fall back to the contract's has-access read when
+    the caller's wallet address is given.
+    """
     from app.models.dataset import DatasetAccess, Dataset
     
+    dataset = (await db.execute(select(Dataset.owner_id, Dataset.blockchain_id).where(
+        Dataset.id == dataset_id
+    ))).first()
+    
     # Check if user owns the dataset
-    dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
-    if dataset and dataset.owner_id == user_id:
+    if dataset is not None and dataset.owner_id == user_id:
         return True
     
     # Check if user has purchased access
-    access = db.query(DatasetAccess).filter(
+    access_id = await db.scalar(select(DatasetAccess.id).where(
         DatasetAccess.dataset_id == dataset_id,
         DatasetAccess.user_id == user_id,
         DatasetAccess.access_granted == True
-    ).first()
+    ).limit(1))
+    if access_id is not None:
+        return True
+    
+    if wallet_address and settings.CONTRACT_ADDRESS and dataset is not None and dataset.blockchain_id is not None:
+        from app.services.blockchain import StacksService
+        return await StacksService().check_dataset_access(dataset.blockchain_id, wallet_address)
     
-    return access is not None
+    return False
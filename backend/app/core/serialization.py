@@ -0,0 +1,127 @@
+"""
+Fast JSON serialization for API responses
+
+FastJSONResponse renders with orjson when it is installed and falls back to
+the standard library otherwise. The *_to_dict encoders turn ORM rows that
+were loaded by our own queries straight into JSON-ready dicts, skipping the
+pydantic validation pass that response models would repeat.
+
+Routes keep declaring response_model so the OpenAPI schema is unchanged.
+json_response() takes the fast path only while FAST_SERIALIZATION_ENABLED
+is set; with it off, content is validated through the route's model first.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Type
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Encode types neither serializer handles natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars left in preview data
+        return value.item()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when available"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, model: Optional[Type[BaseModel]] = None) -> JSONResponse:
+    """Render encoded content, validating it through model unless the fast path is enabled"""
+    if model is not None and not settings.FAST_SERIALIZATION_ENABLED:
+        content = model.model_validate(content).model_dump(mode="json")
+    return FastJSONResponse(content)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def owner_to_dict(owner) -> Dict[str, Any]:
+    """Public owner fields embedded in dataset responses"""
+    return {
+        "id": owner.id,
+        "wallet_address": owner.wallet_address,
+        "username": owner.username,
+        "display_name": owner.display_name,
+        "is_verified": owner.is_verified,
+        "reputation_score": owner.reputation_score
+    }
+
+
+def dataset_to_dict(dataset) -> Dict[str, Any]:
+    """Encode a Dataset row (with its owner loaded) in DatasetResponse shape"""
+    return {
+        "id": dataset.id,
+        "title": dataset.title,
+        "description": dataset.description,
+        "tags": dataset.tags or [],
+        "price": dataset.price,
+        "records_count": dataset.records_count,
+        "quality_score": dataset.quality_score,
+        "average_rating": dataset.average_rating,
+        "rating_count": dataset.rating_count,
+        "total_sales": dataset.total_sales,
+        "owner": owner_to_dict(dataset.owner),
+        "created_at": _isoformat(dataset.created_at),
+        "preview_data": dataset.preview_data
+    }
+
+
+def user_to_dict(user, public: bool = False) -> Dict[str, Any]:
+    """Encode a User row in UserResponse shape
+
+    Public profiles hide the email address and earnings.
+    """
+    return {
+        "id": user.id,
+        "wallet_address": user.wallet_address,
+        "username": user.username,
+        "email": None if public else user.email,
+        "display_name": user.display_name,
+        "bio": user.bio,
+        "website": user.website,
+        "is_verified": user.is_verified,
+        "reputation_score": user.reputation_score,
+        "total_uploads": user.total_uploads,
+        "total_purchases": user.total_purchases,
+        "total_earnings": 0.0 if public else user.total_earnings,
+        "created_at": _isoformat(user.created_at)
+    }
@@ -6,6 +6,10 @@ from .base import Base
 from .user import User
 from .dataset import Dataset, DatasetAccess, DatasetRating
 from .transaction import Transaction
+from .listing import Listing
+from .counter import CounterDelta
+from .pin_job import PinJob
+from .chain_index import IndexerState, IndexedBlock
 
 __all__ = [
     "Base",
@@ -13,5 +17,10 @@ __all__ = [
     "Dataset",
     "DatasetAccess",
     "DatasetRating",
-    "Transaction"
+    "Transaction",
+    "Listing",
+    "CounterDelta",
+    "PinJob",
+    "IndexerState",
+    "IndexedBlock"
 ]
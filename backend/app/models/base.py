@@ -2,7 +2,8 @@
 Base model class
 """
 
-from sqlalchemy import Column, Integer, DateTime, func
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -11,5 +12,7 @@ Base = declarative_base()
 class TimestampMixin:
     """Mixin for adding timestamp fields"""
     
-    created_at = Column(DateTime, default=func.now(), nullable=False)
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    # Set in Python so stored values match bound datetimes on every backend
+    # (SQLite's CURRENT_TIMESTAMP text has no fractional seconds)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,38 @@
+"""
+Chain indexer bookkeeping models
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, func
+from .base import Base
+
+
+class IndexerState(Base):
+    """Persisted cursor of a chain indexer: the last block it applied"""
+    
+    __tablename__ = "indexer_state"
+    
+    name = Column(String(50), primary_key=True)
+    block_height = Column(Integer, nullable=False)
+    block_hash = Column(String(100), nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<IndexerState({self.name} at {self.block_height})>"
+
+
+class IndexedBlock(Base):
+    """Hash of a recently indexed block, kept to detect reorgs
+
+    Only the last INDEXER_REORG_DEPTH blocks are retained; a reorg is found
+    by walking back until a stored hash matches the canonical chain.
+    """
+    
+    __tablename__ = "indexed_blocks"
+    
+    height = Column(Integer, primary_key=True)
+    block_hash = Column(String(100), nullable=False)
+    parent_hash = Column(String(100), nullable=False)
+    indexed_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<IndexedBlock({self.height} {self.block_hash})>"
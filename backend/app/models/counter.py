@@ -0,0 +1,26 @@
+"""
+Counter delta journal model
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, func
+from .base import Base
+
+
+class CounterDelta(Base):
+    """Pending increment to a denormalized counter column
+
+    Rows are appended in the same transaction as the event that caused
+    them and folded into the target row by the counter flusher.
+    """
+    
+    __tablename__ = "counter_deltas"
+    
+    id = Column(Integer, primary_key=True)
+    target_table = Column(String(50), nullable=False)  # "users" or "datasets"
+    target_id = Column(Integer, nullable=False)
+    field = Column(String(50), nullable=False)
+    delta = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<CounterDelta({self.target_table}.{self.field}[{self.target_id}] += {self.delta})>"
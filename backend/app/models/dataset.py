@@ -2,7 +2,7 @@
 Dataset models
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Text, Float, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Text, Float, ForeignKey, JSON, DateTime, Index
 from sqlalchemy.orm import relationship
 from .base import Base, TimestampMixin
 
@@ -11,6 +11,12 @@ class Dataset(Base, TimestampMixin):
     """Dataset model for storing dataset information"""
     
     __tablename__ = "datasets"
+    __table_args__ = (
+        # Active listings ordered by recency (listing keyset pagination, analytics)
+        Index("ix_datasets_active_created", "is_active", "created_at", "id"),
+        # Owner dashboards
+        Index("ix_datasets_owner_active", "owner_id", "is_active", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     blockchain_id = Column(Integer, unique=True, index=True, nullable=True)  # ID from smart contract
@@ -34,7 +40,7 @@ class Dataset(Base, TimestampMixin):
     # Metadata
     records_count = Column(Integer, nullable=False)
     columns_count = Column(Integer, nullable=False)
-    metadata = Column(JSON, nullable=True)  # Detailed metadata
+    dataset_metadata = Column("metadata", JSON, nullable=True)  # Detailed metadata
     preview_data = Column(JSON, nullable=True)  # Sample data for preview
     
     # Quality and ratings
@@ -62,6 +68,14 @@ class DatasetAccess(Base, TimestampMixin):
     """Model for tracking dataset access/purchases"""
     
     __tablename__ = "dataset_access"
+    __table_args__ = (
+        # check_dataset_access lookups
+        Index("ix_dataset_access_dataset_user", "dataset_id", "user_id"),
+        # Purchase history per user
+        Index("ix_dataset_access_user_created", "user_id", "created_at"),
+        # Analytics date ranges
+        Index("ix_dataset_access_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -70,13 +84,14 @@ class DatasetAccess(Base, TimestampMixin):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Purchase information
-    transaction_hash = Column(String(100), nullable=True)  # Blockchain transaction hash
+    transaction_hash = Column(String(100), nullable=True, index=True)  # Blockchain transaction hash
+    block_height = Column(Integer, nullable=True, index=True)  # Set by the chain indexer; reorgs roll back above it
     price_paid = Column(Float, nullable=False)  # Price paid in STX
     
     # Access control
     access_granted = Column(Boolean, default=True, nullable=False)
     download_count = Column(Integer, default=0, nullable=False)
-    last_accessed = Column(TimestampMixin.created_at, nullable=True)
+    last_accessed = Column(DateTime, nullable=True)
     
     # Relationships
     dataset = relationship("Dataset", back_populates="access_records")
@@ -0,0 +1,36 @@
+"""
+Listing model
+"""
+
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from .base import Base, TimestampMixin
+
+
+class Listing(Base, TimestampMixin):
+    """Individual car listing loaded from a scrape or corpus file"""
+    
+    __tablename__ = "listings"
+    __table_args__ = (
+        Index("ix_listings_brand_year", "brand", "year"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Vehicle information
+    car_name = Column(String(200), nullable=False)
+    brand = Column(String(50), nullable=True)
+    year = Column(Integer, nullable=True)
+    color = Column(String(50), nullable=True)
+    condition = Column(String(50), nullable=True)
+    mileage = Column(Float, nullable=True)  # Kilometres
+    
+    # Sale information
+    price = Column(Float, nullable=True)  # Price in NGN
+    region = Column(String(100), nullable=True)
+    
+    # Provenance
+    source = Column(String(255), nullable=False, index=True)  # Import file or scrape batch
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=True)
+    
+    def __repr__(self):
+        return f"<Listing(id={self.id}, car_name='{self.car_name}', price={self.price})>"
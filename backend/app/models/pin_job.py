@@ -0,0 +1,31 @@
+"""
+Pin job queue model
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, func
+from .base import Base
+
+
+class PinJob(Base):
+    """Desired pin state for one IPFS hash, applied by the pin manager
+
+    One row per hash: queuing a new action replaces the pending one, so
+    the latest intent wins. Rows are deleted once the node confirms the
+    action; failures push next_attempt_at back with exponential backoff.
+    """
+    
+    __tablename__ = "pin_jobs"
+    __table_args__ = (
+        Index("ix_pin_jobs_next_attempt", "next_attempt_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    ipfs_hash = Column(String(100), unique=True, nullable=False)
+    action = Column(String(10), nullable=False)  # "pin" or "unpin"
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<PinJob({self.action} {self.ipfs_hash}, attempts={self.attempts})>"
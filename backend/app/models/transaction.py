@@ -33,7 +33,7 @@ class Transaction(Base, TimestampMixin):
     
     # Blockchain information
     transaction_hash = Column(String(100), unique=True, index=True, nullable=False)
-    block_height = Column(Integer, nullable=True)
+    block_height = Column(Integer, nullable=True, index=True)
     
     # Transaction details
     transaction_type = Column(Enum(TransactionType), nullable=False)
@@ -49,7 +49,7 @@ class Transaction(Base, TimestampMixin):
     dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=True)  # Null for non-dataset transactions
     
     # Additional metadata
-    metadata = Column(String(500), nullable=True)  # JSON string for additional data
+    tx_metadata = Column("metadata", String(500), nullable=True)  # JSON string for additional data
     
     # Relationships
     user = relationship("User", back_populates="transactions")
@@ -2,7 +2,7 @@
 User model
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Text, Float
+from sqlalchemy import Column, Integer, String, Boolean, Text, Float, Index
 from sqlalchemy.orm import relationship
 from .base import Base, TimestampMixin
 
@@ -11,6 +11,10 @@ class User(Base, TimestampMixin):
     """User model for storing user information"""
     
     __tablename__ = "users"
+    __table_args__ = (
+        # Signup analytics date ranges
+        Index("ix_users_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     wallet_address = Column(String(50), unique=True, index=True, nullable=False)
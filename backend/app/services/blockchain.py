@@ -8,10 +8,17 @@ import json
 import logging
 from typing import Dict, List, Optional, Any
 import httpx
+from app.core.circuit_breaker import breakers
 from app.core.config import settings
+from app.core.http_clients import http_clients
+from app.services.clarity import decode_hex, encode_many, principal_cv, uint_cv
+from app.services.contract_cache import contract_call_cache
 
 logger = logging.getLogger(__name__)
 
+# Opens after repeated Stacks API failures so callers fail fast
+stacks_breaker = breakers.get("stacks")
+
 
 class StacksService:
     """Service for interacting with Stacks blockchain"""
@@ -21,12 +28,23 @@ class StacksService:
         self.network = settings.STACKS_NETWORK
         self.contract_address = settings.CONTRACT_ADDRESS
         
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the Stacks circuit breaker
+        
+        Transport errors and 5xx responses count as failures; other
+        responses are returned for the caller to interpret.
+        """
+        with stacks_breaker.guard():
+            response = await http_clients.get("stacks").request(method, url, **kwargs)
+            if response.status_code >= 500:
+                response.raise_for_status()
+        return response
+    
     async def get_network_status(self) -> bool:
         """Check if blockchain network is accessible"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.api_url}/v2/info")
-                return response.status_code == 200
+            response = await self._request("GET", f"{self.api_url}/v2/info")
+            return response.status_code == 200
         except Exception as e:
             logger.error(f"Failed to check network status: {e}")
             return False
@@ -35,7 +53,7 @@ class StacksService:
         """Get dataset information from blockchain"""
         try:
             # Call read-only function on dataset-registry contract
-            function_args = [f"u{dataset_id}"]
+            function_args = encode_many([uint_cv(dataset_id)])
             
             response = await self._call_read_only_function(
                 contract_name="dataset-registry",
@@ -78,7 +96,7 @@ class StacksService:
     async def check_dataset_access(self, dataset_id: int, user_address: str) -> bool:
         """Check if user has access to dataset"""
         try:
-            function_args = [f"u{dataset_id}", f"'{user_address}"]
+            function_args = encode_many([uint_cv(dataset_id), principal_cv(user_address)])
             
             response = await self._call_read_only_function(
                 contract_name="dataset-registry",
@@ -120,7 +138,7 @@ class StacksService:
     async def get_user_datasets(self, user_address: str) -> List[int]:
         """Get list of datasets owned by user"""
         try:
-            function_args = [f"'{user_address}"]
+            function_args = encode_many([principal_cv(user_address)])
             
             response = await self._call_read_only_function(
                 contract_name="dataset-registry",
@@ -141,7 +159,7 @@ class StacksService:
     async def get_user_purchases(self, user_address: str) -> List[int]:
         """Get list of datasets purchased by user"""
         try:
-            function_args = [f"'{user_address}"]
+            function_args = encode_many([principal_cv(user_address)])
             
             response = await self._call_read_only_function(
                 contract_name="dataset-registry",
@@ -165,7 +183,24 @@ class StacksService:
         function_name: str, 
         function_args: List[str]
     ) -> Optional[Dict[str, Any]]:
-        """Call a read-only function on a smart contract"""
+        """Call a read-only function on a smart contract
+        
+        Results are cached until the Stacks tip advances, and concurrent
+        identical calls share one request (see contract_cache).
+        """
+        key = (self.contract_address, contract_name, function_name, tuple(function_args))
+        return await contract_call_cache.get_or_call(
+            key,
+            lambda: self._fetch_read_only(contract_name, function_name, function_args)
+        )
+    
+    async def _fetch_read_only(
+        self, 
+        contract_name: str, 
+        function_name: str, 
+        function_args: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Send a call-read request to the Stacks API"""
         try:
             url = f"{self.api_url}/v2/contracts/call-read/{self.contract_address}/{contract_name}/{function_name}"
             
@@ -174,40 +209,20 @@ class StacksService:
                 "arguments": function_args
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload)
+            response = await self._request("POST", url, json=payload)
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"Contract call failed: {response.status_code} - {response.text}")
+                return None
                 
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    logger.error(f"Contract call failed: {response.status_code} - {response.text}")
-                    return None
-                    
         except Exception as e:
             logger.error(f"Failed to call contract function {function_name}: {e}")
             return None
     
     def _parse_clarity_value(self, clarity_value: Any) -> Any:
-        """Parse Clarity value to Python value"""
-        if isinstance(clarity_value, dict):
-            if clarity_value.get("type") == "uint":
-                return int(clarity_value.get("value", 0))
-            elif clarity_value.get("type") == "bool":
-                return clarity_value.get("value") == "true"
-            elif clarity_value.get("type") == "principal":
-                return clarity_value.get("value")
-            elif clarity_value.get("type") == "string-utf8":
-                return clarity_value.get("value")
-            elif clarity_value.get("type") == "tuple":
-                result = {}
-                for key, value in clarity_value.get("value", {}).items():
-                    result[key] = self._parse_clarity_value(value)
-                return result
-            elif clarity_value.get("type") == "list":
-                return [self._parse_clarity_value(item) for item in clarity_value.get("value", [])]
-            elif clarity_value.get("type") == "some":
-                return self._parse_clarity_value(clarity_value.get("value"))
-            elif clarity_value.get("type") == "none":
-                return None
-        
+        """Decode a hex-serialized Clarity result (see app.services.clarity)"""
+        if isinstance(clarity_value, str):
+            return decode_hex(clarity_value)
         return clarity_value
@@ -0,0 +1,426 @@
+"""
+Clarity Value Codec
+Binary (consensus) serialization of Clarity values, as used by the Stacks
+call-read API for both arguments and results
+
+    0x00 int         16-byte big-endian, signed
+    0x01 uint        16-byte big-endian
+    0x02 buff        4-byte length + bytes
+    0x03 / 0x04      true / false
+    0x05 principal   version byte + 20-byte hash160
+    0x06 principal   version + hash160 + 1-byte name length + contract name
+    0x07 / 0x08      (ok v) / (err v)
+    0x09 / 0x0a      none / (some v)
+    0x0b list        4-byte count + values
+    0x0c tuple       4-byte count + (1-byte name length, name, value) sorted by name
+    0x0d / 0x0e      string-ascii / string-utf8, 4-byte length + bytes
+
+Arguments are built with the *_cv constructors (an int or str alone does
+not say which Clarity type it is); bool, bytes, None, list and dict map to
+bool, buff, none, list and tuple. Decoded values are plain Python: ints,
+bools, bytes, str (strings and c32 principals), lists and dicts. (some v)
+and (ok v) decode to v, none to None and (err v) to Err(v).
+
+Both directions use an explicit stack instead of recursion, so deeply
+nested values cannot hit the interpreter's recursion limit, and runs of
+uints inside lists (get-user-datasets ids) are read in a tight loop.
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+INT = 0x00
+UINT = 0x01
+BUFFER = 0x02
+TRUE = 0x03
+FALSE = 0x04
+STANDARD_PRINCIPAL = 0x05
+CONTRACT_PRINCIPAL = 0x06
+RESPONSE_OK = 0x07
+RESPONSE_ERR = 0x08
+NONE = 0x09
+SOME = 0x0A
+LIST = 0x0B
+TUPLE = 0x0C
+STRING_ASCII = 0x0D
+STRING_UTF8 = 0x0E
+
+MAX_DEPTH = 64  # Clarity itself allows 32 levels of nesting
+UINT_MAX = (1 << 128) - 1
+INT_MIN, INT_MAX = -(1 << 127), (1 << 127) - 1
+
+C32_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_C32_INDEX = {char: index for index, char in enumerate(C32_ALPHABET)}
+_C32_NORMALIZE = str.maketrans({"O": "0", "L": "1", "I": "1"})
+
+
+class ClarityError(ValueError):
+    """Malformed Clarity value, principal or serialized bytes"""
+
+
+class ClarityValue(NamedTuple):
+    """A value tagged with its Clarity type, for encoding"""
+
+    type_id: int
+    value: Any
+
+
+class Err(NamedTuple):
+    """A decoded (err ...) response"""
+
+    value: Any
+
+
+def uint_cv(value: int) -> ClarityValue:
+    if not 0 <= value <= UINT_MAX:
+        raise ClarityError(f"uint out of range: {value}")
+    return ClarityValue(UINT, value)
+
+
+def int_cv(value: int) -> ClarityValue:
+    if not INT_MIN <= value <= INT_MAX:
+        raise ClarityError(f"int out of range: {value}")
+    return ClarityValue(INT, value)
+
+
+def bool_cv(value: bool) -> ClarityValue:
+    return ClarityValue(TRUE if value else FALSE, None)
+
+
+def buffer_cv(value: bytes) -> ClarityValue:
+    return ClarityValue(BUFFER, bytes(value))
+
+
+def string_ascii_cv(value: str) -> ClarityValue:
+    if not value.isascii():
+        raise ClarityError("string-ascii value contains non-ASCII characters")
+    return ClarityValue(STRING_ASCII, value)
+
+
+def string_utf8_cv(value: str) -> ClarityValue:
+    return ClarityValue(STRING_UTF8, value)
+
+
+def principal_cv(value: str) -> ClarityValue:
+    """Standard (SP...) or contract (SP....name) principal; a leading ' is ignored"""
+    address, _, contract_name = value.lstrip("'").partition(".")
+    version, hash160 = c32_address_decode(address)
+    if contract_name:
+        return ClarityValue(CONTRACT_PRINCIPAL, (version, hash160, contract_name))
+    return ClarityValue(STANDARD_PRINCIPAL, (version, hash160))
+
+
+def none_cv() -> ClarityValue:
+    return ClarityValue(NONE, None)
+
+
+def some_cv(value: Any) -> ClarityValue:
+    return ClarityValue(SOME, value)
+
+
+def ok_cv(value: Any) -> ClarityValue:
+    return ClarityValue(RESPONSE_OK, value)
+
+
+def err_cv(value: Any) -> ClarityValue:
+    return ClarityValue(RESPONSE_ERR, value)
+
+
+def list_cv(values: Iterable[Any]) -> ClarityValue:
+    return ClarityValue(LIST, list(values))
+
+
+def tuple_cv(fields: dict) -> ClarityValue:
+    return ClarityValue(TUPLE, dict(fields))
+
+
+# c32check (Stacks addresses)
+
+def _c32_encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    chars = []
+    while number:
+        number, digit = divmod(number, 32)
+        chars.append(C32_ALPHABET[digit])
+    # Each leading zero byte is written as one '0'
+    leading = len(data) - len(data.lstrip(b"\0"))
+    return "0" * leading + "".join(reversed(chars))
+
+
+def _checksum(version: int, hash160: bytes) -> bytes:
+    return hashlib.sha256(hashlib.sha256(bytes([version]) + hash160).digest()).digest()[:4]
+
+
+@lru_cache(maxsize=4096)
+def c32_address(version: int, hash160: bytes) -> str:
+    """Stacks address for a version byte and hash160 (e.g. 22 -> SP..., 26 -> ST...)"""
+    if not 0 <= version < len(C32_ALPHABET):
+        raise ClarityError(f"Invalid address version byte {version}")
+    return "S" + C32_ALPHABET[version] + _c32_encode(hash160 + _checksum(version, hash160))
+
+
+@lru_cache(maxsize=4096)
+def c32_address_decode(address: str) -> Tuple[int, bytes]:
+    """(version, hash160) of a Stacks address, verifying its checksum"""
+    normalized = address.upper().translate(_C32_NORMALIZE)
+    if len(normalized) < 3 or normalized[0] != "S" or normalized[1] not in _C32_INDEX:
+        raise ClarityError(f"Invalid Stacks address: {address}")
+    version = _C32_INDEX[normalized[1]]
+    number = 0
+    for char in normalized[2:]:
+        digit = _C32_INDEX.get(char)
+        if digit is None:
+            raise ClarityError(f"Invalid c32 character in address: {address}")
+        number = number * 32 + digit
+    try:
+        payload = number.to_bytes(24, "big")
+    except OverflowError:
+        raise ClarityError(f"Invalid Stacks address length: {address}")
+    hash160, checksum = payload[:20], payload[20:]
+    if _checksum(version, hash160) != checksum:
+        raise ClarityError(f"Invalid Stacks address checksum: {address}")
+    return version, hash160
+
+
+# Serialization
+
+def _tag(value: Any) -> ClarityValue:
+    if isinstance(value, ClarityValue):
+        return value
+    if isinstance(value, bool):
+        return bool_cv(value)
+    if value is None:
+        return ClarityValue(NONE, None)
+    if isinstance(value, Err):
+        return ClarityValue(RESPONSE_ERR, value.value)
+    if isinstance(value, (bytes, bytearray)):
+        return ClarityValue(BUFFER, bytes(value))
+    if isinstance(value, (list, tuple)):
+        return ClarityValue(LIST, value)
+    if isinstance(value, dict):
+        return ClarityValue(TUPLE, value)
+    raise ClarityError(f"Ambiguous Clarity type for {type(value).__name__}; use uint_cv, int_cv, principal_cv, ...")
+
+
+def _length(count: int) -> bytes:
+    return count.to_bytes(4, "big")
+
+
+class _Raw(bytes):
+    """Pre-encoded bytes on the serializer stack (kept apart from buff values)"""
+
+
+def _name(name: str) -> bytes:
+    encoded = name.encode("ascii")
+    if not 0 < len(encoded) <= 128:
+        raise ClarityError(f"Invalid Clarity name: {name!r}")
+    return bytes([len(encoded)]) + encoded
+
+
+def serialize(value: Any) -> bytes:
+    """Serialized bytes of one value"""
+    out = bytearray()
+    # Entries are values still to write, or raw bytes (tuple field names)
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if type(item) is _Raw:
+            out += item
+            continue
+
+        type_id, inner = _tag(item)
+        out.append(type_id)
+        if type_id == UINT:
+            out += inner.to_bytes(16, "big")
+        elif type_id == INT:
+            out += inner.to_bytes(16, "big", signed=True)
+        elif type_id in (TRUE, FALSE, NONE):
+            pass
+        elif type_id in (SOME, RESPONSE_OK, RESPONSE_ERR):
+            stack.append(inner)
+        elif type_id == BUFFER:
+            out += _length(len(inner)) + inner
+        elif type_id in (STRING_ASCII, STRING_UTF8):
+            encoded = inner.encode("ascii" if type_id == STRING_ASCII else "utf-8")
+            out += _length(len(encoded)) + encoded
+        elif type_id == STANDARD_PRINCIPAL:
+            out.append(inner[0])
+            out += inner[1]
+        elif type_id == CONTRACT_PRINCIPAL:
+            out.append(inner[0])
+            out += inner[1] + _name(inner[2])
+        elif type_id == LIST:
+            out += _length(len(inner))
+            stack.extend(reversed(inner))
+        elif type_id == TUPLE:
+            out += _length(len(inner))
+            for name in sorted(inner, reverse=True):
+                stack.append(inner[name])
+                stack.append(_Raw(_name(name)))
+        else:
+            raise ClarityError(f"Unknown Clarity type id {type_id:#04x}")
+    return bytes(out)
+
+
+def encode_hex(value: Any) -> str:
+    """0x-prefixed hex, the form call-read takes its arguments in"""
+    return "0x" + serialize(value).hex()
+
+
+def encode_many(values: Iterable[Any]) -> List[str]:
+    """Hex encodings of a batch of values (e.g. a call's arguments)"""
+    return [encode_hex(value) for value in values]
+
+
+# Deserialization
+
+def _truncated(pos: int) -> ClarityError:
+    return ClarityError(f"Truncated Clarity value at byte {pos}")
+
+
+def deserialize_at(data: bytes, pos: int = 0) -> Tuple[Any, int]:
+    """Decode one value starting at pos; returns (value, position after it)"""
+    data = bytes(data)
+    size = len(data)
+    from_bytes = int.from_bytes
+    # Tuple field names repeat across list items; decode each once
+    names: Dict[bytes, str] = {}
+    # Open containers: [type_id, container, remaining, pending tuple field name]
+    stack: List[list] = []
+
+    def read_name(pos: int) -> Tuple[str, int]:
+        if pos >= size:
+            raise _truncated(pos)
+        end = pos + 1 + data[pos]
+        if end > size:
+            raise _truncated(pos)
+        raw = data[pos + 1:end]
+        name = names.get(raw)
+        if name is None:
+            name = names[raw] = raw.decode("ascii")
+        return name, end
+
+    while True:
+        if pos >= size:
+            raise _truncated(pos)
+        type_id = data[pos]
+        pos += 1
+
+        if type_id == UINT or type_id == INT:
+            end = pos + 16
+            if end > size:
+                raise _truncated(pos)
+            value = from_bytes(data[pos:end], "big", signed=type_id == INT)
+            pos = end
+        elif type_id == TRUE:
+            value = True
+        elif type_id == FALSE:
+            value = False
+        elif type_id == NONE:
+            value = None
+        elif type_id in (BUFFER, STRING_ASCII, STRING_UTF8):
+            end = pos + 4 + from_bytes(data[pos:pos + 4], "big")
+            if pos + 4 > size or end > size:
+                raise _truncated(pos)
+            raw = data[pos + 4:end]
+            pos = end
+            if type_id == BUFFER:
+                value = raw
+            else:
+                try:
+                    value = raw.decode("ascii" if type_id == STRING_ASCII else "utf-8")
+                except UnicodeDecodeError as e:
+                    raise ClarityError(f"Invalid string bytes: {e}")
+        elif type_id in (STANDARD_PRINCIPAL, CONTRACT_PRINCIPAL):
+            end = pos + 21
+            if end > size:
+                raise _truncated(pos)
+            value = c32_address(data[pos], data[pos + 1:end])
+            pos = end
+            if type_id == CONTRACT_PRINCIPAL:
+                contract_name, pos = read_name(pos)
+                value = f"{value}.{contract_name}"
+        elif type_id in (SOME, RESPONSE_OK, RESPONSE_ERR):
+            stack.append([type_id, None, 1, None])
+            if len(stack) > MAX_DEPTH:
+                raise ClarityError("Clarity value nested too deeply")
+            continue
+        elif type_id == LIST:
+            if pos + 4 > size:
+                raise _truncated(pos)
+            count = from_bytes(data[pos:pos + 4], "big")
+            pos += 4
+            items: List[Any] = []
+            # Fast path for lists of uints (dataset ids)
+            while count and pos < size and data[pos] == UINT:
+                end = pos + 17
+                if end > size:
+                    raise _truncated(pos)
+                items.append(from_bytes(data[pos + 1:end], "big"))
+                pos = end
+                count -= 1
+            if count:
+                stack.append([LIST, items, count, None])
+                if len(stack) > MAX_DEPTH:
+                    raise ClarityError("Clarity value nested too deeply")
+                continue
+            value = items
+        elif type_id == TUPLE:
+            if pos + 4 > size:
+                raise _truncated(pos)
+            count = from_bytes(data[pos:pos + 4], "big")
+            pos += 4
+            if count:
+                name, pos = read_name(pos)
+                stack.append([TUPLE, {}, count, name])
+                if len(stack) > MAX_DEPTH:
+                    raise ClarityError("Clarity value nested too deeply")
+                continue
+            value = {}
+        else:
+            raise ClarityError(f"Unknown Clarity type id {type_id:#04x} at byte {pos - 1}")
+
+        # A value is complete: hand it to the containers waiting on it
+        while stack:
+            frame = stack[-1]
+            kind = frame[0]
+            if kind == LIST:
+                frame[1].append(value)
+            elif kind == TUPLE:
+                frame[1][frame[3]] = value
+            else:
+                stack.pop()
+                value = Err(value) if kind == RESPONSE_ERR else value
+                continue
+            frame[2] -= 1
+            if frame[2]:
+                if kind == TUPLE:
+                    frame[3], pos = read_name(pos)
+                break
+            stack.pop()
+            value = frame[1]
+        else:
+            return value, pos
+
+
+def deserialize(data: bytes) -> Any:
+    """Decode exactly one serialized value"""
+    value, pos = deserialize_at(data)
+    if pos != len(data):
+        raise ClarityError(f"{len(data) - pos} trailing bytes after Clarity value")
+    return value
+
+
+def decode_hex(text: str) -> Any:
+    """Decode a 0x-prefixed (or bare) hex value, as call-read returns them"""
+    try:
+        data = bytes.fromhex(text[2:] if text.startswith("0x") else text)
+    except ValueError as e:
+        raise ClarityError(f"Invalid hex Clarity value: {e}")
+    return deserialize(data)
+
+
+def decode_many(texts: Iterable[str]) -> List[Any]:
+    """Decode a batch of hex values (e.g. call results or transaction arguments)"""
+    return [decode_hex(text) for text in texts]
@@ -0,0 +1,154 @@
+"""
+Payload Compression
+Codecs for dataset payloads stored on IPFS
+
+Payloads are compressed once at upload with STORAGE_COMPRESSION (zstd when
+the zstandard package is installed, gzip otherwise) and the codec is
+recorded in the dataset's metadata. Downloads hand the stored bytes to
+clients that accept the codec, and decompress on the fly only for clients
+that do not.
+"""
+
+import asyncio
+import gzip
+import logging
+import zlib
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+IDENTITY = "identity"
+ZSTD = "zstd"
+GZIP = "gzip"
+
+# Named presets per codec; zstd levels above 19 cost far more CPU for little gain on JSON
+LEVEL_PRESETS: Dict[str, Dict[str, int]] = {
+    ZSTD: {"fast": 3, "default": 9, "max": 19},
+    GZIP: {"fast": 1, "default": 6, "max": 9}
+}
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def storage_codec() -> str:
+    """Codec new uploads are stored with"""
+    codec = settings.STORAGE_COMPRESSION.lower()
+    if codec in ("none", "", IDENTITY):
+        return IDENTITY
+    if codec == ZSTD and zstandard is None:
+        logger.warning("zstandard is not installed; storing payloads with gzip")
+        return GZIP
+    if codec not in LEVEL_PRESETS:
+        raise ValueError(f"Unsupported STORAGE_COMPRESSION: {settings.STORAGE_COMPRESSION}")
+    return codec
+
+
+def compression_level(codec: str, preset: Optional[str] = None) -> int:
+    preset = preset or settings.STORAGE_COMPRESSION_LEVEL
+    presets = LEVEL_PRESETS[codec]
+    if preset in presets:
+        return presets[preset]
+    return int(preset)
+
+
+def compress(data: bytes, codec: str, level: int) -> bytes:
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if codec == GZIP:
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return data
+
+
+def detect_codec(data: bytes) -> str:
+    """Codec of a stored payload, from its magic bytes"""
+    if data.startswith(ZSTD_MAGIC):
+        return ZSTD
+    if data.startswith(GZIP_MAGIC):
+        return GZIP
+    return IDENTITY
+
+
+def decompress(data: bytes, codec: Optional[str] = None) -> bytes:
+    codec = codec or detect_codec(data)
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd payloads")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if codec == GZIP:
+        return gzip.decompress(data)
+    return data
+
+
+def encode_payload(payload: bytes, preset: Optional[str] = None) -> Tuple[bytes, Dict[str, Any]]:
+    """Compress a payload for storage; returns the bytes and their storage metadata"""
+    codec = storage_codec()
+    if codec == IDENTITY:
+        return payload, {"codec": IDENTITY, "size": len(payload), "stored_size": len(payload)}
+
+    level = compression_level(codec, preset)
+    stored = compress(payload, codec, level)
+    return stored, {
+        "codec": codec,
+        "level": level,
+        "size": len(payload),
+        "stored_size": len(stored)
+    }
+
+
+def accepts_encoding(accept_encoding: Optional[str], codec: str) -> bool:
+    """Whether an Accept-Encoding header admits codec (q=0 excludes it)"""
+    if codec == IDENTITY:
+        return True
+    if not accept_encoding:
+        return False
+
+    wildcard = None
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name == codec:
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return bool(wildcard)
+
+
+async def decompress_stream(chunks: AsyncIterator[bytes], codec: str) -> AsyncIterator[bytes]:
+    """Decompress a stored payload as it streams, for clients without the codec
+
+    Each chunk is decompressed on a worker thread (both codecs release the
+    GIL) so large downloads do not stall the event loop.
+    """
+    if codec == ZSTD:
+        decoder = zstandard.ZstdDecompressor().decompressobj()
+    elif codec == GZIP:
+        decoder = zlib.decompressobj(wbits=31)
+    else:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    async for chunk in chunks:
+        data = await asyncio.to_thread(decoder.decompress, chunk)
+        if data:
+            yield data
+    if codec == GZIP:
+        tail = decoder.flush()
+        if tail:
+            yield tail
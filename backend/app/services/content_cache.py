@@ -0,0 +1,375 @@
+"""
+Content-Addressed Disk Cache
+Local, size-bounded copy of IPFS objects keyed by their hash
+
+IPFS content never changes for a given hash, so a cached object stays valid
+until it is evicted. Objects live under <root>/objects/<xx>/<hash> with a
+<hash>.sha256 sidecar holding a checksum of the bytes as they were written.
+The checksum catches local corruption (truncated or damaged files); it is
+not derived from the CID, which hashes the UnixFS DAG rather than the file
+bytes, so it does not prove the upstream served the right content.
+Whole-object reads are checked every time; objects opened for streaming or
+ranged reads are checked on first open in each process. A mismatching entry
+is dropped and refetched.
+
+Writes go to a temporary file that is fsynced and renamed into place, so a
+crash never leaves a partial object behind. Recency is kept in memory and
+mirrored to file mtimes, so LRU order survives restarts. Workers share the
+directory: before evicting, usage is recomputed from the files on disk, so
+IPFS_CACHE_MAX_BYTES bounds all workers together.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import BinaryIO, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = registry.counter(
+    "ipfs_cache_lookups_total",
+    "Local IPFS cache lookups by result",
+    ["result"]
+)
+CACHE_BYTES_SERVED = registry.counter(
+    "ipfs_cache_bytes_served_total",
+    "Bytes served from the local IPFS cache instead of the network"
+)
+CACHE_EVICTIONS = registry.counter(
+    "ipfs_cache_evictions_total",
+    "Objects evicted from the local IPFS cache"
+)
+CACHE_CORRUPT = registry.counter(
+    "ipfs_cache_corrupt_total",
+    "Cached objects discarded because they failed their checksum"
+)
+CACHE_SIZE = registry.gauge(
+    "ipfs_cache_size_bytes",
+    "Bytes held in the local IPFS cache"
+)
+CACHE_ENTRIES = registry.gauge(
+    "ipfs_cache_entries",
+    "Objects held in the local IPFS cache"
+)
+
+# CIDv0/v1 strings are base58 or base32; anything else is not cached
+HASH_PATTERN = re.compile(r"^[A-Za-z0-9]{16,128}$")
+READ_BLOCK = 1024 * 1024
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(READ_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, data: bytes):
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class CacheWriter:
+    """Incrementally writes one object; nothing is visible until commit()"""
+
+    def __init__(self, cache: "ContentCache", ipfs_hash: str):
+        self.cache = cache
+        self.ipfs_hash = ipfs_hash
+        self.path = cache.object_path(ipfs_hash)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.temp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        self.handle: Optional[BinaryIO] = open(self.temp_path, "wb")
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes) -> bool:
+        """Append a chunk; returns False (and aborts) once the object is too large"""
+        if self.handle is None:
+            return False
+        self.size += len(chunk)
+        if self.size > self.cache.max_object_bytes:
+            self.abort()
+            return False
+        self.handle.write(chunk)
+        self.digest.update(chunk)
+        return True
+
+    def commit(self):
+        if self.handle is None:
+            return
+        handle, self.handle = self.handle, None
+        try:
+            handle.flush()
+            os.fsync(handle.fileno())
+            handle.close()
+            _write_atomic(self.cache.digest_path(self.ipfs_hash), self.digest.hexdigest().encode("ascii"))
+            os.replace(self.temp_path, self.path)
+        except BaseException:
+            handle.close()
+            if os.path.exists(self.temp_path):
+                os.unlink(self.temp_path)
+            raise
+        self.cache._admit(self.ipfs_hash, self.size)
+
+    def abort(self):
+        if self.handle is None:
+            return
+        handle, self.handle = self.handle, None
+        handle.close()
+        if os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+
+
+class ContentCache:
+    """Size-bounded LRU cache of immutable objects on local disk
+
+    Methods do blocking file I/O; async callers run them via
+    asyncio.to_thread.
+    """
+
+    def __init__(self, root: str, max_bytes: int, max_object_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_object_bytes = min(max_object_bytes, max_bytes)
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._verified: Set[str] = set()
+        self._size = 0
+        self._loaded = False
+        self._lock = threading.RLock()
+
+        CACHE_SIZE.set_function(lambda: self._size)
+        CACHE_ENTRIES.set_function(lambda: len(self._entries))
+
+    @staticmethod
+    def cacheable(ipfs_hash: Optional[str]) -> bool:
+        return bool(ipfs_hash) and HASH_PATTERN.match(ipfs_hash) is not None
+
+    def object_path(self, ipfs_hash: str) -> str:
+        return os.path.join(self.root, "objects", ipfs_hash[-2:], ipfs_hash)
+
+    def digest_path(self, ipfs_hash: str) -> str:
+        return self.object_path(ipfs_hash) + ".sha256"
+
+    def _objects_dir(self) -> str:
+        return os.path.join(self.root, "objects")
+
+    def load(self):
+        """Drop leftovers from interrupted writes and build the index from disk"""
+        with self._lock:
+            if self._loaded:
+                return
+            objects_dir = self._objects_dir()
+            os.makedirs(objects_dir, exist_ok=True)
+            for shard in os.listdir(objects_dir):
+                shard_dir = os.path.join(objects_dir, shard)
+                if not os.path.isdir(shard_dir):
+                    continue
+                names = set(os.listdir(shard_dir))
+                for name in names:
+                    path = os.path.join(shard_dir, name)
+                    if name.endswith(".tmp"):
+                        os.unlink(path)
+                    elif name.endswith(".sha256"):
+                        if name[:-len(".sha256")] not in names:
+                            os.unlink(path)
+                    elif f"{name}.sha256" not in names:
+                        os.unlink(path)
+
+            self._reindex()
+            self._loaded = True
+            self._evict()
+            logger.info(f"IPFS cache at {self.root}: {len(self._entries)} objects, {self._size} bytes")
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        """(mtime, hash, size) of every complete object on disk"""
+        found = []
+        objects_dir = self._objects_dir()
+        for shard in os.listdir(objects_dir):
+            shard_dir = os.path.join(objects_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            names = set(os.listdir(shard_dir))
+            for name in names:
+                if name.endswith((".tmp", ".sha256")) or f"{name}.sha256" not in names:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(shard_dir, name))
+                except FileNotFoundError:  # evicted by another worker
+                    continue
+                found.append((stat.st_mtime, name, stat.st_size))
+        return found
+
+    def _reindex(self):
+        """Rebuild the LRU index from disk, oldest mtime first
+
+        Picks up objects written, read or evicted by other workers, which
+        keep recency in the same file mtimes.
+        """
+        found = sorted(self._scan())
+        with self._lock:
+            self._entries = OrderedDict((ipfs_hash, size) for _, ipfs_hash, size in found)
+            self._size = sum(size for _, _, size in found)
+            self._verified &= set(self._entries)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def size_of(self, ipfs_hash: str) -> Optional[int]:
+        """Size of a cached object, or None when it is not cached"""
+        if not self.cacheable(ipfs_hash):
+            return None
+        self._ensure_loaded()
+        with self._lock:
+            return self._entries.get(ipfs_hash)
+
+    def _verify(self, ipfs_hash: str) -> bool:
+        """Check an object against its sidecar checksum once per process"""
+        if ipfs_hash in self._verified:
+            return True
+        try:
+            with open(self.digest_path(ipfs_hash), "rb") as handle:
+                expected = handle.read().decode("ascii").strip()
+            valid = _file_digest(self.object_path(ipfs_hash)) == expected
+        except OSError:
+            valid = False
+        if valid:
+            self._verified.add(ipfs_hash)
+        else:
+            CACHE_CORRUPT.inc()
+            logger.warning(f"Discarding corrupt cache entry {ipfs_hash}")
+            self.discard(ipfs_hash)
+        return valid
+
+    def _touch(self, ipfs_hash: str):
+        with self._lock:
+            self._entries.move_to_end(ipfs_hash)
+        try:
+            os.utime(self.object_path(ipfs_hash))
+        except OSError:
+            pass
+
+    def read(self, ipfs_hash: str) -> Optional[bytes]:
+        """Whole object from the cache, checked against its sidecar checksum"""
+        if self.size_of(ipfs_hash) is None:
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+        try:
+            with open(self.object_path(ipfs_hash), "rb") as handle:
+                data = handle.read()
+            with open(self.digest_path(ipfs_hash), "rb") as handle:
+                expected = handle.read().decode("ascii").strip()
+        except OSError:
+            self.discard(ipfs_hash)
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+        if hashlib.sha256(data).hexdigest() != expected:
+            CACHE_CORRUPT.inc()
+            logger.warning(f"Discarding corrupt cache entry {ipfs_hash}")
+            self.discard(ipfs_hash)
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+        self._verified.add(ipfs_hash)
+        self._touch(ipfs_hash)
+        CACHE_LOOKUPS.inc(result="hit")
+        CACHE_BYTES_SERVED.inc(len(data))
+        return data
+
+    def open(self, ipfs_hash: str) -> Optional[BinaryIO]:
+        """Open a checked object for ranged reads; the caller closes it"""
+        if self.size_of(ipfs_hash) is None or not self._verify(ipfs_hash):
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+        try:
+            handle = open(self.object_path(ipfs_hash), "rb")
+        except OSError:
+            self.discard(ipfs_hash)
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+        self._touch(ipfs_hash)
+        CACHE_LOOKUPS.inc(result="hit")
+        return handle
+
+    def put(self, ipfs_hash: str, data: bytes) -> bool:
+        """Store a whole object; returns whether it was cached"""
+        if not self.cacheable(ipfs_hash) or len(data) > self.max_object_bytes:
+            return False
+        self._ensure_loaded()
+        if self.size_of(ipfs_hash) is not None:
+            return True
+        writer = CacheWriter(self, ipfs_hash)
+        writer.write(data)
+        writer.commit()
+        return True
+
+    def writer(self, ipfs_hash: str) -> Optional[CacheWriter]:
+        """Writer for streaming an object into the cache as it is fetched"""
+        if not self.cacheable(ipfs_hash):
+            return None
+        self._ensure_loaded()
+        if self.size_of(ipfs_hash) is not None:
+            return None
+        return CacheWriter(self, ipfs_hash)
+
+    def _admit(self, ipfs_hash: str, size: int):
+        with self._lock:
+            self._reindex()
+            if ipfs_hash in self._entries:
+                self._entries.move_to_end(ipfs_hash)
+            else:
+                self._entries[ipfs_hash] = size
+                self._size += size
+            self._verified.add(ipfs_hash)
+            self._evict()
+
+    def _evict(self):
+        with self._lock:
+            while self._size > self.max_bytes and self._entries:
+                ipfs_hash, size = self._entries.popitem(last=False)
+                self._size -= size
+                self._verified.discard(ipfs_hash)
+                self._remove_files(ipfs_hash)
+                CACHE_EVICTIONS.inc()
+
+    def _remove_files(self, ipfs_hash: str):
+        # Object first, so a reader never finds an object without its digest
+        for path in (self.object_path(ipfs_hash), self.digest_path(ipfs_hash)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def discard(self, ipfs_hash: str):
+        with self._lock:
+            size = self._entries.pop(ipfs_hash, None)
+            if size is not None:
+                self._size -= size
+            self._verified.discard(ipfs_hash)
+            self._remove_files(ipfs_hash)
+
+
+# Shared by all IPFSService instances; loaded in the application lifespan
+content_cache = ContentCache(
+    settings.IPFS_CACHE_DIR,
+    settings.IPFS_CACHE_MAX_BYTES,
+    settings.IPFS_CACHE_MAX_OBJECT_BYTES
+)
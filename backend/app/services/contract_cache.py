@@ -0,0 +1,187 @@
+"""
+Read-only Contract Call Cache
+Read-through cache for Stacks call-read results, scoped to the chain tip
+
+A read-only call can only change its answer when a new block lands, so
+results are cached per (contract, function, arguments) for the current
+Stacks tip. The tip height is re-read at most every
+CONTRACT_CACHE_TIP_SECONDS; when it advances every entry is dropped.
+CONTRACT_CACHE_TTL_SECONDS bounds how long an entry can live within one
+block (and while the tip cannot be read), and negative answers (none, err,
+(ok false), okay: false) use the shorter
+CONTRACT_CACHE_NEGATIVE_TTL_SECONDS so a purchase shows up soon after it
+is mined.
+
+Concurrent identical calls are coalesced: the first caller reads the chain
+and the others await its result. Failed reads are not cached; the Stacks
+circuit breaker handles an unavailable API.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.circuit_breaker import breakers
+from app.core.config import settings
+from app.core.http_clients import http_clients
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CONTRACT_CACHE_LOOKUPS = registry.counter(
+    "contract_call_cache_lookups_total",
+    "Read-only contract call cache lookups by result (hit, negative_hit, miss, coalesced)",
+    ["result"]
+)
+CONTRACT_CACHE_ENTRIES = registry.gauge(
+    "contract_call_cache_entries",
+    "Cached read-only contract call results"
+)
+STACKS_TIP_HEIGHT = registry.gauge(
+    "stacks_tip_height",
+    "Latest Stacks tip height seen by the contract call cache"
+)
+
+# Serialized Clarity prefixes of a (none), an (err ...) and an (ok false) result
+CLARITY_NONE = "0x09"
+CLARITY_ERR = "0x08"
+CLARITY_OK_FALSE = "0x0704"
+
+
+def is_negative(response: Dict[str, Any]) -> bool:
+    """Whether a call-read response is a negative answer (none, err, (ok false), or not okay)"""
+    if not response.get("okay", True):
+        return True
+    result = response.get("result")
+    if isinstance(result, str):
+        return result.startswith((CLARITY_NONE, CLARITY_ERR, CLARITY_OK_FALSE))
+    if isinstance(result, dict):
+        return result.get("type") in ("none", "err")
+    return result is None
+
+
+class ReadOnlyCallCache:
+    """LRU of call-read responses, invalidated when the Stacks tip advances"""
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        tip_seconds: float,
+        max_entries: int,
+        enabled: bool = True
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.tip_seconds = tip_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.tip_height: Optional[int] = None
+        self._tip_checked_at = float("-inf")
+        self._tip_task: Optional[asyncio.Task] = None
+
+        CONTRACT_CACHE_ENTRIES.set_function(lambda: len(self._entries))
+
+    async def _read_tip(self) -> Optional[int]:
+        with breakers.get("stacks").guard():
+            response = await http_clients.get("stacks").get(f"{settings.STACKS_API_URL}/v2/info", timeout=5.0)
+            response.raise_for_status()
+        return int(response.json()["stacks_tip_height"])
+
+    def observe_tip(self, height: int):
+        """Record the chain tip; a new height drops every cached result"""
+        if self.tip_height is not None and height != self.tip_height:
+            logger.debug(f"Stacks tip moved {self.tip_height} -> {height}; dropping {len(self._entries)} cached calls")
+            self._entries.clear()
+        self.tip_height = height
+        STACKS_TIP_HEIGHT.set(height)
+
+    async def _refresh_tip(self):
+        try:
+            self.observe_tip(await self._read_tip())
+        except Exception as e:
+            # Entries stay valid up to their TTL while the tip is unknown
+            logger.warning(f"Failed to read Stacks tip height: {e}")
+        finally:
+            self._tip_checked_at = time.monotonic()
+
+    async def _ensure_tip(self):
+        """Re-read the tip when the last check is older than tip_seconds (one reader at a time)"""
+        if time.monotonic() - self._tip_checked_at < self.tip_seconds:
+            return
+        if self._tip_task is None or self._tip_task.done():
+            self._tip_task = asyncio.create_task(self._refresh_tip())
+        await asyncio.shield(self._tip_task)
+
+    def _lookup(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: Hashable, response: Dict[str, Any]):
+        ttl = self.negative_ttl_seconds if is_negative(response) else self.ttl_seconds
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_call(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Cached response for key, or the result of call() (coalesced with identical calls)"""
+        if not self.enabled:
+            return await call()
+
+        await self._ensure_tip()
+        response = self._lookup(key)
+        if response is not None:
+            CONTRACT_CACHE_LOOKUPS.inc(result="negative_hit" if is_negative(response) else "hit")
+            return response
+
+        task = self._inflight.get(key)
+        if task is not None:
+            CONTRACT_CACHE_LOOKUPS.inc(result="coalesced")
+            return await asyncio.shield(task)
+
+        CONTRACT_CACHE_LOOKUPS.inc(result="miss")
+        tip = self.tip_height
+
+        async def load():
+            try:
+                response = await call()
+                # Skip results read across a tip change; they may predate the new block
+                if response is not None and self.tip_height == tip:
+                    self._store(key, response)
+                return response
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(load())
+        self._inflight[key] = task
+        # Shielded so one cancelled caller does not fail the others waiting on it
+        return await asyncio.shield(task)
+
+    def clear(self):
+        self._entries.clear()
+
+
+contract_call_cache = ReadOnlyCallCache(
+    ttl_seconds=settings.CONTRACT_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.CONTRACT_CACHE_NEGATIVE_TTL_SECONDS,
+    tip_seconds=settings.CONTRACT_CACHE_TIP_SECONDS,
+    max_entries=settings.CONTRACT_CACHE_MAX_ENTRIES,
+    enabled=settings.CONTRACT_CACHE_ENABLED
+)
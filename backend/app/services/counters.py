@@ -0,0 +1,184 @@
+"""
+Denormalized Counter Service
+Write-behind aggregation for User and Dataset statistics columns
+(total_uploads, total_sales, total_revenue, ...)
+
+Events append CounterDelta rows inside their own transaction and never
+touch the target row, so concurrent purchases of a popular dataset do not
+contend on it. A background flusher claims journal rows in
+batches, sums them per target and applies one atomic
+UPDATE ... SET col = col + :delta per row. Claiming (DELETE ... RETURNING)
+and applying happen in a single transaction, so deltas survive restarts
+and are applied exactly once even with several workers flushing.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple, Type, Union
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import registry
+from app.models.base import Base
+from app.models.counter import CounterDelta
+from app.models.dataset import Dataset
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Counter columns that may only change through this service
+COUNTER_FIELDS: Dict[Type[Base], Tuple[str, ...]] = {
+    User: ("total_uploads", "total_purchases", "total_earnings"),
+    Dataset: ("total_sales", "total_revenue")
+}
+COUNTED_MODELS: Dict[str, Type[Base]] = {model.__tablename__: model for model in COUNTER_FIELDS}
+
+DELTAS_APPLIED = registry.counter(
+    "counter_deltas_applied_total",
+    "Counter journal rows folded into their target rows"
+)
+FLUSH_SECONDS = registry.histogram(
+    "counter_flush_seconds",
+    "Time spent in one counter flush"
+)
+
+
+def record_counters(
+    db: Union[Session, AsyncSession],
+    model: Type[Base],
+    target_id: int,
+    **deltas: float
+):
+    """Queue counter increments for one row; committed with the caller's transaction"""
+    allowed = COUNTER_FIELDS.get(model)
+    if allowed is None:
+        raise ValueError(f"{model.__name__} has no managed counters")
+
+    for field, delta in deltas.items():
+        if field not in allowed:
+            raise ValueError(f"{model.__name__}.{field} is not a managed counter")
+        if delta:
+            db.add(CounterDelta(
+                target_table=model.__tablename__,
+                target_id=target_id,
+                field=field,
+                delta=delta
+            ))
+
+
+def record_purchase(
+    db: Union[Session, AsyncSession],
+    dataset: Dataset,
+    buyer_id: int,
+    amount: float
+):
+    """Queue the counter changes for a dataset purchase"""
+    record_counters(db, Dataset, dataset.id, total_sales=1, total_revenue=amount)
+    record_counters(db, User, dataset.owner_id, total_earnings=amount)
+    record_counters(db, User, buyer_id, total_purchases=1)
+
+
+def flush_counter_deltas(db: Session, batch_size: Optional[int] = None) -> int:
+    """Apply up to batch_size journal rows; returns the number applied"""
+    batch_size = batch_size or settings.COUNTER_FLUSH_BATCH_SIZE
+    start = time.perf_counter()
+
+    claim = select(CounterDelta.id).order_by(CounterDelta.id).limit(batch_size)
+    claim = claim.with_for_update(skip_locked=True)
+    claimed = db.execute(
+        delete(CounterDelta)
+        .where(CounterDelta.id.in_(claim.scalar_subquery()))
+        .returning(CounterDelta.target_table, CounterDelta.target_id, CounterDelta.field, CounterDelta.delta),
+        execution_options={"synchronize_session": False}
+    ).all()
+
+    if not claimed:
+        db.rollback()
+        return 0
+
+    totals: Dict[Tuple[str, int], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for target_table, target_id, field, delta in claimed:
+        totals[(target_table, target_id)][field] += delta
+
+    # Update in a stable order so concurrent flushers cannot deadlock
+    for (target_table, target_id), fields in sorted(totals.items()):
+        model = COUNTED_MODELS.get(target_table)
+        if model is None:
+            logger.warning(f"Dropping counter deltas for unknown table {target_table}")
+            continue
+
+        values = {}
+        for field, delta in fields.items():
+            if field not in COUNTER_FIELDS[model]:
+                logger.warning(f"Dropping counter deltas for unmanaged field {target_table}.{field}")
+                continue
+            column = getattr(model, field)
+            values[field] = column + (int(delta) if column.type.python_type is int else delta)
+
+        if values:
+            db.execute(
+                update(model).where(model.id == target_id).values(**values),
+                execution_options={"synchronize_session": False}
+            )
+
+    db.commit()
+
+    DELTAS_APPLIED.inc(len(claimed))
+    FLUSH_SECONDS.observe(time.perf_counter() - start)
+    return len(claimed)
+
+
+class CounterFlusher:
+    """Background task that drains the counter journal every COUNTER_FLUSH_SECONDS"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or settings.COUNTER_FLUSH_SECONDS
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def flush(self) -> int:
+        """Drain the journal completely"""
+        total = 0
+        async with AsyncSessionLocal() as db:
+            while True:
+                applied = await db.run_sync(flush_counter_deltas)
+                total += applied
+                if applied < settings.COUNTER_FLUSH_BATCH_SIZE:
+                    return total
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Counter flush failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the loop and apply whatever is still queued"""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final counter flush failed: {e}")
+
+
+# Application-wide flusher started in the lifespan
+counter_flusher = CounterFlusher()
@@ -213,6 +213,11 @@ class DataProcessor:
             for col in price_cols:
                 df[col] = pd.to_numeric(df[col].astype(str).str.replace(r'[^\d.]', '', regex=True), errors='coerce')
 
+            # Standardize mileage columns ("68739 km" -> 68739.0)
+            mileage_cols = [col for col in df.columns if 'mileage' in col.lower()]
+            for col in mileage_cols:
+                df[col] = pd.to_numeric(df[col].astype(str).str.replace(r'[^\d.]', '', regex=True), errors='coerce')
+
             # Standardize year columns
             year_cols = [col for col in df.columns if 'year' in col.lower()]
             for col in year_cols:
@@ -271,7 +276,7 @@ class DataProcessor:
                     for col in df.columns
                 ],
                 "file_size_mb": round(df.memory_usage(deep=True).sum() / 1024 / 1024, 2),
-                "data_types": df.dtypes.value_counts().to_dict(),
+                "data_types": {str(dtype): int(count) for dtype, count in df.dtypes.value_counts().items()},
                 "missing_data_percentage": round((df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100, 2)
             }
         except Exception as e:
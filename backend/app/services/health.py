@@ -0,0 +1,165 @@
+"""
+Health Monitor
+Background probes of the database, Stacks API and IPFS node
+
+Probes run every HEALTH_PROBE_SECONDS with a timeout. /health reports the
+cached results together with the state of the circuit breakers, so a load
+balancer polling it does not add load to a struggling dependency.
+
+Probes bypass the breakers: they keep checking a dependency whose breaker
+is open and do not count towards opening one.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.circuit_breaker import breakers
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.http_clients import http_clients
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCY_UP = registry.gauge(
+    "dependency_up",
+    "Whether the last probe of a dependency succeeded",
+    ["dependency"]
+)
+PROBE_SECONDS = registry.histogram(
+    "dependency_probe_seconds",
+    "Health probe latency per dependency",
+    ["dependency"]
+)
+
+# Dependencies the API cannot serve without; others only degrade it
+CRITICAL = ("database",)
+
+
+@dataclass
+class ProbeResult:
+    up: bool
+    latency_ms: float
+    checked_at: datetime
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "status": "up" if self.up else "down",
+            "latency_ms": round(self.latency_ms, 1),
+            "checked_at": self.checked_at.isoformat(),
+            "error": self.error
+        }
+
+
+async def probe_database():
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+
+
+async def probe_stacks():
+    response = await http_clients.get("stacks").get(f"{settings.STACKS_API_URL}/v2/info")
+    response.raise_for_status()
+
+
+async def probe_ipfs():
+    response = await http_clients.get("ipfs_api").post(f"{settings.IPFS_API_URL}/api/v0/version")
+    response.raise_for_status()
+
+
+class HealthMonitor:
+    """Runs registered probes periodically and caches their results"""
+
+    def __init__(self):
+        self.probes: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self.results: Dict[str, ProbeResult] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def register(self, name: str, probe: Callable[[], Awaitable[None]]):
+        self.probes[name] = probe
+
+    async def _probe(self, name: str, probe: Callable[[], Awaitable[None]]):
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(probe(), timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            error = f"timed out after {settings.HEALTH_PROBE_TIMEOUT_SECONDS}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+
+        previous = self.results.get(name)
+        if error and (previous is None or previous.up):
+            logger.warning(f"Health probe {name} failed: {error}")
+        elif not error and previous is not None and not previous.up:
+            logger.info(f"Health probe {name} recovered")
+
+        self.results[name] = ProbeResult(error is None, elapsed * 1000, datetime.utcnow(), error)
+        DEPENDENCY_UP.set(1 if error is None else 0, dependency=name)
+        PROBE_SECONDS.observe(elapsed, dependency=name)
+
+    async def probe_all(self):
+        await asyncio.gather(*(self._probe(name, probe) for name, probe in self.probes.items()))
+
+    async def report(self) -> Dict[str, object]:
+        """Cached probe results and breaker states; probes once if nothing is cached yet"""
+        if not self.results:
+            await self.probe_all()
+
+        checks = {name: result.to_dict() for name, result in self.results.items()}
+        breaker_states = breakers.snapshot()
+        if any(not self.results[name].up for name in CRITICAL if name in self.results):
+            status = "unhealthy"
+        elif any(not result.up for result in self.results.values()) or any(
+            breaker["state"] != "closed" for breaker in breaker_states.values()
+        ):
+            status = "degraded"
+        else:
+            status = "healthy"
+
+        return {
+            "status": status,
+            "timestamp": datetime.utcnow().isoformat(),
+            "services": {
+                name: "connected" if result.up else "disconnected"
+                for name, result in self.results.items()
+            },
+            "checks": checks,
+            "breakers": breaker_states
+        }
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Health probing failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=settings.HEALTH_PROBE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+
+health_monitor = HealthMonitor()
+health_monitor.register("database", probe_database)
+health_monitor.register("blockchain", probe_stacks)
+health_monitor.register("ipfs", probe_ipfs)
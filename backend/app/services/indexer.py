@@ -0,0 +1,485 @@
+"""
+Chain Indexer
+Mirrors marketplace activity on Stacks into the transactions and
+dataset_access tables
+
+The contracts do not print events, so the indexer follows successful
+contract-call transactions instead:
+
+    marketplace.purchase-dataset (dataset-id)       purchase
+    marketplace.bulk-purchase (list dataset-id)     one purchase per id
+    dataset-registry.grant-access (dataset-id, buyer)   free access grant
+
+A purchase pays the seller and then the platform wallet with two STX
+transfers from the buyer, so the amount paid and the platform fee are read
+from the transaction's stx_asset events. The dataset's current price is
+used only when the API response does not carry those events.
+
+Blocks are read from a persisted cursor (indexer_state) in batches of
+INDEXER_BATCH_BLOCKS, and each batch is applied in one transaction together
+with the cursor move, so a crash never applies a block twice or skips one.
+The hashes of the last INDEXER_REORG_DEPTH blocks are kept in
+indexed_blocks; when a new block's parent does not match, the indexer walks
+back to the common ancestor, deletes the rows indexed above it (reversing
+their counters) and re-indexes the canonical chain from there.
+
+Access checks read the indexed rows and fall back to the contract's
+has-access read only when no row exists: for purchases made before
+INDEXER_START_HEIGHT or in blocks the indexer has not reached yet.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.http_clients import http_clients
+from app.core.metrics import registry
+from app.models.chain_index import IndexedBlock, IndexerState
+from app.models.dataset import Dataset, DatasetAccess
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.user import User
+from app.services.blockchain import stacks_breaker
+from app.services.clarity import decode_many
+from app.services.contract_cache import contract_call_cache
+from app.services.counters import record_counters, record_purchase
+
+logger = logging.getLogger(__name__)
+
+INDEXER_NAME = "marketplace"
+PAGE_SIZE = 50  # Largest page the Stacks API returns for block transactions
+EVENT_LIMIT = 96  # Events per transaction fetched for purchases (a bulk purchase has two per dataset)
+MICROSTX_PER_STX = 1_000_000
+
+INDEXER_HEIGHT = registry.gauge(
+    "indexer_block_height",
+    "Last block applied by the chain indexer"
+)
+INDEXER_LAG = registry.gauge(
+    "indexer_lag_blocks",
+    "Blocks between the chain tip and the indexer cursor"
+)
+INDEXER_EVENTS = registry.counter(
+    "indexer_events_total",
+    "Contract calls seen by the indexer by outcome (indexed, duplicate, unknown_dataset, unknown_user)",
+    ["kind", "outcome"]
+)
+INDEXER_REORGS = registry.counter(
+    "indexer_reorgs_total",
+    "Chain reorganisations rolled back by the indexer"
+)
+INDEXER_BATCH_SECONDS = registry.histogram(
+    "indexer_batch_seconds",
+    "Time to fetch and apply one batch of blocks"
+)
+
+
+@dataclass
+class ChainBlock:
+    height: int
+    block_hash: str
+    parent_hash: str
+    transactions: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class AccessEvent:
+    """One dataset access granted on chain"""
+
+    kind: str  # "purchase" or "grant"
+    transaction_hash: str  # Unique per event: bulk purchases add #<index>
+    chain_tx_id: str
+    block_height: int
+    block_hash: str
+    chain_dataset_id: int
+    wallet_address: str
+    fee: float
+    amount: Optional[float] = None  # STX paid, when read from the transfer events
+    platform_fee: Optional[float] = None
+
+
+def stx_transfers(tx: Dict[str, Any]) -> Optional[List[int]]:
+    """Micro-STX amounts the sender transferred, in event order
+
+    None when the response does not include the transaction's full event list.
+    """
+    events = tx.get("events")
+    if not events or tx.get("event_count", len(events)) > len(events):
+        return None
+    return [
+        int(event["asset"]["amount"])
+        for event in sorted(events, key=lambda event: event.get("event_index", 0))
+        if event.get("event_type") == "stx_asset"
+        and event["asset"].get("asset_event_type") == "transfer"
+        and event["asset"].get("sender") == tx["sender_address"]
+    ]
+
+
+def purchase_payments(tx: Dict[str, Any], purchases: int) -> List[Tuple[Optional[float], Optional[float]]]:
+    """(amount, platform fee) in STX for each purchase in a call, or (None, None) if unknown"""
+    transfers = stx_transfers(tx)
+    # purchase-dataset pays the seller's share, then the platform fee
+    if transfers is None or len(transfers) != 2 * purchases:
+        return [(None, None)] * purchases
+    return [
+        ((seller + platform) / MICROSTX_PER_STX, platform / MICROSTX_PER_STX)
+        for seller, platform in zip(transfers[0::2], transfers[1::2])
+    ]
+
+
+def extract_events(block: ChainBlock, contract_address: str) -> List[AccessEvent]:
+    """Access events in a block's successful calls to our contracts"""
+    marketplace = f"{contract_address}.marketplace"
+    registry_contract = f"{contract_address}.dataset-registry"
+    tracked = {
+        (marketplace, "purchase-dataset"),
+        (marketplace, "bulk-purchase"),
+        (registry_contract, "grant-access")
+    }
+    events = []
+
+    for tx in block.transactions:
+        if tx.get("tx_type") != "contract_call" or tx.get("tx_status") != "success":
+            continue
+        call = tx["contract_call"]
+        contract_id, function_name = call["contract_id"], call["function_name"]
+        # Only our calls are decoded; most calls in a block belong to other contracts
+        if (contract_id, function_name) not in tracked:
+            continue
+        args = decode_many(arg["hex"] for arg in call.get("function_args", []))
+        fee = int(tx.get("fee_rate", 0)) / MICROSTX_PER_STX
+
+        def event(
+            kind: str,
+            transaction_hash: str,
+            dataset_id: int,
+            wallet_address: str,
+            payment: Tuple[Optional[float], Optional[float]] = (None, None)
+        ) -> AccessEvent:
+            return AccessEvent(
+                kind, transaction_hash, tx["tx_id"], block.height, block.block_hash,
+                dataset_id, wallet_address, fee, *payment
+            )
+
+        if contract_id == marketplace and function_name == "purchase-dataset":
+            payment, = purchase_payments(tx, 1)
+            events.append(event("purchase", tx["tx_id"], args[0], tx["sender_address"], payment))
+        elif contract_id == marketplace and function_name == "bulk-purchase":
+            payments = purchase_payments(tx, len(args[0]))
+            for index, dataset_id in enumerate(args[0]):
+                events.append(event(
+                    "purchase", f"{tx['tx_id']}#{index}", dataset_id, tx["sender_address"], payments[index]
+                ))
+        elif contract_id == registry_contract and function_name == "grant-access":
+            events.append(event("grant", tx["tx_id"], args[0], args[1]))
+    return events
+
+
+def load_cursor(db: Session) -> Optional[Tuple[int, Optional[str]]]:
+    state = db.get(IndexerState, INDEXER_NAME)
+    return (state.block_height, state.block_hash) if state is not None else None
+
+
+def apply_blocks(
+    db: Session,
+    expected_height: Optional[int],
+    blocks: List[ChainBlock],
+    events: List[AccessEvent]
+) -> bool:
+    """Apply a batch of blocks and move the cursor in one transaction
+
+    Returns False without writing when another worker moved the cursor
+    since it was read.
+    """
+    last = blocks[-1]
+    if expected_height is None:
+        db.add(IndexerState(name=INDEXER_NAME, block_height=last.height, block_hash=last.block_hash))
+        db.flush()
+    else:
+        moved = db.execute(
+            update(IndexerState)
+            .where(IndexerState.name == INDEXER_NAME, IndexerState.block_height == expected_height)
+            .values(block_height=last.height, block_hash=last.block_hash),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        if not moved:
+            db.rollback()
+            return False
+
+    datasets = {
+        dataset.blockchain_id: dataset
+        for dataset in db.scalars(select(Dataset).where(
+            Dataset.blockchain_id.in_({event.chain_dataset_id for event in events})
+        ))
+    } if events else {}
+    users = dict(db.execute(select(User.wallet_address, User.id).where(
+        User.wallet_address.in_({event.wallet_address for event in events})
+    )).all()) if events else {}
+    seen = set(db.scalars(select(Transaction.transaction_hash).where(
+        Transaction.transaction_hash.in_([event.transaction_hash for event in events])
+    ))) if events else set()
+    granted = set(db.scalars(select(DatasetAccess.transaction_hash).where(
+        DatasetAccess.transaction_hash.in_([event.chain_tx_id for event in events])
+    ))) if events else set()
+
+    for event in events:
+        dataset = datasets.get(event.chain_dataset_id)
+        user_id = users.get(event.wallet_address)
+        if dataset is None:
+            INDEXER_EVENTS.inc(kind=event.kind, outcome="unknown_dataset")
+            continue
+        if user_id is None:
+            INDEXER_EVENTS.inc(kind=event.kind, outcome="unknown_user")
+            continue
+        if event.transaction_hash in seen or (event.kind == "grant" and event.chain_tx_id in granted):
+            INDEXER_EVENTS.inc(kind=event.kind, outcome="duplicate")
+            continue
+
+        price = 0.0
+        platform_fee = 0.0
+        if event.kind == "purchase":
+            price = event.amount if event.amount is not None else dataset.price
+            platform_fee = event.platform_fee
+            if platform_fee is None:
+                platform_fee = round(price * settings.PLATFORM_FEE_PERCENTAGE / 100, 6)
+        db.add(DatasetAccess(
+            dataset_id=dataset.id,
+            user_id=user_id,
+            transaction_hash=event.chain_tx_id,
+            block_height=event.block_height,
+            price_paid=price
+        ))
+        if event.kind == "purchase":
+            db.add(Transaction(
+                transaction_hash=event.transaction_hash,
+                block_height=event.block_height,
+                transaction_type=TransactionType.DATASET_PURCHASE,
+                status=TransactionStatus.CONFIRMED,
+                amount=price,
+                fee=event.fee,
+                platform_fee=platform_fee,
+                user_id=user_id,
+                dataset_id=dataset.id,
+                tx_metadata=json.dumps({
+                    "tx_id": event.chain_tx_id,
+                    "block_hash": event.block_hash,
+                    "chain_dataset_id": event.chain_dataset_id
+                })
+            ))
+            record_purchase(db, dataset, user_id, price)
+        INDEXER_EVENTS.inc(kind=event.kind, outcome="indexed")
+
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(IndexedBlock).values([
+        {"height": block.height, "block_hash": block.block_hash, "parent_hash": block.parent_hash}
+        for block in blocks
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[IndexedBlock.height],
+        set_={"block_hash": statement.excluded.block_hash, "parent_hash": statement.excluded.parent_hash}
+    ))
+    db.execute(delete(IndexedBlock).where(IndexedBlock.height <= last.height - settings.INDEXER_REORG_DEPTH))
+    db.commit()
+    return True
+
+
+def recent_hashes(db: Session, below: int) -> List[Tuple[int, str]]:
+    """Stored (height, hash) pairs at or below a height, newest first"""
+    return db.execute(
+        select(IndexedBlock.height, IndexedBlock.block_hash)
+        .where(IndexedBlock.height <= below)
+        .order_by(IndexedBlock.height.desc())
+    ).all()
+
+
+def roll_back(db: Session, fork_height: int, fork_hash: Optional[str]) -> int:
+    """Delete everything indexed above fork_height and reverse its counters"""
+    purchases = db.execute(
+        select(Transaction.user_id, Transaction.amount, Dataset.id, Dataset.owner_id)
+        .join(Dataset, Dataset.id == Transaction.dataset_id)
+        .where(
+            Transaction.block_height > fork_height,
+            Transaction.transaction_type == TransactionType.DATASET_PURCHASE
+        )
+    ).all()
+    for buyer_id, amount, dataset_id, owner_id in purchases:
+        record_counters(db, Dataset, dataset_id, total_sales=-1, total_revenue=-amount)
+        record_counters(db, User, owner_id, total_earnings=-amount)
+        record_counters(db, User, buyer_id, total_purchases=-1)
+
+    removed = db.execute(
+        delete(DatasetAccess).where(DatasetAccess.block_height > fork_height),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    db.execute(
+        delete(Transaction).where(Transaction.block_height > fork_height),
+        execution_options={"synchronize_session": False}
+    )
+    db.execute(delete(IndexedBlock).where(IndexedBlock.height > fork_height))
+    db.execute(
+        update(IndexerState)
+        .where(IndexerState.name == INDEXER_NAME)
+        .values(block_height=fork_height, block_hash=fork_hash)
+    )
+    db.commit()
+    return removed
+
+
+class ChainIndexer:
+    """Background worker that follows the chain from the persisted cursor"""
+
+    def __init__(self):
+        self.api_url = settings.STACKS_API_URL
+        self.contract_address = settings.CONTRACT_ADDRESS
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def _get(self, path: str, **params) -> Dict[str, Any]:
+        with stacks_breaker.guard():
+            response = await http_clients.get("stacks").get(f"{self.api_url}{path}", params=params)
+            if response.status_code >= 500:
+                response.raise_for_status()
+        response.raise_for_status()
+        return response.json()
+
+    async def tip_height(self) -> int:
+        height = int((await self._get("/v2/info"))["stacks_tip_height"])
+        # The contract call cache is scoped to the tip; share what we read
+        contract_call_cache.observe_tip(height)
+        return height
+
+    async def fetch_header(self, height: int) -> ChainBlock:
+        block = await self._get(f"/extended/v1/block/by_height/{height}")
+        return ChainBlock(height, block["hash"], block["parent_block_hash"])
+
+    async def fetch_block(self, height: int) -> ChainBlock:
+        block = await self.fetch_header(height)
+        offset = 0
+        while True:
+            page = await self._get(f"/extended/v1/tx/block_height/{height}", limit=PAGE_SIZE, offset=offset)
+            block.transactions.extend(page["results"])
+            offset += len(page["results"])
+            if not page["results"] or offset >= page.get("total", 0):
+                break
+
+        # Purchase amounts come from the STX transfer events; fetch them where the page left them out
+        marketplace = f"{self.contract_address}.marketplace"
+        for tx in block.transactions:
+            if (
+                tx.get("tx_type") == "contract_call"
+                and tx.get("tx_status") == "success"
+                and tx["contract_call"]["contract_id"] == marketplace
+                and stx_transfers(tx) is None
+            ):
+                detail = await self._get(f"/extended/v1/tx/{tx['tx_id']}", event_limit=EVENT_LIMIT)
+                tx["events"] = detail.get("events", [])
+                tx["event_count"] = detail.get("event_count", len(tx["events"]))
+        return block
+
+    async def _fetch_range(self, start: int, end: int) -> List[ChainBlock]:
+        semaphore = asyncio.Semaphore(settings.INDEXER_FETCH_CONCURRENCY)
+
+        async def fetch(height: int) -> ChainBlock:
+            async with semaphore:
+                return await self.fetch_block(height)
+
+        return list(await asyncio.gather(*(fetch(height) for height in range(start, end + 1))))
+
+    async def _find_fork(self, db, cursor_height: int) -> Tuple[int, Optional[str]]:
+        """Highest stored block that is still canonical"""
+        for height, stored_hash in await db.run_sync(recent_hashes, cursor_height):
+            if (await self.fetch_header(height)).block_hash == stored_hash:
+                return height, stored_hash
+        # Deeper than the retained window: restart just below it
+        oldest = max(cursor_height - settings.INDEXER_REORG_DEPTH, 0)
+        logger.error(f"Reorg deeper than {settings.INDEXER_REORG_DEPTH} blocks; re-indexing from {oldest}")
+        return oldest, None
+
+    async def step(self) -> int:
+        """Index one batch; returns the number of blocks applied"""
+        start_time = time.perf_counter()
+        tip = await self.tip_height()
+
+        async with AsyncSessionLocal() as db:
+            cursor = await db.run_sync(load_cursor)
+            if cursor is None:
+                # Without a configured start, follow the chain from the current tip
+                start = settings.INDEXER_START_HEIGHT or tip
+                cursor_height, cursor_hash = None, None
+            else:
+                cursor_height, cursor_hash = cursor
+                start = cursor_height + 1
+
+            INDEXER_LAG.set(max(tip - (cursor_height or start - 1), 0))
+            end = min(start + settings.INDEXER_BATCH_BLOCKS - 1, tip)
+            if end < start:
+                return 0
+
+            blocks = await self._fetch_range(start, end)
+
+            # Keep the prefix that chains onto the cursor; a break in the
+            # middle means the chain moved while fetching, so retry it next step
+            parent = cursor_hash
+            linked = []
+            for block in blocks:
+                if parent is not None and block.parent_hash != parent:
+                    break
+                linked.append(block)
+                parent = block.block_hash
+
+            if not linked:
+                fork_height, fork_hash = await self._find_fork(db, cursor_height)
+                removed = await db.run_sync(roll_back, fork_height, fork_hash)
+                INDEXER_REORGS.inc()
+                logger.warning(
+                    f"Chain reorg below block {start}: rolled back to {fork_height}, "
+                    f"removed {removed} access rows"
+                )
+                return 0
+
+            events = []
+            for block in linked:
+                events.extend(extract_events(block, self.contract_address))
+            applied = await db.run_sync(apply_blocks, cursor_height, linked, events)
+
+        INDEXER_BATCH_SECONDS.observe(time.perf_counter() - start_time)
+        if not applied:
+            return 0
+        INDEXER_HEIGHT.set(linked[-1].height)
+        INDEXER_LAG.set(max(tip - linked[-1].height, 0))
+        return len(linked)
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                # Catch up in consecutive batches, then wait for new blocks
+                while await self.step() and not self._stopping.is_set():
+                    pass
+            except Exception as e:
+                logger.error(f"Chain indexing failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=settings.INDEXER_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+
+chain_indexer = ChainIndexer()
@@ -0,0 +1,329 @@
+"""
+Bulk Listing Import Service
+Streams listing corpora through the DataProcessor cleaning stage and loads
+them with the database's bulk path (COPY on PostgreSQL, batched executemany
+elsewhere)
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete
+from sqlalchemy.engine import Connection, Engine
+
+from app.models.listing import Listing
+from app.services.data_processor import DataProcessor
+
+logger = logging.getLogger(__name__)
+
+LISTING_COLUMNS = [
+    "car_name", "brand", "year", "color", "condition", "mileage",
+    "price", "region", "source", "dataset_id", "created_at", "updated_at"
+]
+
+# Placeholders left behind by astype(str) on missing values
+MISSING_TEXT = {"", "nan", "none", "<na>", "null"}
+
+# "Toyota Camry 2008 Black" -> name, year, colour
+CAR_NAME_PATTERN = r"^(?P<name>.*?)\s+(?P<year>(?:19|20)\d{2})(?:\s+(?P<color>.+))?$"
+
+
+def normalize_text(values: pd.Series) -> pd.Series:
+    """Strip whitespace and turn missing-value placeholders into None"""
+    values = values.astype(object).where(values.notna(), None)
+    stripped = values.map(lambda v: None if v is None else str(v).strip())
+    return stripped.where(~stripped.str.lower().isin(MISSING_TEXT), None)
+
+
+def per_value(series: pd.Series, transform: Callable[[pd.Series], Any]):
+    """Apply a string transform once per distinct value of series
+
+    transform receives the distinct values and may return a Series or a
+    DataFrame; the result is expanded back to one row per input row, with
+    missing inputs mapped to missing outputs.
+    """
+    codes, uniques = pd.factorize(series)
+    result = transform(pd.Series(uniques, dtype=object))
+    # Extra all-missing row for the -1 (missing) code
+    result = pd.concat([result, result.iloc[:0].reindex([len(uniques)])])
+    expanded = result.iloc[np.where(codes < 0, len(uniques), codes)]
+    expanded.index = series.index
+    return expanded
+
+
+def iter_json_records(path: str, chunk_size: int, read_size: int = 1 << 16) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of chunk_size records from a JSON array or JSON Lines file
+
+    The file is decoded incrementally, so memory stays proportional to
+    chunk_size rather than the file size.
+    """
+    decoder = json.JSONDecoder()
+    records: List[Dict[str, Any]] = []
+    buffer = ""
+    position = 0
+    started = False
+
+    with open(path, "r", encoding="utf-8") as handle:
+        eof = False
+        while True:
+            # Skip separators between records
+            while position < len(buffer) and buffer[position] in " \t\r\n,]":
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] == "[":
+                    position += 1
+                started = True
+                continue
+
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    if buffer[position:].strip():
+                        raise ValueError(f"Invalid JSON near offset {position} in {path}")
+                    break
+                block = handle.read(read_size)
+                eof = not block
+                buffer = buffer[position:] + block
+                position = 0
+                continue
+
+            position = end
+            if isinstance(record, dict):
+                records.append(record)
+            if len(records) >= chunk_size:
+                yield pd.DataFrame(records)
+                records = []
+
+    if records:
+        yield pd.DataFrame(records)
+
+
+class ListingImporter:
+    """Loads listing files into the listings table in bounded batches"""
+
+    def __init__(self, engine: Engine, chunk_size: int = 50000):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.processor = DataProcessor()
+        self.use_copy = engine.dialect.name == "postgresql"
+        self._compiled_insert = None
+
+    def iter_chunks(self, path: str) -> Iterator[pd.DataFrame]:
+        """Read a source file in chunks of at most chunk_size rows"""
+        file_type = path.rsplit(".", 1)[-1].lower()
+
+        if file_type == "csv":
+            yield from pd.read_csv(path, chunksize=self.chunk_size, dtype=str, keep_default_na=False, na_values=[""])
+        elif file_type in ("json", "jsonl"):
+            yield from iter_json_records(path, self.chunk_size)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+
+    def to_listing_frame(self, df: pd.DataFrame, source: str, dataset_id: Optional[int] = None) -> pd.DataFrame:
+        """Map a cleaned chunk onto the listings columns
+
+        Raw cars45 scrapes carry year and colour inside the car name
+        ("Toyota Camry 2008 Black") and the area inside the region
+        ("Lagos State, Ajah"); those are split out here. Scrapes repeat the
+        same names, regions and colours many times, so string work is done
+        once per distinct value and broadcast back to the rows.
+        """
+        frame = pd.DataFrame(index=df.index)
+
+        def column(name: str) -> pd.Series:
+            if name in df.columns:
+                return df[name]
+            return pd.Series(None, index=df.index, dtype=object)
+
+        name_parts = per_value(column("car_name"), lambda values: normalize_text(values).str.extract(CAR_NAME_PATTERN))
+        car_name = name_parts["name"].fillna(per_value(column("car_name"), normalize_text))
+
+        year = pd.to_numeric(column("year"), errors="coerce")
+        year = year.fillna(pd.to_numeric(name_parts["year"], errors="coerce"))
+
+        frame["car_name"] = car_name
+        frame["brand"] = per_value(column("brand"), normalize_text).fillna(
+            per_value(car_name, lambda values: values.str.split(" ").str[0])
+        )
+        frame["year"] = year.astype("Int64")
+        frame["color"] = per_value(column("color"), normalize_text).fillna(name_parts["color"])
+        frame["condition"] = per_value(column("condition"), normalize_text)
+        frame["mileage"] = pd.to_numeric(column("mileage"), errors="coerce")
+        frame["price"] = pd.to_numeric(column("price"), errors="coerce")
+        frame["region"] = per_value(
+            column("region"),
+            lambda values: normalize_text(values).str.split(",").str[0].str.strip()
+        )
+
+        frame = frame[frame["car_name"].notna()]
+
+        now = datetime.utcnow()
+        frame["source"] = source
+        frame["dataset_id"] = pd.array([dataset_id] * len(frame), dtype="Int64")
+        frame["created_at"] = now
+        frame["updated_at"] = now
+
+        return frame[LISTING_COLUMNS]
+
+    def _copy_rows(self, conn: Connection, frame: pd.DataFrame):
+        """Stream a batch through COPY ... FROM STDIN (PostgreSQL)"""
+        buffer = io.StringIO()
+        frame.to_csv(buffer, header=False, index=False, na_rep="\\N", date_format="%Y-%m-%d %H:%M:%S.%f")
+        buffer.seek(0)
+
+        columns = ", ".join(LISTING_COLUMNS)
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {Listing.__tablename__} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    def _insert_rows(self, conn: Connection, frame: pd.DataFrame):
+        """Batched executemany for backends without COPY
+
+        Rows go straight to the driver's executemany as tuples; building
+        per-row dicts for the ORM-level insert costs more than the write.
+        """
+        compiled = self._insert_statement(conn)
+        timestamp = self._timestamp(conn, frame["created_at"].iloc[0])
+
+        # All rows in a batch share one timestamp; skip converting the column
+        frame = frame.drop(columns=["created_at", "updated_at"])
+        frame = frame.astype(object).where(frame.notna(), None)
+        frame["created_at"] = timestamp
+        frame["updated_at"] = timestamp
+
+        if compiled.positional:
+            rows = list(frame[list(compiled.positiontup)].itertuples(index=False, name=None))
+        else:
+            rows = frame.to_dict(orient="records")
+        conn.exec_driver_sql(str(compiled), rows)
+
+    def _insert_statement(self, conn: Connection):
+        if self._compiled_insert is None:
+            self._compiled_insert = Listing.__table__.insert().compile(
+                dialect=conn.dialect,
+                column_keys=LISTING_COLUMNS
+            )
+        return self._compiled_insert
+
+    @staticmethod
+    def _timestamp(conn: Connection, value: datetime):
+        """Convert a timestamp the way the DateTime column type would"""
+        column_type = Listing.__table__.c.created_at.type
+        processor = column_type.dialect_impl(conn.dialect).bind_processor(conn.dialect)
+        value = pd.Timestamp(value).to_pydatetime()
+        return processor(value) if processor else value
+
+    def write_batch(self, frame: pd.DataFrame, conn: Optional[Connection] = None) -> int:
+        """Write one batch, in its own transaction unless a connection is given"""
+        if frame.empty:
+            return 0
+
+        if conn is None:
+            with self.engine.begin() as conn:
+                return self.write_batch(frame, conn)
+
+        if self.use_copy:
+            self._copy_rows(conn, frame)
+        else:
+            self._insert_rows(conn, frame)
+
+        return len(frame)
+
+    @staticmethod
+    def delete_source(conn: Connection, source: str) -> int:
+        """Remove rows loaded earlier from the same source"""
+        result = conn.execute(delete(Listing.__table__).where(Listing.source == source))
+        return result.rowcount or 0
+
+    async def import_file(
+        self,
+        path: str,
+        source: Optional[str] = None,
+        dataset_id: Optional[int] = None,
+        replace: bool = False
+    ) -> Dict[str, Any]:
+        """Import one file (see import_files)"""
+        return (await self.import_files([path], source, dataset_id, replace))[0]
+
+    async def import_files(
+        self,
+        paths: List[str],
+        source: Optional[str] = None,
+        dataset_id: Optional[int] = None,
+        replace: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Import files in order; each file's source defaults to its name
+
+        Without replace, every batch commits on its own. With replace, the
+        earlier rows of each source are deleted once, and the deletes and
+        all loads commit in one transaction, so readers never see a source
+        empty or half reloaded.
+        """
+        if not replace:
+            return [await self._load_file(path, source, dataset_id) for path in paths]
+
+        conn = await asyncio.to_thread(self.engine.connect)
+        try:
+            transaction = conn.begin()
+            for name in dict.fromkeys(source or os.path.basename(path) for path in paths):
+                removed = await asyncio.to_thread(self.delete_source, conn, name)
+                logger.info(f"Removing {removed} existing listings from {name}")
+            results = [await self._load_file(path, source, dataset_id, conn) for path in paths]
+            await asyncio.to_thread(transaction.commit)
+            return results
+        finally:
+            await asyncio.to_thread(conn.close)
+
+    async def _load_file(
+        self,
+        path: str,
+        source: Optional[str],
+        dataset_id: Optional[int],
+        conn: Optional[Connection] = None
+    ) -> Dict[str, Any]:
+        """Load one file; cleaning of the next chunk overlaps the current write"""
+        source = source or os.path.basename(path)
+        start = time.perf_counter()
+
+        rows_read = 0
+        rows_written = 0
+        pending: Optional[asyncio.Task] = None
+
+        for chunk in self.iter_chunks(path):
+            rows_read += len(chunk)
+            cleaned = await self.processor.clean_data(chunk)
+            frame = self.to_listing_frame(cleaned, source, dataset_id)
+
+            if pending is not None:
+                rows_written += await pending
+            pending = asyncio.create_task(asyncio.to_thread(self.write_batch, frame, conn))
+
+        if pending is not None:
+            rows_written += await pending
+
+        elapsed = time.perf_counter() - start
+        rate = rows_written / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Imported {rows_written}/{rows_read} listings from {path} in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+        return {
+            "path": path,
+            "source": source,
+            "rows_read": rows_read,
+            "rows_written": rows_written,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rate, 1)
+        }
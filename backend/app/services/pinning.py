@@ -0,0 +1,305 @@
+"""
+Pin Manager
+Durable, batched pinning of dataset content on the IPFS node
+
+Uploads add content without pinning and queue a PinJob in the same
+transaction as the dataset row, so the request does not wait on the pin
+and the intent survives restarts. A background loop claims due jobs under
+a lease (so several workers can share the queue), pins or unpins them in
+batches through the node's HTTP API and retries failures with exponential
+backoff. A periodic reconciliation compares the datasets table against
+the node's recursive pin set and queues whatever is missing or no longer
+referenced by an active dataset.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from app.core.circuit_breaker import OPEN
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.http_clients import http_clients
+from app.core.metrics import registry
+from app.models.dataset import Dataset
+from app.models.pin_job import PinJob
+from app.services.storage import ipfs_breaker
+
+logger = logging.getLogger(__name__)
+
+PIN = "pin"
+UNPIN = "unpin"
+PIN_ENDPOINTS = {PIN: "/api/v0/pin/add", UNPIN: "/api/v0/pin/rm"}
+
+PIN_OPERATIONS = registry.counter(
+    "pin_operations_total",
+    "Pin and unpin operations by outcome",
+    ["action", "outcome"]
+)
+PIN_BATCH_SECONDS = registry.histogram(
+    "pin_batch_seconds",
+    "Time for one batched pin/unpin request to the node",
+    ["action"]
+)
+PIN_JOBS_PENDING = registry.gauge(
+    "pin_jobs_pending",
+    "Queued pin and unpin jobs"
+)
+PIN_RECONCILE_QUEUED = registry.counter(
+    "pin_reconcile_queued_total",
+    "Jobs queued by reconciliation because the pin set disagreed with the datasets table",
+    ["action"]
+)
+
+
+def _upsert_statement(dialect_name: str, hashes: List[str], action: str):
+    """INSERT ... ON CONFLICT (ipfs_hash) DO UPDATE: the latest intent replaces a queued one"""
+    now = datetime.utcnow()
+    rows = [
+        {"ipfs_hash": ipfs_hash, "action": action, "attempts": 0, "next_attempt_at": now, "created_at": now}
+        for ipfs_hash in hashes
+    ]
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    statement = dialect.insert(PinJob).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[PinJob.ipfs_hash],
+        set_={
+            "action": statement.excluded.action,
+            "attempts": 0,
+            "next_attempt_at": statement.excluded.next_attempt_at,
+            "last_error": None
+        }
+    )
+
+
+async def queue_pins(db: AsyncSession, hashes: Iterable[str], action: str = PIN):
+    """Queue pin (or unpin) jobs; committed with the caller's transaction"""
+    hashes = list(dict.fromkeys(hash_ for hash_ in hashes if hash_))
+    if hashes:
+        await db.execute(_upsert_statement(db.get_bind().dialect.name, hashes, action))
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, capped at PIN_RETRY_MAX_SECONDS"""
+    delay = settings.PIN_RETRY_BASE_SECONDS * (2 ** min(max(attempts - 1, 0), 30))
+    return min(delay * random.uniform(0.8, 1.2), settings.PIN_RETRY_MAX_SECONDS)
+
+
+def claim_pin_jobs(db: Session, batch_size: int) -> List[Tuple[int, str, str, int, datetime]]:
+    """Lease up to batch_size due jobs; returns (id, hash, action, attempts, leased_until)"""
+    now = datetime.utcnow()
+    leased_until = now + timedelta(seconds=settings.PIN_LEASE_SECONDS)
+
+    due = (
+        select(PinJob.id)
+        .where(PinJob.next_attempt_at <= now)
+        .order_by(PinJob.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = db.execute(
+        update(PinJob)
+        .where(PinJob.id.in_(due.scalar_subquery()))
+        .values(next_attempt_at=leased_until)
+        .returning(PinJob.id, PinJob.ipfs_hash, PinJob.action, PinJob.attempts),
+        execution_options={"synchronize_session": False}
+    ).all()
+    db.commit()
+    return [(job_id, ipfs_hash, action, attempts, leased_until) for job_id, ipfs_hash, action, attempts in claimed]
+
+
+def settle_pin_jobs(
+    db: Session,
+    jobs: List[Tuple[int, str, str, int, datetime]],
+    errors: Dict[str, Optional[str]]
+):
+    """Delete jobs that succeeded and reschedule the rest
+
+    Only rows still holding our lease are touched; a job re-queued while
+    it was in flight keeps the newer intent.
+    """
+    now = datetime.utcnow()
+    for job_id, ipfs_hash, action, attempts, leased_until in jobs:
+        still_ours = (PinJob.id == job_id, PinJob.next_attempt_at == leased_until)
+        error = errors.get(ipfs_hash)
+        if error is None:
+            db.execute(delete(PinJob).where(*still_ours), execution_options={"synchronize_session": False})
+        else:
+            db.execute(
+                update(PinJob).where(*still_ours).values(
+                    attempts=attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=retry_delay(attempts + 1)),
+                    last_error=error[:2000]
+                ),
+                execution_options={"synchronize_session": False}
+            )
+    db.commit()
+
+
+def plan_reconciliation(db: Session, pinned: Set[str]) -> Dict[str, List[str]]:
+    """Hashes to pin (active, not pinned) and unpin (pinned, only on inactive datasets)
+
+    Hashes that already have a queued job are left to it, so a failing pin
+    keeps its backoff instead of being reset every reconciliation.
+    """
+    queued = set(db.scalars(select(PinJob.ipfs_hash)))
+
+    to_pin = []
+    active = select(Dataset.ipfs_hash).where(Dataset.is_active == True).distinct()
+    for ipfs_hash in db.scalars(active.execution_options(yield_per=5000)):
+        if ipfs_hash not in pinned and ipfs_hash not in queued:
+            to_pin.append(ipfs_hash)
+
+    to_unpin = []
+    other = aliased(Dataset)
+    retired = select(Dataset.ipfs_hash).where(
+        Dataset.is_active == False,
+        ~exists().where(other.ipfs_hash == Dataset.ipfs_hash, other.is_active == True)
+    ).distinct()
+    for ipfs_hash in db.scalars(retired.execution_options(yield_per=5000)):
+        if ipfs_hash in pinned and ipfs_hash not in queued:
+            to_unpin.append(ipfs_hash)
+
+    return {PIN: to_pin, UNPIN: to_unpin}
+
+
+class PinManager:
+    """Background worker that drains the pin queue and reconciles pins"""
+
+    def __init__(self):
+        self.api_url = settings.IPFS_API_URL
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._last_reconcile = 0.0
+
+    async def _request(self, action: str, hashes: List[str]) -> Optional[str]:
+        """One batched call; returns an error message or None on success"""
+        start = time.perf_counter()
+        try:
+            with ipfs_breaker.guard():
+                response = await http_clients.get("ipfs_api").post(
+                    f"{self.api_url}{PIN_ENDPOINTS[action]}",
+                    params=[("arg", ipfs_hash) for ipfs_hash in hashes],
+                    timeout=settings.PIN_TIMEOUT_SECONDS
+                )
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+        finally:
+            PIN_BATCH_SECONDS.observe(time.perf_counter() - start, action=action)
+
+        if response.status_code == 200:
+            return None
+        # Unpinning something that is not pinned has already reached the goal
+        if action == UNPIN and "not pinned" in response.text:
+            return None
+        return f"HTTP {response.status_code}: {response.text[:500]}"
+
+    async def apply(self, action: str, hashes: List[str]) -> Dict[str, Optional[str]]:
+        """Pin or unpin hashes in one request, isolating failures when it fails"""
+        error = await self._request(action, hashes)
+        if error is None:
+            PIN_OPERATIONS.inc(len(hashes), action=action, outcome="ok")
+            return {ipfs_hash: None for ipfs_hash in hashes}
+        if len(hashes) == 1:
+            PIN_OPERATIONS.inc(action=action, outcome="error")
+            logger.warning(f"Failed to {action} {hashes[0]}: {error}")
+            return {hashes[0]: error}
+
+        # The node rejects the whole batch for one bad hash; retry singly
+        results: Dict[str, Optional[str]] = {}
+        for ipfs_hash in hashes:
+            results.update(await self.apply(action, [ipfs_hash]))
+        return results
+
+    async def process_due(self) -> int:
+        """Run one batch of due jobs; returns how many were claimed"""
+        # Leave jobs queued, without spending attempts, while the node is down
+        if ipfs_breaker.state == OPEN:
+            return 0
+        async with AsyncSessionLocal() as db:
+            jobs = await db.run_sync(claim_pin_jobs, settings.PIN_BATCH_SIZE)
+            if not jobs:
+                return 0
+
+            errors: Dict[str, Optional[str]] = {}
+            for action in (PIN, UNPIN):
+                hashes = [ipfs_hash for _, ipfs_hash, job_action, _, _ in jobs if job_action == action]
+                if hashes:
+                    errors.update(await self.apply(action, hashes))
+
+            await db.run_sync(settle_pin_jobs, jobs, errors)
+            return len(jobs)
+
+    async def pinned_set(self) -> Set[str]:
+        """Recursive pins currently held by the node"""
+        with ipfs_breaker.guard():
+            response = await http_clients.get("ipfs_api").post(
+                f"{self.api_url}/api/v0/pin/ls",
+                params={"type": "recursive", "quiet": "true"},
+                timeout=settings.PIN_TIMEOUT_SECONDS
+            )
+        response.raise_for_status()
+        return set(response.json().get("Keys", {}))
+
+    async def reconcile(self) -> Dict[str, int]:
+        """Queue jobs for every disagreement between datasets and the pin set"""
+        pinned = await self.pinned_set()
+        async with AsyncSessionLocal() as db:
+            plan = await db.run_sync(plan_reconciliation, pinned)
+            for action, hashes in plan.items():
+                for start in range(0, len(hashes), 500):
+                    await queue_pins(db, hashes[start:start + 500], action)
+                PIN_RECONCILE_QUEUED.inc(len(hashes), action=action)
+            await db.commit()
+
+        summary = {action: len(hashes) for action, hashes in plan.items()}
+        if any(summary.values()):
+            logger.warning(f"Pin reconciliation queued {summary[PIN]} pins and {summary[UNPIN]} unpins")
+        return summary
+
+    async def _update_pending(self):
+        async with AsyncSessionLocal() as db:
+            PIN_JOBS_PENDING.set(await db.scalar(select(func.count()).select_from(PinJob)))
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                if time.monotonic() - self._last_reconcile >= settings.PIN_RECONCILE_SECONDS:
+                    self._last_reconcile = time.monotonic()
+                    await self.reconcile()
+            except Exception as e:
+                logger.error(f"Pin reconciliation failed: {e}")
+            try:
+                while await self.process_due() >= settings.PIN_BATCH_SIZE and not self._stopping.is_set():
+                    pass
+                await self._update_pending()
+            except Exception as e:
+                logger.error(f"Pin queue processing failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=settings.PIN_SYNC_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the loop; queued jobs stay in the table for the next start"""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+
+# Application-wide manager started in the lifespan
+pin_manager = PinManager()
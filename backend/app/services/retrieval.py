@@ -0,0 +1,208 @@
+"""
+Hedged IPFS Retrieval
+Races IPFS nodes and gateways so a fetch finishes as fast as the quickest
+healthy source
+
+Sources are ranked by the median of their recent successful latencies, so
+an occasional stall does not demote an otherwise fast source. A fetch
+starts on the best source; if it has not answered by that source's 95th
+percentile (clamped to the IPFS_HEDGE_* bounds) the next source is started
+alongside it, and a failure starts the next source immediately. The first
+success wins and the remaining attempts are cancelled.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Generic, List, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.http_clients import http_clients
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+FETCH_SECONDS = registry.histogram(
+    "ipfs_fetch_seconds",
+    "Time for a hedged IPFS fetch to produce its first successful source"
+)
+SOURCE_SECONDS = registry.histogram(
+    "ipfs_source_seconds",
+    "Latency of successful attempts per IPFS source",
+    ["source"]
+)
+SOURCE_ATTEMPTS = registry.counter(
+    "ipfs_source_attempts_total",
+    "Attempts per IPFS source by outcome (win, error, cancelled)",
+    ["source", "outcome"]
+)
+HEDGES = registry.counter(
+    "ipfs_fetch_hedges_total",
+    "Extra sources started because the leading one was slow"
+)
+SOURCE_MEDIAN = registry.gauge(
+    "ipfs_source_median_seconds",
+    "Median of recent successful latencies per IPFS source",
+    ["source"]
+)
+
+# Consecutive failures after which a source drops to the back of the ranking
+FAILURE_THRESHOLD = 3
+FAILURE_COOLDOWN_SECONDS = 30.0
+LATENCY_WINDOW = 128
+
+
+@dataclass
+class RetrievalSource:
+    """One IPFS node (kind "node", /api/v0/cat) or gateway (kind "gateway", /ipfs/)"""
+
+    name: str
+    kind: str
+    url: str
+    client_name: str
+    failures: int = 0
+    failed_at: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def observe(self, seconds: float):
+        self.latencies.append(seconds)
+        self.failures = 0
+        SOURCE_MEDIAN.set(self.quantile(0.5), source=self.name)
+
+    def observe_failure(self):
+        self.failures += 1
+        self.failed_at = time.monotonic()
+
+    def hedge_delay(self) -> float:
+        delay = self.quantile(0.95)
+        if delay is None:
+            return settings.IPFS_HEDGE_DELAY_SECONDS
+        return min(max(delay, settings.IPFS_HEDGE_MIN_DELAY_SECONDS), settings.IPFS_HEDGE_DELAY_SECONDS)
+
+    def benched(self, now: float) -> bool:
+        return self.failures >= FAILURE_THRESHOLD and now - self.failed_at < FAILURE_COOLDOWN_SECONDS
+
+    def score(self) -> float:
+        # Unmeasured sources rank as if they answered at the hedge delay
+        median = self.quantile(0.5)
+        expected = median if median is not None else settings.IPFS_HEDGE_DELAY_SECONDS
+        return expected * (1 + self.failures)
+
+
+class HedgedFetcher(Generic[T]):
+    """Runs one attempt per source, hedging and cancelling as described above"""
+
+    def __init__(self, sources: List[RetrievalSource]):
+        self.sources = sources
+
+    def ranked(self) -> List[RetrievalSource]:
+        now = time.monotonic()
+        return sorted(self.sources, key=lambda source: (source.benched(now), source.score()))
+
+    async def race(
+        self,
+        attempt: Callable[[RetrievalSource], Awaitable[T]],
+        discard: Optional[Callable[[T], Awaitable[None]]] = None
+    ) -> Optional[Tuple[RetrievalSource, T]]:
+        """First successful (source, result), or None when every source failed
+
+        discard releases results of attempts that finished after the
+        winner (for example an open streaming response).
+        """
+        queue = self.ranked()
+        running = {}
+        start = time.perf_counter()
+        winner: Optional[Tuple[RetrievalSource, T]] = None
+
+        def launch():
+            source = queue.pop(0)
+            task = asyncio.create_task(attempt(source))
+            running[task] = (source, time.perf_counter())
+            return source
+
+        try:
+            leader = launch()
+            while running and winner is None:
+                hedge_possible = queue and len(running) < settings.IPFS_HEDGE_MAX_PARALLEL
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=leader.hedge_delay() if hedge_possible else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    HEDGES.inc()
+                    leader = launch()
+                    continue
+
+                for task in done:
+                    source, started = running.pop(task)
+                    elapsed = time.perf_counter() - started
+                    error = task.exception()
+                    if error is None and winner is None:
+                        source.observe(elapsed)
+                        SOURCE_SECONDS.observe(elapsed, source=source.name)
+                        SOURCE_ATTEMPTS.inc(source=source.name, outcome="win")
+                        winner = (source, task.result())
+                    elif error is None:
+                        # Lost a photo finish; release what it opened
+                        if discard is not None:
+                            await discard(task.result())
+                    else:
+                        source.observe_failure()
+                        SOURCE_ATTEMPTS.inc(source=source.name, outcome="error")
+                        logger.warning(f"IPFS source {source.name} failed: {error!r}")
+
+                if winner is None and queue and len(running) < settings.IPFS_HEDGE_MAX_PARALLEL:
+                    launch()
+                # Time the next hedge from the quickest attempt still running
+                in_flight = [source for source, _ in running.values()]
+                if in_flight and not any(source is leader for source in in_flight):
+                    leader = min(in_flight, key=RetrievalSource.score)
+        finally:
+            await self._cancel(running, discard)
+
+        if winner is not None:
+            FETCH_SECONDS.observe(time.perf_counter() - start)
+        return winner
+
+    async def _cancel(self, running, discard):
+        for task in running:
+            task.cancel()
+        for task, (source, started) in running.items():
+            try:
+                result = await task
+            except (asyncio.CancelledError, Exception):
+                SOURCE_ATTEMPTS.inc(source=source.name, outcome="cancelled")
+                continue
+            if discard is not None:
+                await discard(result)
+        running.clear()
+
+
+def build_sources() -> List[RetrievalSource]:
+    """Sources from settings; each gets its own pooled HTTP client"""
+    sources = []
+    for index, url in enumerate(settings.ipfs_node_urls):
+        client_name = "ipfs_api" if index == 0 else f"ipfs_node_{index}"
+        http_clients.register(client_name, url)
+        sources.append(RetrievalSource(f"node_{index}", "node", url, client_name))
+    for index, url in enumerate(settings.ipfs_gateway_urls):
+        client_name = "ipfs_gateway" if index == 0 else f"ipfs_gateway_{index}"
+        http_clients.register(client_name, url)
+        sources.append(RetrievalSource(f"gateway_{index}", "gateway", url, client_name))
+    return sources
+
+
+# Shared so latency estimates accumulate across requests
+ipfs_fetcher: HedgedFetcher = HedgedFetcher(build_sources())
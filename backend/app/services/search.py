@@ -0,0 +1,239 @@
+"""
+Dataset Search Service
+In-process inverted index with BM25 ranking and prefix matching
+"""
+
+import bisect
+import logging
+import math
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Iterable, Tuple
+from sqlalchemy.orm import Session, load_only
+from app.core.config import settings
+from app.models.dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Relative weight of a term occurrence in each indexed field
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "columns": 1.5,
+    "description": 1.0
+}
+
+# Score multiplier for terms matched by prefix rather than exactly
+PREFIX_MATCH_WEIGHT = 0.7
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted index over dataset title, description, tags and column names"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, float]] = {}  # term -> {doc_id: weighted tf}
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_lengths: Dict[int, float] = {}
+        self._total_length = 0.0
+        self._terms: List[str] = []  # Sorted vocabulary for prefix lookups
+        self._lock = threading.RLock()
+        self._watermark: Optional[datetime] = None
+        self._last_sync = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add_document(
+        self,
+        doc_id: int,
+        title: Optional[str],
+        description: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        columns: Optional[Iterable[str]] = None
+    ):
+        """Index (or re-index) a single document"""
+        fields = {
+            "title": tokenize(title),
+            "description": tokenize(description),
+            "tags": [token for tag in (tags or []) for token in tokenize(str(tag))],
+            "columns": [token for column in (columns or []) for token in tokenize(str(column))]
+        }
+
+        term_weights: Dict[str, float] = {}
+        for field, tokens in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokens:
+                term_weights[token] = term_weights.get(token, 0.0) + weight
+
+        with self._lock:
+            self._remove(doc_id)
+
+            for term, weight in term_weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._terms, term)
+                postings[doc_id] = weight
+
+            length = sum(term_weights.values())
+            self._doc_terms[doc_id] = term_weights
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def remove_document(self, doc_id: int):
+        """Drop a document from the index"""
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int):
+        term_weights = self._doc_terms.pop(doc_id, None)
+        if term_weights is None:
+            return
+
+        for term in term_weights:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                index = bisect.bisect_left(self._terms, term)
+                if index < len(self._terms) and self._terms[index] == term:
+                    del self._terms[index]
+
+        self._total_length -= self._doc_lengths.pop(doc_id, 0.0)
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Return vocabulary terms matching a query token, exact match first"""
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+
+        start = bisect.bisect_left(self._terms, token)
+        for term in self._terms[start:start + settings.SEARCH_MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            if term != token:
+                matches.append((term, PREFIX_MATCH_WEIGHT))
+
+        return matches
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Return (doc_id, score) pairs ranked by BM25 relevance
+
+        Every query token must match a document, either exactly or as a
+        prefix of an indexed term.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if doc_count == 0:
+                return []
+            avg_length = self._total_length / doc_count
+
+            scores: Optional[Dict[int, float]] = None
+            for token in tokens:
+                token_scores: Dict[int, float] = {}
+                for term, match_weight in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, tf in postings.items():
+                        norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                        score = match_weight * idf * tf * (self.k1 + 1) / (tf + norm)
+                        if score > token_scores.get(doc_id, 0.0):
+                            token_scores[doc_id] = score
+
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        doc_id: score + token_scores[doc_id]
+                        for doc_id, score in scores.items()
+                        if doc_id in token_scores
+                    }
+
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+    def add_dataset(self, dataset: Dataset):
+        """Index a dataset model, removing it if it is no longer active"""
+        if not dataset.is_active:
+            self.remove_document(dataset.id)
+            return
+
+        metadata = dataset.dataset_metadata or {}
+        columns = [column.get("name") for column in metadata.get("columns", []) if column.get("name")]
+
+        self.add_document(
+            dataset.id,
+            title=dataset.title,
+            description=dataset.description,
+            tags=dataset.tags or [],
+            columns=columns
+        )
+
+    def sync(self, db: Session, force: bool = False) -> int:
+        """Apply dataset rows changed since the last sync
+
+        Other workers insert and update datasets too, so each process pulls
+        changed rows at most every SEARCH_INDEX_REFRESH_SECONDS. The
+        watermark only moves with rows read here (never with local adds),
+        and each pass re-reads SEARCH_INDEX_SYNC_OVERLAP_SECONDS before it:
+        updated_at is the writing transaction's start time, so a row can
+        commit after rows with later timestamps have already been seen.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_sync < settings.SEARCH_INDEX_REFRESH_SECONDS:
+            return 0
+        self._last_sync = now
+
+        query = db.query(Dataset).options(load_only(
+            Dataset.id,
+            Dataset.title,
+            Dataset.description,
+            Dataset.tags,
+            Dataset.dataset_metadata,
+            Dataset.is_active,
+            Dataset.updated_at
+        ))
+        if self._watermark is not None:
+            overlap = timedelta(seconds=settings.SEARCH_INDEX_SYNC_OVERLAP_SECONDS)
+            query = query.filter(Dataset.updated_at >= self._watermark - overlap)
+
+        updated = 0
+        watermark = self._watermark
+        for dataset in query.yield_per(500):
+            self.add_dataset(dataset)
+            updated += 1
+            if dataset.updated_at and (watermark is None or dataset.updated_at > watermark):
+                watermark = dataset.updated_at
+
+        with self._lock:
+            self._watermark = watermark
+
+        if updated:
+            logger.info(f"Search index synced {updated} datasets ({len(self)} indexed)")
+        return updated
+
+
+# Process-wide search index
+search_index = SearchIndex()
@@ -4,17 +4,207 @@ Handles file uploads and retrieval from IPFS network
 """
 
 import asyncio
+import inspect
 import json
 import logging
-import tempfile
-import os
-from typing import Dict, List, Optional, Any, BinaryIO
+import uuid
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Optional, Any, BinaryIO, Tuple, Union
 import httpx
 import ipfshttpclient
+from app.core.circuit_breaker import breakers
 from app.core.config import settings
+from app.core.executors import BoundedExecutor, ExecutorSaturated
+from app.core.http_clients import http_clients
+from app.core.serialization import dumps
+from app.services.compression import IDENTITY, decompress, encode_payload
+from app.services.content_cache import CACHE_BYTES_SERVED, CacheWriter, content_cache
+from app.services.retrieval import RetrievalSource, ipfs_fetcher
 
 logger = logging.getLogger(__name__)
 
+# Blocking ipfshttpclient calls run here rather than on the default executor
+ipfs_executor = BoundedExecutor(
+    "ipfs",
+    settings.IPFS_EXECUTOR_WORKERS,
+    settings.IPFS_EXECUTOR_QUEUE,
+    settings.IPFS_CALL_TIMEOUT_SECONDS
+)
+
+# Opens after repeated failures to reach the IPFS API node; a full local
+# executor queue or an error the node answered with does not count
+ipfs_breaker = breakers.get("ipfs", ignored=(ExecutorSaturated, ipfshttpclient.exceptions.ErrorResponse))
+
+# Per-operation timeouts (seconds); others use IPFS_CALL_TIMEOUT_SECONDS
+IPFS_OPERATION_TIMEOUTS = {
+    "connect": 10.0,
+    "version": 5.0,
+    "object.stat": 15.0,
+    "pin.add": 300.0
+}
+
+
+def api_multiaddr(url: str) -> str:
+    """http://host:port -> /dns/host/tcp/port/http, as ipfshttpclient expects"""
+    if url.startswith("/"):
+        return url
+    scheme, _, rest = url.partition("://")
+    host, _, port = rest.split("/", 1)[0].partition(":")
+    port = port or ("443" if scheme == "https" else "5001")
+    return f"/dns/{host}/tcp/{port}/{'https' if scheme == 'https' else 'http'}"
+
+
+# Anything upload_file can send without buffering it first
+UploadSource = Union[bytes, bytearray, memoryview, BinaryIO, Iterable[bytes], AsyncIterable[bytes]]
+
+
+async def iter_upload_source(source: UploadSource, chunk_size: int) -> AsyncIterator[bytes]:
+    """Yield an upload source as chunks of at most chunk_size bytes
+    
+    Accepts in-memory bytes, sync or async file objects (including
+    FastAPI's UploadFile) and sync or async iterators of bytes.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+        return
+    
+    read = getattr(source, "read", None)
+    if read is not None:
+        blocking = not inspect.iscoroutinefunction(read)
+        while True:
+            if blocking:
+                chunk = await asyncio.to_thread(read, chunk_size)
+            else:
+                chunk = await read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    
+    if hasattr(source, "__aiter__"):
+        async for chunk in source:
+            if chunk:
+                yield bytes(chunk)
+        return
+    
+    for chunk in source:
+        if chunk:
+            yield bytes(chunk)
+
+
+async def multipart_body(
+    source: UploadSource,
+    filename: str,
+    boundary: str,
+    chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Single-file multipart/form-data body, produced chunk by chunk"""
+    safe_name = filename.replace('"', "").replace("\r", "").replace("\n", "")
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{safe_name}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode("utf-8")
+    async for chunk in iter_upload_source(source, chunk_size):
+        yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode("ascii")
+
+
+class StorageStream:
+    """Byte stream opened against the storage backend
+
+    Reads at most chunk_size bytes at a time, so memory per download stays
+    constant regardless of file size. skip/limit trim the upstream body when
+    the backend could not apply the requested range itself. When a cache
+    writer is given, the body is copied into the local cache as it passes
+    and committed only if it was read to the end.
+    """
+    
+    def __init__(
+        self,
+        response: httpx.Response,
+        chunk_size: int,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        cache_writer: Optional[CacheWriter] = None
+    ):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.skip = skip
+        self.limit = limit
+        self.cache_writer = cache_writer
+        self._complete = False
+        self._closed = False
+    
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        remaining = self.limit
+        to_skip = self.skip
+        try:
+            async for chunk in self.response.aiter_bytes(self.chunk_size):
+                if to_skip:
+                    if len(chunk) <= to_skip:
+                        to_skip -= len(chunk)
+                        continue
+                    chunk = chunk[to_skip:]
+                    to_skip = 0
+                if remaining is not None:
+                    if len(chunk) >= remaining:
+                        yield chunk[:remaining]
+                        return
+                    remaining -= len(chunk)
+                if self.cache_writer is not None:
+                    if not await asyncio.to_thread(self.cache_writer.write, chunk):
+                        self.cache_writer = None
+                yield chunk
+            self._complete = True
+        finally:
+            await self.aclose()
+    
+    async def aclose(self):
+        if not self._closed:
+            self._closed = True
+            # Returns the connection to the shared pool
+            await self.response.aclose()
+            if self.cache_writer is not None:
+                writer, self.cache_writer = self.cache_writer, None
+                try:
+                    await asyncio.to_thread(writer.commit if self._complete else writer.abort)
+                except Exception as e:
+                    logger.warning(f"Failed to cache {writer.ipfs_hash}: {e}")
+
+
+class CachedFileStream:
+    """Byte stream over an object in the local content cache"""
+    
+    def __init__(self, handle: BinaryIO, chunk_size: int, offset: int = 0, length: Optional[int] = None):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.offset = offset
+        self.length = length
+        self._closed = False
+    
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        remaining = self.length
+        try:
+            if self.offset:
+                await asyncio.to_thread(self.handle.seek, self.offset)
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = await asyncio.to_thread(self.handle.read, size)
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                CACHE_BYTES_SERVED.inc(len(chunk))
+                yield chunk
+        finally:
+            await self.aclose()
+    
+    async def aclose(self):
+        if not self._closed:
+            self._closed = True
+            self.handle.close()
+
 
 class IPFSService:
     """Service for interacting with IPFS network"""
@@ -23,105 +213,248 @@ class IPFSService:
         self.api_url = settings.IPFS_API_URL
         self.gateway_url = settings.IPFS_GATEWAY_URL
         self.client = None
+        self.cache = content_cache if settings.IPFS_CACHE_ENABLED else None
+        self.fetcher = ipfs_fetcher
+        
+    async def _run(self, operation: str, fn, *args):
+        """Run a blocking client call on the IPFS executor"""
+        with ipfs_breaker.guard():
+            return await ipfs_executor.run(operation, fn, *args, timeout=IPFS_OPERATION_TIMEOUTS.get(operation))
+    
+    async def _api_post(self, path: str, **kwargs) -> httpx.Response:
+        """POST to the node's HTTP API through the IPFS circuit breaker
         
+        The API answers 500 for ordinary errors such as an unknown hash, so
+        only transport errors and timeouts count against the node.
+        """
+        with ipfs_breaker.guard():
+            return await http_clients.get("ipfs_api").post(f"{self.api_url}{path}", **kwargs)
+    
     async def _get_client(self):
         """Get IPFS client connection"""
         if not self.client:
             try:
-                self.client = ipfshttpclient.connect(self.api_url)
-                # Test connection
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self.client.version
-                )
+                # connect() checks the daemon version, so it blocks too
+                self.client = await self._run("connect", ipfshttpclient.connect, api_multiaddr(self.api_url))
                 logger.info("Connected to IPFS node")
             except Exception as e:
                 logger.error(f"Failed to connect to IPFS: {e}")
                 self.client = None
         return self.client
     
-    async def upload_file(self, file_data: bytes, filename: str = None) -> Optional[str]:
-        """Upload file to IPFS and return hash"""
+    async def upload_file(
+        self,
+        file_data: UploadSource,
+        filename: str = None,
+        pin: bool = True
+    ) -> Optional[str]:
+        """Upload file to IPFS and return hash
+        
+        The content is streamed to the node's add endpoint as a chunked
+        multipart body, so nothing is staged on disk and at most
+        IPFS_UPLOAD_CHUNK_SIZE bytes are held beyond what the caller already
+        has. With pin=True pinning happens in the same request; dataset
+        uploads pass pin=False and queue the pin with the pin manager.
+        """
+        boundary = uuid.uuid4().hex
+        body = multipart_body(file_data, filename or "file", boundary, settings.IPFS_UPLOAD_CHUNK_SIZE)
+        params = {"pin": "true" if pin else "false", "quieter": "true"}
+        
         try:
-            client = await self._get_client()
-            if not client:
-                raise Exception("IPFS client not available")
+            response = await self._api_post(
+                "/api/v0/add",
+                params=params,
+                content=body,
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                timeout=httpx.Timeout(30.0, write=120.0, read=300.0)
+            )
+            response.raise_for_status()
             
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                temp_file.write(file_data)
-                temp_file_path = temp_file.name
+            # One JSON object per added entry; the last one is the root
+            lines = [line for line in response.text.splitlines() if line.strip()]
+            ipfs_hash = json.loads(lines[-1])["Hash"]
+            logger.info(f"File uploaded to IPFS: {ipfs_hash}")
+            
+            if self.cache is not None and isinstance(file_data, (bytes, bytearray, memoryview)):
+                await self._cache_put(ipfs_hash, bytes(file_data))
+            return ipfs_hash
             
-            try:
-                # Upload to IPFS
-                result = await asyncio.get_event_loop().run_in_executor(
-                    None, client.add, temp_file_path
-                )
-                
-                ipfs_hash = result['Hash']
-                logger.info(f"File uploaded to IPFS: {ipfs_hash}")
-                
-                # Pin the file to ensure it stays available
-                await asyncio.get_event_loop().run_in_executor(
-                    None, client.pin.add, ipfs_hash
-                )
-                
-                return ipfs_hash
-                
-            finally:
-                # Clean up temporary file
-                os.unlink(temp_file_path)
-                
         except Exception as e:
             logger.error(f"Failed to upload file to IPFS: {e}")
             return None
     
     async def upload_json(self, data: Dict[str, Any]) -> Optional[str]:
         """Upload JSON data to IPFS"""
+        stored = await self.store_json(data)
+        return stored["ipfs_hash"] if stored else None
+    
+    async def store_json(self, data: Dict[str, Any], pin: bool = True) -> Optional[Dict[str, Any]]:
+        """Serialize, compress with STORAGE_COMPRESSION and upload JSON data
+        
+        Returns the IPFS hash together with the storage metadata (codec,
+        level, size, stored_size) the payload must be read back with.
+        """
         try:
-            json_data = json.dumps(data, indent=2).encode('utf-8')
-            return await self.upload_file(json_data, "data.json")
+            payload, storage = await asyncio.to_thread(lambda: encode_payload(dumps(data)))
+            extension = "" if storage["codec"] == IDENTITY else f".{storage['codec']}"
+            ipfs_hash = await self.upload_file(payload, f"data.json{extension}", pin=pin)
+            if not ipfs_hash:
+                return None
+            return {"ipfs_hash": ipfs_hash, **storage}
         except Exception as e:
             logger.error(f"Failed to upload JSON to IPFS: {e}")
             return None
     
+    async def _cache_put(self, ipfs_hash: str, data: bytes):
+        try:
+            await asyncio.to_thread(self.cache.put, ipfs_hash, data)
+        except Exception as e:
+            logger.warning(f"Failed to cache {ipfs_hash}: {e}")
+    
     async def get_file(self, ipfs_hash: str) -> Optional[bytes]:
-        """Retrieve file from IPFS"""
+        """Retrieve file, from the local cache when possible"""
+        if self.cache is not None:
+            data = await asyncio.to_thread(self.cache.read, ipfs_hash)
+            if data is not None:
+                return data
+        
+        data = await self._fetch_file(ipfs_hash)
+        if data is not None and self.cache is not None:
+            await self._cache_put(ipfs_hash, data)
+        return data
+    
+    async def _fetch_file(self, ipfs_hash: str) -> Optional[bytes]:
+        """Retrieve file from whichever IPFS node or gateway answers first"""
+        winner = await self.fetcher.race(lambda source: self._read_from(source, ipfs_hash))
+        if winner is None:
+            logger.error(f"Failed to get file {ipfs_hash} from any IPFS source")
+            return None
+        return winner[1]
+    
+    async def _read_from(self, source: RetrievalSource, ipfs_hash: str) -> bytes:
+        client = http_clients.get(source.client_name)
+        if source.kind == "node":
+            response = await client.post(f"{source.url}/api/v0/cat", params={"arg": ipfs_hash}, timeout=30.0)
+        else:
+            response = await client.get(f"{source.url}/ipfs/{ipfs_hash}", timeout=30.0)
+        response.raise_for_status()
+        return response.content
+    
+    async def get_file_size(self, ipfs_hash: str) -> Optional[int]:
+        """Size in bytes of a file, without fetching its content"""
+        if self.cache is not None:
+            size = await asyncio.to_thread(self.cache.size_of, ipfs_hash)
+            if size is not None:
+                return size
+        
         try:
-            client = await self._get_client()
-            if not client:
-                # Fallback to HTTP gateway
-                return await self._get_file_via_gateway(ipfs_hash)
-            
-            # Get file via IPFS client
-            result = await asyncio.get_event_loop().run_in_executor(
-                None, client.cat, ipfs_hash
+            response = await self._api_post(
+                "/api/v0/files/stat",
+                params={"arg": f"/ipfs/{ipfs_hash}"},
+                timeout=10.0
             )
-            
-            return result
-            
+            response.raise_for_status()
+            return int(response.json()["Size"])
         except Exception as e:
-            logger.error(f"Failed to get file from IPFS: {e}")
-            # Fallback to HTTP gateway
-            return await self._get_file_via_gateway(ipfs_hash)
-    
-    async def _get_file_via_gateway(self, ipfs_hash: str) -> Optional[bytes]:
-        """Retrieve file via HTTP gateway as fallback"""
+            logger.warning(f"IPFS stat failed for {ipfs_hash}, trying gateway: {e}")
+        
         try:
-            url = f"{self.gateway_url}/ipfs/{ipfs_hash}"
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                return response.content
+            response = await http_clients.get("ipfs_gateway").head(f"{self.gateway_url}/ipfs/{ipfs_hash}", timeout=10.0)
+            response.raise_for_status()
+            length = response.headers.get("content-length")
+            return int(length) if length is not None else None
         except Exception as e:
-            logger.error(f"Failed to get file via gateway: {e}")
+            logger.error(f"Failed to get file size for {ipfs_hash}: {e}")
+            return None
+    
+    async def open_stream(
+        self,
+        ipfs_hash: str,
+        offset: int = 0,
+        length: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ) -> Optional[StorageStream]:
+        """Open a streaming read of a file, optionally of a byte range
+        
+        Serves from the local cache when the object is there. Otherwise
+        races the configured nodes (cat with offset/length) and gateways
+        (Range header) until one answers; full reads are copied into the
+        cache on the way through.
+        """
+        chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+        timeout = httpx.Timeout(30.0, read=60.0)
+        
+        cache_writer = None
+        if self.cache is not None:
+            handle = await asyncio.to_thread(self.cache.open, ipfs_hash)
+            if handle is not None:
+                return CachedFileStream(handle, chunk_size, offset, length)
+            if offset == 0 and length is None:
+                try:
+                    cache_writer = await asyncio.to_thread(self.cache.writer, ipfs_hash)
+                except OSError as e:
+                    logger.warning(f"IPFS cache unavailable: {e}")
+        
+        async def discard(opened):
+            await opened[0].aclose()
+        
+        winner = await self.fetcher.race(
+            lambda source: self._open_from(source, ipfs_hash, offset, length, timeout),
+            discard
+        )
+        if winner is None:
+            logger.error(f"Failed to open stream for {ipfs_hash} from any IPFS source")
+            if cache_writer is not None:
+                await asyncio.to_thread(cache_writer.abort)
             return None
+        
+        response, skip, limit = winner[1]
+        return StorageStream(response, chunk_size, skip=skip, limit=limit, cache_writer=cache_writer)
+    
+    async def _open_from(
+        self,
+        source: RetrievalSource,
+        ipfs_hash: str,
+        offset: int,
+        length: Optional[int],
+        timeout: httpx.Timeout
+    ) -> Tuple[httpx.Response, int, Optional[int]]:
+        """Open a streaming response; returns it with the trimming it still needs"""
+        client = http_clients.get(source.client_name)
+        if source.kind == "node":
+            params = {"arg": ipfs_hash, "offset": offset}
+            if length is not None:
+                params["length"] = length
+            request = client.build_request("POST", f"{source.url}/api/v0/cat", params=params, timeout=timeout)
+        else:
+            headers = {}
+            if offset or length is not None:
+                end = "" if length is None else str(offset + length - 1)
+                headers["Range"] = f"bytes={offset}-{end}"
+            request = client.build_request(
+                "GET", f"{source.url}/ipfs/{ipfs_hash}", headers=headers, timeout=timeout
+            )
+        
+        response = await client.send(request, stream=True)
+        if source.kind == "gateway" and response.status_code == 206:
+            return response, 0, None
+        if response.status_code == 200:
+            if source.kind == "gateway":
+                # Gateway ignored the range; trim the full body ourselves
+                return response, offset, length
+            return response, 0, None
+        
+        await response.aclose()
+        raise httpx.HTTPStatusError(
+            f"{source.name} returned {response.status_code}", request=request, response=response
+        )
     
     async def get_json(self, ipfs_hash: str) -> Optional[Dict[str, Any]]:
         """Retrieve and parse JSON from IPFS"""
         try:
             data = await self.get_file(ipfs_hash)
             if data:
-                return json.loads(data.decode('utf-8'))
+                return json.loads(decompress(data).decode('utf-8'))
             return None
         except Exception as e:
             logger.error(f"Failed to get JSON from IPFS: {e}")
@@ -134,9 +467,7 @@ class IPFSService:
             if not client:
                 return False
             
-            await asyncio.get_event_loop().run_in_executor(
-                None, client.pin.add, ipfs_hash
-            )
+            await self._run("pin.add", client.pin.add, ipfs_hash)
             
             logger.info(f"File pinned: {ipfs_hash}")
             return True
@@ -152,9 +483,7 @@ class IPFSService:
             if not client:
                 return False
             
-            await asyncio.get_event_loop().run_in_executor(
-                None, client.pin.rm, ipfs_hash
-            )
+            await self._run("pin.rm", client.pin.rm, ipfs_hash)
             
             logger.info(f"File unpinned: {ipfs_hash}")
             return True
@@ -171,9 +500,7 @@ class IPFSService:
                 return None
             
             # Get file stats
-            stats = await asyncio.get_event_loop().run_in_executor(
-                None, client.object.stat, ipfs_hash
-            )
+            stats = await self._run("object.stat", client.object.stat, ipfs_hash)
             
             return {
                 "hash": ipfs_hash,
@@ -194,9 +521,7 @@ class IPFSService:
                 return False
             
             # Test with version call
-            await asyncio.get_event_loop().run_in_executor(
-                None, client.version
-            )
+            await self._run("version", client.version)
             
             return True
             
@@ -6,9 +6,10 @@ Main FastAPI application for the decentralized car sales data marketplace
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 import uvicorn
+import asyncio
 import os
 from typing import List, Optional, Dict, Any
 import pandas as pd
@@ -17,13 +18,24 @@ from datetime import datetime
 import logging
 
 from app.core.config import settings
-from app.core.database import engine, SessionLocal, init_db
+from app.core.database import (
+    async_engine, replica_engines, AsyncSessionLocal, ReadYourWritesMiddleware, LAST_WRITE_HEADER
+)
 from app.core.security import verify_wallet_signature, get_current_user
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.http_clients import http_clients
+from app.core.metrics import registry as metrics_registry
 from app.api.v1 import datasets, users, analytics, auth
 from app.models import Base
 from app.services.blockchain import StacksService
-from app.services.storage import IPFSService
+from app.services.storage import IPFSService, ipfs_executor
 from app.services.data_processor import DataProcessor
+from app.services.search import search_index
+from app.services.counters import counter_flusher
+from app.services.pinning import pin_manager
+from app.services.health import health_monitor
+from app.services.indexer import chain_indexer
+from app.services.content_cache import content_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,19 +51,53 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Cars360 API...")
 
     # Initialize database
-    Base.metadata.create_all(bind=engine)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    # Build the dataset search index
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(search_index.sync, force=True)
+
+    # Pooled outbound HTTP clients shared by the services
+    http_clients.open()
+
+    # Index the local IPFS object cache left by previous runs
+    if settings.IPFS_CACHE_ENABLED:
+        await asyncio.to_thread(content_cache.load)
 
     # Initialize services
     app.state.stacks_service = StacksService()
     app.state.ipfs_service = IPFSService()
     app.state.data_processor = DataProcessor()
 
+    # Apply queued counter deltas in the background
+    counter_flusher.start()
+
+    # Drain the pin queue and reconcile pins with the IPFS node
+    pin_manager.start()
+
+    # Probe dependencies in the background; /health serves the cached results
+    health_monitor.start()
+
+    # Mirror marketplace purchases and grants from the chain into the database
+    if settings.INDEXER_ENABLED and settings.CONTRACT_ADDRESS:
+        chain_indexer.start()
+
     logger.info("Cars360 API started successfully")
 
     yield
 
     # Shutdown
     logger.info("Shutting down Cars360 API...")
+    await chain_indexer.stop()
+    await health_monitor.stop()
+    await pin_manager.stop()
+    await counter_flusher.stop()
+    await http_clients.aclose()
+    ipfs_executor.shutdown()
+    await async_engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
 
 # Create FastAPI app
 app = FastAPI(
@@ -70,8 +116,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[LAST_WRITE_HEADER],
 )
 
+# Per-endpoint SQL statement budgets
+app.add_middleware(QueryBudgetMiddleware)
+
+# Keep clients that just wrote on the primary until replicas catch up
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(datasets.router, prefix="/api/v1/datasets", tags=["Datasets"])
@@ -90,30 +143,22 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (cached probe results and circuit breaker states)"""
     try:
-        # Check database connection
-        db = SessionLocal()
-        db.execute("SELECT 1")
-        db.close()
-
-        # Check blockchain connection
-        stacks_service = app.state.stacks_service
-        blockchain_status = await stacks_service.get_network_status()
-
-        return {
-            "status": "healthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "services": {
-                "database": "connected",
-                "blockchain": "connected" if blockchain_status else "disconnected",
-                "ipfs": "connected"  # TODO: Add IPFS health check
-            }
-        }
+        report = await health_monitor.report()
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unavailable")
 
+    if report["status"] == "unhealthy":
+        return JSONResponse(status_code=503, content=report)
+    return report
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return metrics_registry.render()
+
 @app.get("/api/v1/stats")
 async def get_marketplace_stats():
     """Get marketplace statistics"""
@@ -121,23 +166,18 @@ async def get_marketplace_stats():
         stacks_service = app.state.stacks_service
         stats = await stacks_service.get_marketplace_stats()
 
-        # Add additional stats from database
-        db = SessionLocal()
-        try:
-            # TODO: Add database queries for additional stats
-            additional_stats = {
-                "total_users": 0,  # Query from database
-                "active_datasets": 0,  # Query from database
-                "recent_transactions": 0  # Query from database
-            }
-
-            return {
-                **stats,
-                **additional_stats,
-                "last_updated": datetime.utcnow().isoformat()
-            }
-        finally:
-            db.close()
+        # TODO: Add database queries for additional stats
+        additional_stats = {
+            "total_users": 0,  # Query from database
+            "active_datasets": 0,  # Query from database
+            "recent_transactions": 0  # Query from database
+        }
+
+        return {
+            **stats,
+            **additional_stats,
+            "last_updated": datetime.utcnow().isoformat()
+        }
 
     except Exception as e:
         logger.error(f"Failed to get marketplace stats: {e}")
@@ -200,54 +240,6 @@ async def upload_dataset(
         logger.error(f"Dataset upload failed: {e}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
-@app.get("/api/v1/datasets/{dataset_id}/download")
-async def download_dataset(
-    dataset_id: int,
-    current_user: dict = Depends(get_current_user)
-):
-    """Download a dataset (requires purchase or ownership)"""
-    try:
-        # Check access rights
-        stacks_service = app.state.stacks_service
-        has_access = await stacks_service.check_dataset_access(
-            dataset_id, current_user["address"]
-        )
-
-        if not has_access:
-            raise HTTPException(
-                status_code=403,
-                detail="Access denied. Purchase required."
-            )
-
-        # Get dataset info
-        dataset_info = await stacks_service.get_dataset(dataset_id)
-        if not dataset_info:
-            raise HTTPException(status_code=404, detail="Dataset not found")
-
-        # Download from IPFS
-        ipfs_service = app.state.ipfs_service
-        ipfs_hash = dataset_info["uri"].replace("ipfs://", "")
-        file_data = await ipfs_service.download_file(ipfs_hash)
-
-        # Return file as streaming response
-        def generate():
-            yield file_data
-
-        metadata = json.loads(dataset_info["metadata"])
-        filename = f"dataset_{dataset_id}.{metadata.get('file_type', 'csv')}"
-
-        return StreamingResponse(
-            generate(),
-            media_type="application/octet-stream",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Dataset download failed: {e}")
-        raise HTTPException(status_code=500, detail="Download failed")
-
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
@@ -0,0 +1,144 @@
+"""
+Clarity codec benchmark
+
+Times app.services.clarity on the shapes the API reads and writes, and
+checks every decoded value against what was encoded:
+
+    ids         get-user-datasets result: {dataset-ids: (list uint)}
+    records     list of dataset tuples (owner principal, uri, price, active)
+    args        encode_many of call-read arguments (uint + principal)
+    batch       decode_many of small results (has-access bools, optional ids)
+    nested      64 levels of (some ...) around a tuple
+
+Usage:
+    python scripts/bench_clarity.py --size 10000 --rounds 20
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services.clarity import (
+    MAX_DEPTH, bool_cv, c32_address, decode_hex, decode_many, encode_hex, encode_many,
+    list_cv, principal_cv, some_cv, string_utf8_cv, tuple_cv, uint_cv
+)
+
+SCENARIOS = ("ids", "records", "args", "batch", "nested")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(label: str, operation: Callable[[], Any], rounds: int, values: int, size: int) -> Dict[str, float]:
+    """Run operation rounds times; values and size (bytes) are per round"""
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+    result = {
+        "label": label,
+        "values_per_s": values * rounds / total,
+        "mb_per_s": size * rounds / total / 1e6,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000
+    }
+    print(
+        f"{label:<16} {result['values_per_s']:>13,.0f} {result['mb_per_s']:>9.1f} "
+        f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+    )
+    return result
+
+
+def run(args) -> int:
+    only = set(args.only.split(",")) if args.only else set(SCENARIOS)
+    addresses = [c32_address(22, index.to_bytes(20, "big")) for index in range(256)]
+    mismatches = []
+
+    def check(label: str, decoded: Any, expected: Any):
+        if decoded != expected:
+            mismatches.append(label)
+
+    print(f"{args.size} values per round, {args.rounds} rounds")
+    print(f"{'operation':<16} {'values/s':>13} {'MB/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+
+    if "ids" in only:
+        ids = list(range(args.size))
+        encoded = encode_hex(tuple_cv({"dataset-ids": list_cv(uint_cv(i) for i in ids)}))
+        size = len(encoded) // 2
+        measure("ids encode", lambda: encode_hex(tuple_cv({"dataset-ids": list_cv(uint_cv(i) for i in ids)})),
+                args.rounds, args.size, size)
+        measure("ids decode", lambda: decode_hex(encoded), args.rounds, args.size, size)
+        check("ids", decode_hex(encoded), {"dataset-ids": ids})
+
+    if "records" in only:
+        records = [
+            {"active": index % 3 != 0, "owner": addresses[index % 256], "price": index * 1000,
+             "uri": f"ipfs://Qm{index:040d}"}
+            for index in range(args.size)
+        ]
+        value = list_cv(
+            tuple_cv({
+                "active": bool_cv(record["active"]),
+                "owner": principal_cv(record["owner"]),
+                "price": uint_cv(record["price"]),
+                "uri": string_utf8_cv(record["uri"])
+            })
+            for record in records
+        )
+        encoded = encode_hex(value)
+        size = len(encoded) // 2
+        measure("records encode", lambda: encode_hex(value), args.rounds, args.size, size)
+        measure("records decode", lambda: decode_hex(encoded), args.rounds, args.size, size)
+        check("records", decode_hex(encoded), records)
+
+    if "args" in only:
+        pairs = [(index, addresses[index % 256]) for index in range(args.size)]
+
+        def encode_args():
+            for dataset_id, address in pairs:
+                encode_many([uint_cv(dataset_id), principal_cv(address)])
+
+        measure("args encode", encode_args, args.rounds, args.size * 2, args.size * 39)
+        check("args", decode_many(encode_many([uint_cv(7), principal_cv(addresses[1])])), [7, addresses[1]])
+
+    if "batch" in only:
+        results = [encode_hex(bool_cv(index % 2 == 0)) if index % 2 else encode_hex(some_cv(uint_cv(index)))
+                   for index in range(args.size)]
+        size = sum(len(result) for result in results) // 2
+        measure("batch decode", lambda: decode_many(results), args.rounds, args.size, size)
+        check("batch", decode_many(results), [False if index % 2 else index for index in range(args.size)])
+
+    if "nested" in only:
+        value = tuple_cv({"id": uint_cv(1)})
+        for _ in range(MAX_DEPTH - 1):
+            value = some_cv(value)
+        encoded = encode_hex(value)
+        measure("nested decode", lambda: decode_hex(encoded), args.rounds, 1, len(encoded) // 2)
+        check("nested", decode_hex(encoded), {"id": 1})
+
+    if mismatches:
+        print(f"\nround-trip mismatches: {', '.join(mismatches)}")
+        return 1
+    print("\nall round trips matched")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10000, help="Values per round")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--only", default="", help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Hedged IPFS fetch benchmark
+
+Starts local stand-in sources with different latency profiles and compares
+the previous retrieval order (node first, gateway only after the node
+fails) with the hedged fetcher used by IPFSService.get_file.
+
+Default profiles:
+    node        fast, but 10% of requests stall for --tail-seconds
+    gateway     steady, moderately slow
+    gateway 2   down (every request fails)
+
+Usage:
+    python scripts/bench_hedged_fetch.py --requests 300
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+PORTS = (5991, 5992, 5993)
+os.environ.setdefault("IPFS_API_URL", f"http://127.0.0.1:{PORTS[0]}")
+os.environ.setdefault("IPFS_GATEWAY_URL", f"http://127.0.0.1:{PORTS[1]}")
+os.environ.setdefault("IPFS_GATEWAY_URLS", f"http://127.0.0.1:{PORTS[2]}")
+os.environ.setdefault("IPFS_CACHE_ENABLED", "false")
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.core.http_clients import http_clients
+from app.services.retrieval import ipfs_fetcher
+from app.services.storage import IPFSService
+
+PAYLOAD = os.urandom(64 * 1024)
+
+
+def stand_in(latency: float, tail_rate: float, tail_seconds: float, fail_rate: float) -> Starlette:
+    async def serve(request: Request):
+        await asyncio.sleep(tail_seconds if random.random() < tail_rate else latency * random.uniform(0.8, 1.2))
+        if random.random() < fail_rate:
+            return Response(status_code=502)
+        return Response(PAYLOAD, media_type="application/octet-stream")
+
+    return Starlette(routes=[
+        Route("/api/v0/cat", serve, methods=["POST"]),
+        Route("/ipfs/{ipfs_hash}", serve, methods=["GET"])
+    ])
+
+
+def start(app: Starlette, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def sequential_fetch(service: IPFSService, ipfs_hash: str):
+    """Node first, then each gateway, one at a time"""
+    for source in ipfs_fetcher.sources:
+        try:
+            return await service._read_from(source, ipfs_hash)
+        except Exception:
+            continue
+    return None
+
+
+async def measure(label: str, fetch, count: int, concurrency: int):
+    latencies: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            data = await fetch(f"Qm{index:044d}")
+            if data != PAYLOAD:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(index) for index in range(count)))
+    print(
+        f"{label:<11} p50 {percentile(latencies, 50) * 1000:7.1f}ms  "
+        f"p95 {percentile(latencies, 95) * 1000:7.1f}ms  "
+        f"p99 {percentile(latencies, 99) * 1000:7.1f}ms  failures {failures}"
+    )
+
+
+async def run(args):
+    service = IPFSService()
+    await measure("sequential", lambda h: sequential_fetch(service, h), args.requests, args.concurrency)
+    await measure("hedged", service._fetch_file, args.requests, args.concurrency)
+
+    print("\nsource ranking after the run:")
+    for source in ipfs_fetcher.ranked():
+        median, p95 = source.quantile(0.5), source.quantile(0.95)
+        timing = f"p50 {median * 1000:6.1f}ms  p95 {p95 * 1000:6.1f}ms" if median is not None else "no successes"
+        print(f"  {source.name:<10} {source.url:<26} {timing:<28} failures {source.failures}")
+    await http_clients.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--tail-seconds", type=float, default=1.5)
+    args = parser.parse_args()
+
+    start(stand_in(0.01, 0.10, args.tail_seconds, 0.0), PORTS[0])
+    start(stand_in(0.06, 0.0, 0.0, 0.0), PORTS[1])
+    start(stand_in(0.005, 0.0, 0.0, 1.0), PORTS[2])
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+IPFS upload benchmark
+
+Compares the previous upload path (write a temporary file, client.add on
+the path, then a separate pin call, all on the default executor) with the
+streaming IPFSService.upload_file, which sends a chunked multipart body to
+/api/v0/add?pin=true in one request.
+
+Both run against a local stand-in node that parses the multipart body
+incrementally and returns a sha256-derived hash, so the numbers measure the
+client side: staging, copies and round trips. Point --api-url at a real
+node to include its ingest cost.
+
+Usage:
+    python scripts/bench_ipfs_upload.py --sizes 1,16,64 --rounds 5
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ipfshttpclient
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.services.storage import IPFSService
+
+
+class MultipartDigest:
+    """Hashes the first file part of a multipart body as it arrives"""
+
+    def __init__(self, boundary: bytes):
+        self.terminator = b"\r\n--" + boundary
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.header = b""
+        self.in_body = False
+        self.held = b""
+
+    def feed(self, chunk: bytes):
+        if not self.in_body:
+            self.header += chunk
+            split = self.header.find(b"\r\n\r\n")
+            if split < 0:
+                return
+            chunk = self.header[split + 4:]
+            self.header = b""
+            self.in_body = True
+
+        # Hold back enough bytes to recognise the closing boundary
+        data = self.held + chunk
+        keep = len(self.terminator) + 4
+        self.held = data[-keep:]
+        body = data[:-keep]
+        self.digest.update(body)
+        self.size += len(body)
+
+    def finish(self) -> str:
+        end = self.held.find(self.terminator)
+        tail = self.held if end < 0 else self.held[:end]
+        self.digest.update(tail)
+        self.size += len(tail)
+        return "bafk" + self.digest.hexdigest()[:52]
+
+
+def stand_in_node() -> Starlette:
+    """Minimal add/pin/version endpoints of the IPFS HTTP API"""
+    pins: Dict[str, bool] = {}
+
+    async def version(request: Request):
+        return JSONResponse({"Version": "0.8.0", "Commit": "", "Repo": "10"})
+
+    async def add(request: Request):
+        content_type = request.headers.get("content-type", "")
+        boundary = content_type.split("boundary=", 1)[-1].strip('"').encode()
+        parser = MultipartDigest(boundary)
+        async for chunk in request.stream():
+            parser.feed(chunk)
+        ipfs_hash = parser.finish()
+        if request.query_params.get("pin", "true") == "true":
+            pins[ipfs_hash] = True
+        line = json.dumps({"Name": ipfs_hash, "Hash": ipfs_hash, "Size": str(parser.size)})
+        return Response(line + "\n", media_type="application/json")
+
+    async def pin_add(request: Request):
+        ipfs_hash = request.query_params["arg"]
+        pins[ipfs_hash] = True
+        return JSONResponse({"Pins": [ipfs_hash]})
+
+    return Starlette(routes=[
+        Route("/api/v0/version", version, methods=["POST"]),
+        Route("/api/v0/add", add, methods=["POST"]),
+        Route("/api/v0/pin/add", pin_add, methods=["POST"])
+    ])
+
+
+def start_stand_in(port: int) -> uvicorn.Server:
+    config = uvicorn.Config(stand_in_node(), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def multiaddr(api_url: str) -> str:
+    host, _, port = api_url.split("://", 1)[-1].rstrip("/").partition(":")
+    return f"/ip4/{host}/tcp/{port or 5001}/http"
+
+
+async def legacy_upload(client, data: bytes) -> str:
+    """The previous IPFSService.upload_file: temp file, add, separate pin"""
+    loop = asyncio.get_event_loop()
+    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+        temp_file.write(data)
+        temp_file_path = temp_file.name
+    try:
+        result = await loop.run_in_executor(None, client.add, temp_file_path)
+        ipfs_hash = result["Hash"]
+        await loop.run_in_executor(None, client.pin.add, ipfs_hash)
+        return ipfs_hash
+    finally:
+        os.unlink(temp_file_path)
+
+
+async def measure(label: str, upload, data: bytes, rounds: int) -> Dict[str, float]:
+    timings: List[float] = []
+    ipfs_hash: Optional[str] = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        ipfs_hash = await upload(data)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    await upload(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "label": label,
+        "hash": ipfs_hash,
+        "best_s": best,
+        "mb_per_s": len(data) / best / 1e6,
+        "peak_mb": peak / 1e6
+    }
+
+
+async def run(args) -> int:
+    server = None
+    if args.api_url is None:
+        server = start_stand_in(args.port)
+        args.api_url = f"http://127.0.0.1:{args.port}"
+
+    settings.IPFS_API_URL = args.api_url
+    service = IPFSService()
+    legacy_client = ipfshttpclient.connect(multiaddr(args.api_url))
+
+    failures = 0
+    print(f"{'size':>8} {'path':<10} {'best':>9} {'MB/s':>9} {'peak MB':>9}")
+    for size_mb in args.sizes:
+        data = os.urandom(size_mb * 1024 * 1024)
+        results = [
+            await measure("legacy", lambda d: legacy_upload(legacy_client, d), data, args.rounds),
+            await measure("streaming", service.upload_file, data, args.rounds)
+        ]
+        for result in results:
+            print(
+                f"{size_mb:>6}MB {result['label']:<10} {result['best_s'] * 1000:>7.1f}ms "
+                f"{result['mb_per_s']:>9.1f} {result['peak_mb']:>9.1f}"
+            )
+        if server is not None and results[0]["hash"] != results[1]["hash"]:
+            print(f"  hash mismatch: {results[0]['hash']} != {results[1]['hash']}")
+            failures += 1
+
+    legacy_client.close()
+    if server is not None:
+        server.should_exit = True
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-url", default=None, help="IPFS API to benchmark against (default: local stand-in)")
+    parser.add_argument("--port", type=int, default=5987, help="Port for the stand-in node")
+    parser.add_argument("--sizes", default="1,16,64", help="Comma-separated payload sizes in MB")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
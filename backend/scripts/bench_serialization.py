@@ -0,0 +1,155 @@
+"""
+Serialization microbenchmark
+
+Compares the pydantic response-model path with the direct row encoders and
+FastJSONResponse for dataset listing and detail responses.
+
+Usage:
+    python scripts/bench_serialization.py [--rows 20] [--preview-rows 50] [--repeat 200]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.v1.datasets import DatasetResponse, DatasetListResponse
+from app.core.serialization import FastJSONResponse, dataset_to_dict, orjson
+from app.models.dataset import Dataset
+from app.models.user import User
+
+
+def make_dataset(dataset_id: int, owner: User, preview_rows: int) -> Dataset:
+    """Build a transient Dataset with a realistic preview payload"""
+    rows = [
+        {
+            "price": 4_500_000.0 + i,
+            "car_name": "Toyota Camry",
+            "region": "Lagos State",
+            "condition": "Foreign Used",
+            "mileage": 68_739.0 + i,
+            "year": 2015 + i % 8,
+            "color": "Black",
+            "brand": "Toyota"
+        }
+        for i in range(preview_rows)
+    ]
+    dataset = Dataset(
+        id=dataset_id,
+        title=f"Nigerian car listings {dataset_id}",
+        description="Cars45 listings scraped and cleaned",
+        tags=["automotive", "nigeria", "cars45"],
+        price=25.0,
+        records_count=2650,
+        quality_score=92.5,
+        average_rating=4.5,
+        rating_count=12,
+        total_sales=45,
+        created_at=datetime(2024, 1, 15, 10, 30),
+        preview_data={
+            "head": rows,
+            "sample": rows,
+            "summary_stats": {"price": {"mean": 4.2e6, "std": 1.1e6, "min": 5e5, "max": 9.2e7}}
+        }
+    )
+    dataset.owner = owner
+    return dataset
+
+
+def pydantic_detail(dataset: Dataset) -> bytes:
+    """The previous path: build the response model, then encode it"""
+    model = DatasetResponse(
+        id=dataset.id,
+        title=dataset.title,
+        description=dataset.description,
+        tags=dataset.tags or [],
+        price=dataset.price,
+        records_count=dataset.records_count,
+        quality_score=dataset.quality_score,
+        average_rating=dataset.average_rating,
+        rating_count=dataset.rating_count,
+        total_sales=dataset.total_sales,
+        owner={
+            "id": dataset.owner.id,
+            "wallet_address": dataset.owner.wallet_address,
+            "username": dataset.owner.username,
+            "display_name": dataset.owner.display_name,
+            "is_verified": dataset.owner.is_verified,
+            "reputation_score": dataset.owner.reputation_score
+        },
+        created_at=dataset.created_at.isoformat(),
+        preview_data=dataset.preview_data
+    )
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def pydantic_listing(datasets) -> bytes:
+    model = DatasetListResponse(
+        datasets=[
+            DatasetResponse(**jsonable_encoder(dataset_to_dict(dataset)))
+            for dataset in datasets
+        ],
+        total=len(datasets),
+        page=1,
+        per_page=len(datasets)
+    )
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def fast_detail(dataset: Dataset) -> bytes:
+    return FastJSONResponse(dataset_to_dict(dataset)).body
+
+
+def fast_listing(datasets) -> bytes:
+    return FastJSONResponse({
+        "datasets": [dataset_to_dict(dataset) for dataset in datasets],
+        "total": len(datasets),
+        "total_is_estimate": False,
+        "page": 1,
+        "per_page": len(datasets),
+        "next_cursor": None
+    }).body
+
+
+def report(label: str, func, repeat: int):
+    best = min(timeit.repeat(func, number=repeat, repeat=5)) / repeat
+    print(f"{label:<28} {best * 1e6:10.1f} us/response")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20, help="datasets per listing page")
+    parser.add_argument("--preview-rows", type=int, default=50, help="rows in each preview")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    owner = User(
+        id=1,
+        wallet_address="SP2J6ZY48GV1EZ5V2V5RB9MP66SW86PYKKNRV9EJ7",
+        username="lagos_motors",
+        display_name="Lagos Motors",
+        is_verified=True,
+        reputation_score=88.0
+    )
+    datasets = [make_dataset(i, owner, args.preview_rows) for i in range(1, args.rows + 1)]
+
+    print(f"JSON backend: {'orjson' if orjson is not None else 'stdlib json'}")
+    print(f"Payload: {len(fast_detail(datasets[0]))} bytes/detail, {len(fast_listing(datasets))} bytes/listing\n")
+
+    detail_slow = report("detail   pydantic+json", lambda: pydantic_detail(datasets[0]), args.repeat)
+    detail_fast = report("detail   encoder+fast", lambda: fast_detail(datasets[0]), args.repeat)
+    listing_slow = report("listing  pydantic+json", lambda: pydantic_listing(datasets), max(1, args.repeat // 10))
+    listing_fast = report("listing  encoder+fast", lambda: fast_listing(datasets), max(1, args.repeat // 10))
+
+    print(f"\nSpeedup: detail {detail_slow / detail_fast:.1f}x, listing {listing_slow / listing_fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
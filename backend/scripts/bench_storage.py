@@ -0,0 +1,231 @@
+"""
+Storage path benchmark
+
+Runs IPFSService and the pin manager against the in-process IPFS emulator
+(scripts/ipfs_emulator.py) and reports throughput and latency percentiles
+per operation:
+
+    upload      IPFSService.upload_file (streamed multipart add)
+    store_json  IPFSService.store_json (serialize, compress, add)
+    cat         IPFSService.get_file through the hedged fetcher
+    stream      IPFSService.open_stream, read to the end
+    range       IPFSService.open_stream for a 64KB slice
+    stat        IPFSService.get_file_info (ipfshttpclient on the executor)
+    pin         pin manager, one batched pin/add vs one call per hash
+    fallback    get_file while the node fails every request (gateway serves)
+
+The local object cache is disabled so every read reaches the emulator.
+Node and gateway latency, tail stalls and failure rates are configurable,
+so the same run shows both raw client overhead (defaults: no injected
+latency) and behaviour against a slow or flaky node.
+
+Usage:
+    python scripts/bench_storage.py --requests 200 --concurrency 16 --size-kb 256
+    python scripts/bench_storage.py --latency-ms 10 --tail-rate 0.05 --tail-ms 800 --only cat,fallback
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+API_PORT, GATEWAY_PORT = 5981, 5982
+os.environ.setdefault("IPFS_API_URL", f"http://127.0.0.1:{API_PORT}")
+os.environ.setdefault("IPFS_GATEWAY_URL", f"http://127.0.0.1:{GATEWAY_PORT}")
+os.environ.setdefault("IPFS_CACHE_ENABLED", "false")
+# The pin manager module builds engines on import; nothing here touches the database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.core.http_clients import http_clients
+from app.services.pinning import PIN, UNPIN, pin_manager
+from app.services.retrieval import ipfs_fetcher
+from app.services.storage import IPFSService, ipfs_executor
+from scripts.ipfs_emulator import Faults, IPFSEmulator, MemoryStore
+
+SCENARIOS = ("upload", "store_json", "cat", "stream", "range", "stat", "pin", "fallback")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def measure(
+    label: str,
+    operation: Callable[[int], Awaitable[Optional[int]]],
+    count: int,
+    concurrency: int
+) -> Dict[str, float]:
+    """Run operation(index) count times; operation returns bytes moved or None on failure"""
+    latencies: List[float] = []
+    moved = 0
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        nonlocal moved, errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await operation(index)
+            except Exception:
+                result = None
+            latencies.append(time.perf_counter() - start)
+            if result is None:
+                errors += 1
+            else:
+                moved += result
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(count)))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "label": label,
+        "ops_per_s": count / elapsed,
+        "mb_per_s": moved / elapsed / 1e6,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "errors": errors
+    }
+    print(
+        f"{label:<14} {result['ops_per_s']:>9.1f} {result['mb_per_s']:>9.1f} "
+        f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {errors:>7}"
+    )
+    return result
+
+
+async def run(args) -> int:
+    emulator = IPFSEmulator(MemoryStore())
+    node_faults = Faults(
+        latency=args.latency_ms / 1000,
+        jitter=0.2,
+        tail_rate=args.tail_rate,
+        tail_seconds=args.tail_ms / 1000,
+        error_rate=args.error_rate
+    )
+    gateway_faults = Faults(latency=args.gateway_latency_ms / 1000, jitter=0.2)
+    emulator.serve(API_PORT, node_faults)
+    emulator.serve(GATEWAY_PORT, gateway_faults)
+
+    service = IPFSService()
+    size = args.size_kb * 1024
+    payloads = [os.urandom(size) for _ in range(min(args.requests, 32))]
+    seeded = [emulator.add(os.urandom(size)) for _ in range(args.requests)]
+    only = set(args.only.split(",")) if args.only else set(SCENARIOS)
+    results = []
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.size_kb}KB objects")
+    print(f"{'operation':<14} {'ops/s':>9} {'MB/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+
+    async def upload(index: int):
+        data = payloads[index % len(payloads)]
+        return len(data) if await service.upload_file(data, pin=False) else None
+
+    async def store_json(index: int):
+        document = {"data": [{"row": row, "value": f"record-{index}-{row}"} for row in range(size // 64)]}
+        stored = await service.store_json(document, pin=False)
+        return stored["stored_size"] if stored else None
+
+    async def cat(index: int):
+        data = await service.get_file(seeded[index])
+        return len(data) if data is not None else None
+
+    async def stream(index: int):
+        opened = await service.open_stream(seeded[index])
+        if opened is None:
+            return None
+        total = 0
+        async for chunk in opened:
+            total += len(chunk)
+        return total
+
+    async def byte_range(index: int):
+        opened = await service.open_stream(seeded[index], offset=size // 2, length=min(65536, size // 2))
+        if opened is None:
+            return None
+        total = 0
+        async for chunk in opened:
+            total += len(chunk)
+        return total
+
+    async def stat(index: int):
+        info = await service.get_file_info(seeded[index])
+        return 0 if info is not None else None
+
+    if "upload" in only:
+        results.append(await measure("upload", upload, args.requests, args.concurrency))
+    if "store_json" in only:
+        results.append(await measure("store_json", store_json, args.requests, args.concurrency))
+    if "cat" in only:
+        results.append(await measure("cat", cat, args.requests, args.concurrency))
+    if "stream" in only:
+        results.append(await measure("stream", stream, args.requests, args.concurrency))
+    if "range" in only:
+        results.append(await measure("range", byte_range, args.requests, args.concurrency))
+    if "stat" in only:
+        results.append(await measure("stat", stat, args.requests, args.concurrency))
+
+    if "pin" in only:
+        batch = args.pin_batch
+        rounds = max(args.requests // batch, 1)
+
+        async def pin_batched(index: int):
+            hashes = seeded[index * batch % len(seeded):][:batch]
+            errors = await pin_manager.apply(PIN, hashes)
+            await pin_manager.apply(UNPIN, hashes)
+            return 0 if not any(errors.values()) else None
+
+        async def pin_single(index: int):
+            hashes = seeded[index * batch % len(seeded):][:batch]
+            outcomes = [await pin_manager.apply(PIN, [ipfs_hash]) for ipfs_hash in hashes]
+            for ipfs_hash in hashes:
+                await pin_manager.apply(UNPIN, [ipfs_hash])
+            return 0 if not any(error for outcome in outcomes for error in outcome.values()) else None
+
+        results.append(await measure(f"pin x{batch} batch", pin_batched, rounds, 1))
+        results.append(await measure(f"pin x{batch} single", pin_single, rounds, 1))
+
+    if "fallback" in only:
+        # Every node attempt fails here by design; keep the per-attempt warnings out of the table
+        logging.getLogger("app").setLevel(logging.ERROR)
+        saved = node_faults.error_rate
+        node_faults.error_rate = 1.0
+        results.append(await measure("fallback", cat, args.requests, args.concurrency))
+        node_faults.error_rate = saved
+        for source in ipfs_fetcher.sources:
+            source.failures = 0
+
+    print(f"\nemulator requests: {dict(sorted(emulator.requests.items()))}")
+    await http_clients.aclose()
+    ipfs_executor.shutdown()
+    emulator.shutdown()
+    return 1 if any(result["errors"] for result in results if result["label"] != "fallback") else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected node latency")
+    parser.add_argument("--gateway-latency-ms", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Share of node requests that stall")
+    parser.add_argument("--tail-ms", type=float, default=1000.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of node requests that fail")
+    parser.add_argument("--pin-batch", type=int, default=50)
+    parser.add_argument("--only", default="", help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
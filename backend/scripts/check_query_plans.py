@@ -0,0 +1,84 @@
+"""
+Query-plan regression check
+
+Seeds a scratch database with realistic row counts, runs EXPLAIN on the hot
+queries from app/core/query_plans.py, and fails if any of them falls back
+to a sequential scan of a large table. tests/test_query_plans.py runs the
+same check against a smaller seed.
+
+Point --database-url at an empty scratch database: tables are created and
+dropped. A database that already has marketplace tables is refused unless
+--reset is given. Defaults to a temporary SQLite file.
+
+Usage:
+    python scripts/check_query_plans.py [--database-url postgresql://... [--reset]] [--users 5000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, inspect
+
+from app.core.query_plans import check, seed
+from app.models import Base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--datasets", type=int, default=20000)
+    parser.add_argument("--accesses", type=int, default=100000)
+    parser.add_argument("--reset", action="store_true", help="drop existing marketplace tables in --database-url")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'plans.db')}"
+
+    engine = create_engine(url)
+    existing = set(inspect(engine).get_table_names()) & set(Base.metadata.tables)
+    if existing and not args.reset:
+        engine.dispose()
+        sys.exit(f"{engine.url!r} already has {', '.join(sorted(existing))}; use a scratch database or pass --reset")
+
+    failures = []
+
+    try:
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        print(f"Seeding {args.users} users, {args.datasets} datasets, {args.accesses} purchases ({engine.dialect.name})")
+        seed(engine, args.users, args.datasets, args.accesses)
+
+        with engine.connect() as conn:
+            for name, plan, scanned in check(conn):
+                print(f"{'FAIL' if scanned else 'ok':<5} {name}")
+                if scanned or args.verbose:
+                    for line in plan:
+                        print(f"        {line}")
+                if scanned:
+                    failures.append((name, scanned))
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    if failures:
+        print(f"\n{len(failures)} hot queries use sequential scans:")
+        for name, tables in failures:
+            print(f"  {name}: {', '.join(sorted(set(tables)))}")
+        sys.exit(1)
+
+    print("\nAll hot queries use indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Bulk listing import
+
+Loads cars45 corpora or a nightly scrape into the listings table. Files are
+read in chunks, cleaned with DataProcessor and written with COPY on
+PostgreSQL or batched executemany on SQLite.
+
+Usage:
+    python scripts/import_listings.py ../data/cars45_scraped_data_raw.csv ../data/csvjson.json
+    python scripts/import_listings.py scrape-2024-02-08.csv --source nightly --replace
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import get_sync_engine
+from app.models.listing import Listing
+from app.services.listing_import import ListingImporter
+
+
+async def run(args) -> int:
+    engine = get_sync_engine()
+    Listing.__table__.create(bind=engine, checkfirst=True)
+    importer = ListingImporter(engine, chunk_size=args.chunk_size)
+
+    start = time.perf_counter()
+    results = await importer.import_files(
+        args.paths,
+        source=args.source,
+        dataset_id=args.dataset_id,
+        replace=args.replace
+    )
+    total = 0
+    for result in results:
+        total += result["rows_written"]
+        print(
+            f"{result['path']}: {result['rows_written']} of {result['rows_read']} rows "
+            f"in {result['seconds']:.2f}s ({result['rows_per_second']:,.0f} rows/s)"
+        )
+
+    elapsed = time.perf_counter() - start
+    print(f"Total: {total} rows in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="CSV, JSON array or JSON Lines files")
+    parser.add_argument("--source", default=None, help="provenance label (default: file name)")
+    parser.add_argument("--dataset-id", type=int, default=None, help="link rows to a marketplace dataset")
+    parser.add_argument("--replace", action="store_true", help="replace earlier rows of each source; commits all files at once")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        asyncio.run(run(args))
+    finally:
+        get_sync_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,500 @@
+"""
+IPFS API emulator
+
+A local stand-in for a Kubo node, for benchmarking the storage path without
+a daemon. It implements the subset of the HTTP RPC API that IPFSService and
+the pin manager use, plus the path gateway:
+
+    POST /api/v0/add            single-file multipart body, streamed
+    POST /api/v0/cat            arg, offset, length
+    POST /api/v0/pin/add        one or more arg
+    POST /api/v0/pin/rm         one or more arg
+    POST /api/v0/pin/ls         recursive pins
+    POST /api/v0/object/stat    arg
+    POST /api/v0/files/stat     arg=/ipfs/<cid>
+    POST /api/v0/version
+    GET|HEAD /ipfs/<cid>        gateway, with single byte ranges
+
+Content is addressed by a CIDv0-shaped hash of the raw bytes (not the
+dag-pb encoding a real node uses) and kept in memory or in a directory.
+Latency, stalls, failures and bandwidth are injected per server and can be
+changed while it runs through POST /emulator/faults; GET /emulator/stats
+returns request counts.
+
+Usage:
+    python scripts/ipfs_emulator.py --api-port 5001 --gateway-port 8080 --latency-ms 5 --error-rate 0.01
+    python scripts/ipfs_emulator.py --store ./emulator-store --tail-rate 0.05 --tail-ms 1500
+
+Benchmarks import it instead:
+    emulator = IPFSEmulator(MemoryStore())
+    emulator.serve(5981, Faults(latency=0.005))
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from typing import AsyncIterator, Dict, Iterator, Optional, Set
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import uvicorn
+from fastapi import HTTPException
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app.core.http_range import parse_range_header
+
+BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+CHUNK_SIZE = 256 * 1024
+TEMP_PREFIX = ".add-"  # Uploads in progress in a DiskStore
+
+
+def cid_for(digest: bytes) -> str:
+    """CIDv0 spelling (base58btc sha2-256 multihash) of a sha256 digest"""
+    number = int.from_bytes(b"\x12\x20" + digest, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58[remainder] + encoded
+    return encoded
+
+
+def strip_path(arg: str) -> str:
+    """/ipfs/<cid>[/...] or <cid> -> <cid>"""
+    return arg[len("/ipfs/"):].split("/", 1)[0] if arg.startswith("/ipfs/") else arg
+
+
+@dataclass
+class Faults:
+    """Injected behaviour for one server (seconds, probabilities, MB/s)"""
+
+    latency: float = 0.0
+    jitter: float = 0.0  # Uniform +/- fraction of latency
+    tail_rate: float = 0.0  # Share of requests that stall for tail_seconds instead
+    tail_seconds: float = 0.0
+    error_rate: float = 0.0
+    bandwidth_mbps: float = 0.0  # Response streaming rate; 0 is unlimited
+
+    def update(self, values: Dict[str, float]):
+        names = {field.name for field in fields(self)}
+        for name, value in values.items():
+            if name not in names:
+                raise ValueError(f"Unknown fault {name}")
+            setattr(self, name, float(value))
+
+    async def delay(self):
+        if self.tail_rate and random.random() < self.tail_rate:
+            await asyncio.sleep(self.tail_seconds)
+        elif self.latency:
+            await asyncio.sleep(self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def fails(self) -> bool:
+        return bool(self.error_rate) and random.random() < self.error_rate
+
+
+class ObjectWriter:
+    """Accumulates one object while hashing it; each store supplies a subclass"""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes):
+        if not data:
+            return
+        self.digest.update(data)
+        self.size += len(data)
+        self._write(data)
+
+    def commit(self) -> str:
+        """Store the object under its CID and return the CID"""
+        cid = cid_for(self.digest.digest())
+        self._commit(cid)
+        return cid
+
+    def abort(self):
+        """Discard what was written"""
+
+    def _write(self, data: bytes):
+        raise NotImplementedError
+
+    def _commit(self, cid: str):
+        raise NotImplementedError
+
+
+class MemoryStore:
+    """Objects and pins held in process memory"""
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+        self.pins: Set[str] = set()
+
+    def writer(self) -> ObjectWriter:
+        return MemoryWriter(self)
+
+    def count(self) -> int:
+        return len(self.objects)
+
+    def size(self, cid: str) -> Optional[int]:
+        data = self.objects.get(cid)
+        return None if data is None else len(data)
+
+    def read(self, cid: str, offset: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+        data = memoryview(self.objects[cid])
+        end = len(data) if length is None else min(offset + length, len(data))
+        for start in range(offset, end, CHUNK_SIZE):
+            yield bytes(data[start:min(start + CHUNK_SIZE, end)])
+
+
+class MemoryWriter(ObjectWriter):
+    """Buffers the object and hands the bytes to the store"""
+
+    def __init__(self, store: MemoryStore):
+        super().__init__()
+        self.store = store
+        self.buffer = bytearray()
+
+    def _write(self, data: bytes):
+        self.buffer.extend(data)
+
+    def _commit(self, cid: str):
+        self.store.objects[cid] = bytes(self.buffer)
+
+
+class DiskStore(MemoryStore):
+    """Objects kept as files named by CID under root; pins stay in memory"""
+
+    def __init__(self, root: str):
+        super().__init__()
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, cid: str) -> str:
+        return os.path.join(self.root, cid)
+
+    def writer(self) -> ObjectWriter:
+        return DiskWriter(self)
+
+    def count(self) -> int:
+        return sum(1 for name in os.listdir(self.root) if not name.startswith(TEMP_PREFIX))
+
+    def size(self, cid: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.path(cid))
+        except OSError:
+            return None
+
+    def read(self, cid: str, offset: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+        remaining = length
+        with open(self.path(cid), "rb") as handle:
+            handle.seek(offset)
+            while remaining is None or remaining > 0:
+                chunk = handle.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+
+class DiskWriter(ObjectWriter):
+    """Streams the object to a temporary file renamed into place on commit"""
+
+    def __init__(self, store: DiskStore):
+        super().__init__()
+        self.store = store
+        self.handle = tempfile.NamedTemporaryFile(dir=store.root, prefix=TEMP_PREFIX, delete=False)
+
+    def _write(self, data: bytes):
+        self.handle.write(data)
+
+    def _commit(self, cid: str):
+        self.handle.close()
+        os.replace(self.handle.name, self.store.path(cid))
+
+    def abort(self):
+        self.handle.close()
+        os.unlink(self.handle.name)
+
+
+class MultipartFile:
+    """Feeds the first file part of a multipart body into an ObjectWriter"""
+
+    def __init__(self, boundary: bytes, writer: ObjectWriter):
+        self.terminator = b"\r\n--" + boundary
+        self.writer = writer
+        self.header = b""
+        self.in_body = False
+        self.done = False
+        self.held = b""
+
+    def feed(self, chunk: bytes):
+        if self.done:
+            return
+        if not self.in_body:
+            self.header += chunk
+            split = self.header.find(b"\r\n\r\n")
+            if split < 0:
+                return
+            chunk = self.header[split + 4:]
+            self.header = b""
+            self.in_body = True
+
+        data = self.held + chunk
+        end = data.find(self.terminator)
+        if end >= 0:
+            self.writer.write(data[:end])
+            self.held = b""
+            self.done = True
+            return
+        # Hold back enough bytes to recognise a boundary split across chunks
+        keep = len(self.terminator)
+        self.writer.write(data[:-keep])
+        self.held = data[-keep:]
+
+
+def ipfs_error(message: str, status_code: int = 500) -> JSONResponse:
+    return JSONResponse({"Message": message, "Code": 0, "Type": "error"}, status_code=status_code)
+
+
+class IPFSEmulator:
+    """Shared store served by one or more API/gateway servers"""
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        self.store = store or MemoryStore()
+        self.requests: Counter = Counter()
+        self.servers = []
+
+    def add(self, data: bytes, pin: bool = True) -> str:
+        """Seed an object directly (no HTTP round trip)"""
+        writer = self.store.writer()
+        writer.write(data)
+        cid = writer.commit()
+        if pin:
+            self.store.pins.add(cid)
+        return cid
+
+    async def _throttled(self, chunks: Iterator[bytes], faults: Faults) -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
+            if faults.bandwidth_mbps:
+                await asyncio.sleep(len(chunk) / (faults.bandwidth_mbps * 1e6))
+
+    def app(self, faults: Optional[Faults] = None) -> Starlette:
+        faults = faults or Faults()
+        store = self.store
+
+        def route(name: str, handler, methods):
+            async def endpoint(request: Request):
+                self.requests[name] += 1
+                await faults.delay()
+                if faults.fails():
+                    self.requests[f"{name}:injected_error"] += 1
+                    if name == "gateway":
+                        return Response(status_code=502)
+                    return ipfs_error("injected failure")
+                return await handler(request)
+            return Route(f"/api/v0/{name}" if name != "gateway" else "/ipfs/{cid:path}", endpoint, methods=methods)
+
+        async def add(request: Request):
+            content_type = request.headers.get("content-type", "")
+            if "boundary=" not in content_type:
+                return ipfs_error("expected a multipart body", 400)
+            boundary = content_type.split("boundary=", 1)[-1].split(";")[0].strip('"').encode()
+            writer = store.writer()
+            parser = MultipartFile(boundary, writer)
+            try:
+                async for chunk in request.stream():
+                    parser.feed(chunk)
+            except BaseException:
+                writer.abort()
+                raise
+            if not parser.in_body:
+                writer.abort()
+                return ipfs_error("no file part in body", 400)
+            cid = writer.commit()
+            if request.query_params.get("pin", "true") == "true":
+                store.pins.add(cid)
+            line = json.dumps({"Name": cid, "Hash": cid, "Size": str(writer.size)})
+            return Response(line + "\n", media_type="application/json")
+
+        async def cat(request: Request):
+            cid = strip_path(request.query_params.get("arg", ""))
+            size = store.size(cid)
+            if size is None:
+                return ipfs_error(f"block was not found locally (offline): {cid}")
+            offset = min(int(request.query_params.get("offset", 0)), size)
+            length = request.query_params.get("length")
+            return StreamingResponse(
+                self._throttled(store.read(cid, offset, int(length) if length else None), faults),
+                media_type="text/plain"
+            )
+
+        def pin_args(request: Request):
+            return [strip_path(arg) for arg in request.query_params.getlist("arg")]
+
+        async def pin_add(request: Request):
+            cids = pin_args(request)
+            for cid in cids:
+                if store.size(cid) is None:
+                    return ipfs_error(f"pin: block was not found locally (offline): {cid}")
+            store.pins.update(cids)
+            return JSONResponse({"Pins": cids})
+
+        async def pin_rm(request: Request):
+            cids = pin_args(request)
+            for cid in cids:
+                if cid not in store.pins:
+                    return ipfs_error(f"{cid} is not pinned or pinned indirectly")
+            store.pins.difference_update(cids)
+            return JSONResponse({"Pins": cids})
+
+        async def pin_ls(request: Request):
+            return JSONResponse({"Keys": {cid: {"Type": "recursive"} for cid in store.pins}})
+
+        async def object_stat(request: Request):
+            cid = strip_path(request.query_params.get("arg", ""))
+            size = store.size(cid)
+            if size is None:
+                return ipfs_error(f"block was not found locally (offline): {cid}")
+            return JSONResponse({
+                "Hash": cid, "NumLinks": 0, "BlockSize": size,
+                "LinksSize": 0, "DataSize": size, "CumulativeSize": size
+            })
+
+        async def files_stat(request: Request):
+            cid = strip_path(request.query_params.get("arg", ""))
+            size = store.size(cid)
+            if size is None:
+                return ipfs_error(f"block was not found locally (offline): {cid}")
+            return JSONResponse({"Hash": cid, "Size": size, "CumulativeSize": size, "Blocks": 0, "Type": "file"})
+
+        async def version(request: Request):
+            # Inside the range ipfshttpclient accepts
+            return JSONResponse({"Version": "0.8.0", "Commit": "emulator", "Repo": "10", "System": "emulator"})
+
+        async def gateway(request: Request):
+            cid = strip_path(f"/ipfs/{request.path_params['cid']}")
+            size = store.size(cid)
+            if size is None:
+                return Response(status_code=404)
+            headers = {"Accept-Ranges": "bytes", "Etag": f'"{cid}"'}
+            try:
+                byte_range = parse_range_header(request.headers.get("range"), size)
+            except HTTPException as e:
+                return Response(status_code=e.status_code, headers=e.headers)
+
+            status_code, offset, length = 200, 0, size
+            if byte_range is not None:
+                start, end = byte_range
+                status_code, offset, length = 206, start, end - start + 1
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(length)
+            if request.method == "HEAD":
+                return Response(status_code=status_code, headers=headers)
+            return StreamingResponse(
+                self._throttled(store.read(cid, offset, length), faults),
+                status_code=status_code,
+                headers=headers,
+                media_type="application/octet-stream"
+            )
+
+        async def set_faults(request: Request):
+            try:
+                faults.update(await request.json())
+            except ValueError as e:
+                return JSONResponse({"detail": str(e)}, status_code=400)
+            return JSONResponse(asdict(faults))
+
+        async def stats(request: Request):
+            return JSONResponse({
+                "requests": dict(self.requests),
+                "objects": store.count(),
+                "pins": len(store.pins),
+                "faults": asdict(faults)
+            })
+
+        return Starlette(routes=[
+            route("add", add, ["POST"]),
+            route("cat", cat, ["POST"]),
+            route("pin/add", pin_add, ["POST"]),
+            route("pin/rm", pin_rm, ["POST"]),
+            route("pin/ls", pin_ls, ["POST"]),
+            route("object/stat", object_stat, ["POST"]),
+            route("files/stat", files_stat, ["POST"]),
+            route("version", version, ["POST"]),
+            route("gateway", gateway, ["GET", "HEAD"]),
+            Route("/emulator/faults", set_faults, methods=["POST"]),
+            Route("/emulator/stats", stats, methods=["GET"])
+        ])
+
+    def serve(self, port: int, faults: Optional[Faults] = None, host: str = "127.0.0.1") -> uvicorn.Server:
+        """Run a server on a background thread and wait until it accepts connections"""
+        server = uvicorn.Server(uvicorn.Config(self.app(faults), host=host, port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+        self.servers.append(server)
+        return server
+
+    def shutdown(self):
+        for server in self.servers:
+            server.should_exit = True
+        self.servers.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--api-port", type=int, default=5001)
+    parser.add_argument("--gateway-port", type=int, default=8080, help="0 disables the separate gateway server")
+    parser.add_argument("--store", default="memory", help='"memory" or a directory for objects')
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0)
+    parser.add_argument("--gateway-latency-ms", type=float, default=None, help="Defaults to --latency-ms")
+    args = parser.parse_args()
+
+    store = MemoryStore() if args.store == "memory" else DiskStore(args.store)
+    emulator = IPFSEmulator(store)
+    api_faults = Faults(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter,
+        tail_rate=args.tail_rate,
+        tail_seconds=args.tail_ms / 1000,
+        error_rate=args.error_rate,
+        bandwidth_mbps=args.bandwidth_mbps
+    )
+    gateway_faults = Faults(**{
+        **asdict(api_faults),
+        "latency": (args.gateway_latency_ms if args.gateway_latency_ms is not None else args.latency_ms) / 1000
+    })
+
+    emulator.serve(args.api_port, api_faults, args.host)
+    print(f"IPFS API emulator on http://{args.host}:{args.api_port}")
+    if args.gateway_port:
+        emulator.serve(args.gateway_port, gateway_faults, args.host)
+        print(f"Gateway on http://{args.host}:{args.gateway_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        emulator.shutdown()
+
+
+if __name__ == "__main__":
+    main()
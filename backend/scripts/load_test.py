@@ -0,0 +1,98 @@
+"""
+Mixed-latency load test
+
+Runs slow (analytics) and fast requests side by side against a running API
+and reports latency percentiles for each class. When database access blocks
+the event loop, fast-request p99 tracks the slow queries; with the async
+session path it should stay close to the idle baseline.
+
+Usage:
+    python scripts/load_test.py --base-url http://localhost:8000 --duration 30 --label async
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    path: str,
+    deadline: float,
+    latencies: List[float],
+    errors: Dict[str, int],
+    label: str
+):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors[label] = errors.get(label, 0) + 1
+        except httpx.HTTPError:
+            errors[label] = errors.get(label, 0) + 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args) -> None:
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.slow_concurrency + args.fast_concurrency)
+    results: Dict[str, List[float]] = {"slow": [], "fast": []}
+    errors: Dict[str, int] = {}
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=60.0) as client:
+        # Idle baseline for the fast path
+        baseline: List[float] = []
+        await worker(client, args.fast_path, time.perf_counter() + min(5.0, args.duration / 5), baseline, errors, "baseline")
+
+        deadline = time.perf_counter() + args.duration
+        tasks = [
+            worker(client, args.slow_path, deadline, results["slow"], errors, "slow")
+            for _ in range(args.slow_concurrency)
+        ] + [
+            worker(client, args.fast_path, deadline, results["fast"], errors, "fast")
+            for _ in range(args.fast_concurrency)
+        ]
+        await asyncio.gather(*tasks)
+
+    print(f"\n[{args.label}] {args.duration}s, {args.slow_concurrency} slow + {args.fast_concurrency} fast workers")
+    print(f"{'class':<10}{'requests':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, samples in (("baseline", baseline), ("fast", results["fast"]), ("slow", results["slow"])):
+        print(
+            f"{name:<10}{len(samples):>10}"
+            f"{percentile(samples, 50) * 1000:>10.1f}"
+            f"{percentile(samples, 95) * 1000:>10.1f}"
+            f"{percentile(samples, 99) * 1000:>10.1f}"
+            f"{(max(samples) if samples else 0) * 1000:>10.1f}"
+        )
+    if errors:
+        print(f"errors: {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of mixed load")
+    parser.add_argument("--slow-path", default="/api/v1/analytics/user-activity?days=365")
+    parser.add_argument("--fast-path", default="/api/v1/users/me")
+    parser.add_argument("--slow-concurrency", type=int, default=8)
+    parser.add_argument("--fast-concurrency", type=int, default=8)
+    parser.add_argument("--token", default="", help="bearer token for authenticated paths")
+    parser.add_argument("--label", default="run", help="name printed with the results, e.g. before/after")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Shared fixtures: the API on a scratch SQLite database, with IPFS served by
+the in-process emulator (scripts/ipfs_emulator.py)
+"""
+
+import os
+import socket
+import sys
+import tempfile
+
+import pytest
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Settings are read on import, so the environment is fixed before the app loads
+API_PORT, GATEWAY_PORT = _free_port(), _free_port()
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp(prefix='cars360-tests-')}/test.db",
+    "QUERY_BUDGET_MODE": "enforce",
+    "IPFS_API_URL": f"http://127.0.0.1:{API_PORT}",
+    "IPFS_GATEWAY_URL": f"http://127.0.0.1:{GATEWAY_PORT}",
+    "IPFS_CACHE_ENABLED": "false",
+    "INDEXER_ENABLED": "false",
+    "CONTRACT_ADDRESS": "",
+    "STACKS_NETWORK": "devnet",
+})
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from scripts.ipfs_emulator import IPFSEmulator, MemoryStore  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def ipfs():
+    emulator = IPFSEmulator(MemoryStore())
+    emulator.serve(API_PORT)
+    emulator.serve(GATEWAY_PORT)
+    yield emulator
+    emulator.shutdown()
+
+
+@pytest.fixture(scope="session")
+def client(ipfs):
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def seed(client, ipfs):
+    """An owner with one dataset and a buyer who purchased it"""
+    from app.core.database import sync_session
+    from app.core.security import create_access_token
+    from app.models import Dataset, DatasetAccess, User
+
+    content = b'{"data": [{"make": "Toyota", "model": "Camry", "year": 2010}]}'
+    ipfs_hash = ipfs.add(content)
+
+    db = sync_session()
+    try:
+        owner = User(wallet_address="SP2J6ZY48GV1EZ5V2V5RB9MP66SW86PYKKNRV9EJ7")
+        buyer = User(wallet_address="SP000000000000000000002Q6VF78")
+        db.add_all([owner, buyer])
+        db.flush()
+        dataset = Dataset(
+            title="Lagos used car sales",
+            description="Toyota and Honda sales",
+            tags=["lagos", "toyota"],
+            filename="sales.csv",
+            file_type="csv",
+            file_size=len(content),
+            ipfs_hash=ipfs_hash,
+            price=10.0,
+            records_count=1,
+            columns_count=3,
+            dataset_metadata={"storage": {"codec": "identity", "size": len(content)}},
+            preview_data={"rows": []},
+            quality_score=0.9,
+            owner_id=owner.id
+        )
+        db.add(dataset)
+        db.flush()
+        db.add(DatasetAccess(dataset_id=dataset.id, user_id=buyer.id, price_paid=10.0))
+        db.commit()
+        return {
+            "owner_id": owner.id,
+            "dataset_id": dataset.id,
+            "owner_headers": {"Authorization": f"Bearer {create_access_token(owner.wallet_address)}"},
+            "buyer_headers": {"Authorization": f"Bearer {create_access_token(buyer.wallet_address)}"}
+        }
+    finally:
+        db.close()
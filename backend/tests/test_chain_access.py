@@ -0,0 +1,188 @@
+"""
+Access to datasets bought on chain, and how the indexer records those purchases
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.services.blockchain import StacksService
+from app.services.clarity import encode_hex, list_cv, uint_cv
+from app.services.indexer import ChainBlock, ChainIndexer, apply_blocks, extract_events, load_cursor
+
+CONTRACT = "SP2J6ZY48GV1EZ5V2V5RB9MP66SW86PYKKNRV9EJ7"
+LATE_BUYER = "SP3FBR2AGK5H9QBDH3EEN6DF8EK8JY7RX8QJ5SVTE"
+BUYER = "SP000000000000000000002Q6VF78"
+PLATFORM = "SP1HTBVD3JG9C05J7HBJTHGR0GGW7KXW28M5JS8QE"
+
+
+@pytest.fixture
+def chain_dataset(seed, monkeypatch):
+    """The seeded dataset registered on chain, with the indexer's contract configured"""
+    from app.core.database import sync_session
+    from app.models import Dataset
+
+    def set_blockchain_id(value):
+        db = sync_session()
+        try:
+            db.get(Dataset, seed["dataset_id"]).blockchain_id = value
+            db.commit()
+        finally:
+            db.close()
+
+    monkeypatch.setattr(settings, "CONTRACT_ADDRESS", CONTRACT)
+    set_blockchain_id(7)
+    yield 7
+    set_blockchain_id(None)
+
+
+@pytest.mark.parametrize("on_chain, expected", [(True, 200), (False, 403)])
+def test_unindexed_purchase_falls_back_to_contract(client, seed, chain_dataset, monkeypatch, on_chain, expected):
+    from app.core.security import create_access_token
+
+    checked = []
+
+    async def check_dataset_access(self, dataset_id, user_address):
+        checked.append((dataset_id, user_address))
+        return on_chain
+
+    monkeypatch.setattr(StacksService, "check_dataset_access", check_dataset_access)
+    headers = {"Authorization": f"Bearer {create_access_token(LATE_BUYER)}"}
+    client.get("/api/v1/users/me", headers=headers)  # First sign-in creates the user
+
+    response = client.get(f"/api/v1/datasets/{seed['dataset_id']}/download", headers=headers)
+    assert response.status_code == expected
+    assert checked == [(chain_dataset, LATE_BUYER)]
+
+
+def test_indexed_purchase_skips_contract(client, seed, chain_dataset, monkeypatch):
+    async def check_dataset_access(self, dataset_id, user_address):
+        raise AssertionError("indexed purchases are answered from dataset_access")
+
+    monkeypatch.setattr(StacksService, "check_dataset_access", check_dataset_access)
+    response = client.get(f"/api/v1/datasets/{seed['dataset_id']}/download", headers=seed["buyer_headers"])
+    assert response.status_code == 200
+
+
+def call(contract_id, function_name, args, transfers=None, sender=LATE_BUYER):
+    """A successful contract-call transaction, with (recipient, micro-STX) transfer events if given"""
+    tx = {
+        "tx_id": f"0x{function_name}",
+        "tx_type": "contract_call",
+        "tx_status": "success",
+        "sender_address": sender,
+        "contract_call": {
+            "contract_id": contract_id,
+            "function_name": function_name,
+            "function_args": [{"hex": value} for value in args]
+        }
+    }
+    if transfers is not None:
+        tx["events"] = [
+            {
+                "event_index": index,
+                "event_type": "stx_asset",
+                "asset": {"asset_event_type": "transfer", "sender": sender, "recipient": recipient, "amount": str(amount)}
+            }
+            for index, (recipient, amount) in enumerate(transfers)
+        ]
+        tx["event_count"] = len(transfers)
+    return tx
+
+
+    block = ChainBlock(10, "0xb", "0xa", [
+        call("SP000000000000000000002Q6VF78.pox-4", "stack-stx", ["0xnot-clarity"]),
+        call(f"{CONTRACT}.marketplace", "purchase-dataset", [encode_hex(uint_cv(7))])
+    ])
+
+    events = extract_events(block, CONTRACT)
+    assert [(event.kind, event.chain_dataset_id, event.wallet_address) for event in events] == [
+        ("purchase", 7, LATE_BUYER)
+    ]
+
+
+def test_purchase_amount_comes_from_transfer_events():
+    block = ChainBlock(11, "0xc", "0xb", [
+        call(f"{CONTRACT}.marketplace", "purchase-dataset", [encode_hex(uint_cv(7))], [
+            (CONTRACT, 24_250_000), (PLATFORM, 750_000)
+        ]),
+        call(f"{CONTRACT}.marketplace", "bulk-purchase", [encode_hex(list_cv([uint_cv(7), uint_cv(8)]))], [
+            (CONTRACT, 9_700_000), (PLATFORM, 300_000), (LATE_BUYER, 1_940_000), (PLATFORM, 60_000)
+        ], sender=CONTRACT)
+    ])
+
+    events = extract_events(block, CONTRACT)
+    assert [(event.chain_dataset_id, event.amount, event.platform_fee) for event in events] == [
+        (7, 25.0, 0.75), (7, 10.0, 0.3), (8, 2.0, 0.06)
+    ]
+
+
+def test_missing_or_truncated_events_leave_the_amount_unknown():
+    truncated = call(f"{CONTRACT}.marketplace", "purchase-dataset", [encode_hex(uint_cv(7))], [(CONTRACT, 1)])
+    truncated["event_count"] = 2
+    block = ChainBlock(12, "0xd", "0xc", [
+        call(f"{CONTRACT}.marketplace", "purchase-dataset", [encode_hex(uint_cv(7))]),
+        truncated
+    ])
+
+    assert [(event.amount, event.platform_fee) for event in extract_events(block, CONTRACT)] == [
+        (None, None), (None, None)
+    ]
+
+
+def test_indexed_price_is_what_the_buyer_paid(seed, chain_dataset):
+    from app.core.database import sync_session
+    from app.models import DatasetAccess, Transaction
+
+    paid = call(f"{CONTRACT}.marketplace", "purchase-dataset", [encode_hex(uint_cv(7))], [
+        (CONTRACT, 7_760_000), (PLATFORM, 240_000)
+    ], sender=BUYER)
+    paid["tx_id"] = "0xpaid"
+    unknown = call(f"{CONTRACT}.marketplace", "purchase-dataset", [encode_hex(uint_cv(7))], sender=BUYER)
+    unknown["tx_id"] = "0xunknown"
+    block = ChainBlock(13, "0xe", "0xd", [paid, unknown])
+
+    db = sync_session()
+    try:
+        cursor = load_cursor(db)
+        assert apply_blocks(db, cursor[0] if cursor else None, [block], extract_events(block, CONTRACT))
+        rows = dict(db.execute(
+            select(Transaction.transaction_hash, Transaction.amount).where(
+                Transaction.transaction_hash.in_(["0xpaid", "0xunknown"])
+            )
+        ).all())
+        fees = db.scalar(select(Transaction.platform_fee).where(Transaction.transaction_hash == "0xpaid"))
+        access = db.scalar(select(DatasetAccess.price_paid).where(DatasetAccess.transaction_hash == "0xpaid"))
+    finally:
+        db.close()
+
+    # The price changed after the purchase; the unknown amount falls back to it
+    assert rows == {"0xpaid": 8.0, "0xunknown": 10.0}
+    assert fees == 0.24
+    assert access == 8.0
+
+
+def test_fetch_block_loads_events_left_out_of_the_page(monkeypatch):
+    purchase = call(f"{CONTRACT}.marketplace", "purchase-dataset", [encode_hex(uint_cv(7))])
+    purchase["events"], purchase["event_count"] = [], 2
+    other = call("SP000000000000000000002Q6VF78.pox-4", "stack-stx", [])
+    detail = call(f"{CONTRACT}.marketplace", "purchase-dataset", [], [(CONTRACT, 970_000), (PLATFORM, 30_000)])
+    responses = {
+        "/extended/v1/block/by_height/14": {"hash": "0xf", "parent_block_hash": "0xe"},
+        "/extended/v1/tx/block_height/14": {"results": [purchase, other], "total": 2},
+        f"/extended/v1/tx/{purchase['tx_id']}": detail,
+    }
+    requested = []
+
+    async def get(self, path, **params):
+        requested.append(path)
+        return responses[path]
+
+    monkeypatch.setattr(settings, "CONTRACT_ADDRESS", CONTRACT)
+    monkeypatch.setattr(ChainIndexer, "_get", get)
+    block = asyncio.run(ChainIndexer().fetch_block(14))
+
+    assert requested.count(f"/extended/v1/tx/{purchase['tx_id']}") == 1
+    assert [event.amount for event in extract_events(block, CONTRACT)] == [1.0]
@@ -0,0 +1,134 @@
+"""
+CircuitBreaker state machine on a fake clock
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import circuit_breaker
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Busy(Exception):
+    """Stands in for a local admission-control error"""
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, reset_seconds=30, half_open_calls=1, ignored=(Busy,))
+
+
+def fail(breaker, error=ConnectionError("down")):
+    with pytest.raises(type(error)):
+        with breaker.guard():
+            raise error
+
+
+def succeed(breaker):
+    with breaker.guard():
+        pass
+
+
+def open_then_half_open(breaker, clock):
+    for _ in range(3):
+        fail(breaker)
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+
+
+def test_opens_after_consecutive_failures(breaker):
+    fail(breaker)
+    fail(breaker)
+    succeed(breaker)  # resets the count
+    fail(breaker)
+    fail(breaker)
+    assert breaker.state == CLOSED
+
+    fail(breaker)
+    assert breaker.state == OPEN
+    assert "ConnectionError" in breaker.snapshot()["last_error"]
+    with pytest.raises(CircuitOpenError):
+        succeed(breaker)
+
+
+def test_half_open_after_reset_seconds(breaker, clock):
+    for _ in range(3):
+        fail(breaker)
+    clock.now += 29.9
+    assert breaker.state == OPEN
+    clock.now += 0.1
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_success_closes(breaker, clock):
+    open_then_half_open(breaker, clock)
+    succeed(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_failure_reopens(breaker, clock):
+    open_then_half_open(breaker, clock)
+    fail(breaker)
+    assert breaker.state == OPEN
+    clock.now += 29
+    assert breaker.state == OPEN
+
+
+def test_half_open_admits_limited_trials(breaker, clock):
+    open_then_half_open(breaker, clock)
+    breaker.acquire()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+
+def test_ignored_exceptions_do_not_count(breaker):
+    for _ in range(5):
+        fail(breaker, Busy())
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["consecutive_failures"] == 0
+
+
+@pytest.mark.parametrize("error", [Busy(), asyncio.CancelledError()])
+def test_trial_slot_is_released_without_a_verdict(breaker, clock, error):
+    open_then_half_open(breaker, clock)
+    fail(breaker, error)
+    assert breaker.state == HALF_OPEN
+
+    # The slot is free again for a real trial
+    succeed(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_await_releases_the_trial_slot(breaker, clock):
+    open_then_half_open(breaker, clock)
+
+    async def call():
+        with breaker.guard():
+            await asyncio.sleep(10)
+
+    async def cancel_call():
+        task = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_call())
+    assert breaker.state == HALF_OPEN
+    breaker.acquire()
@@ -0,0 +1,119 @@
+"""
+Clarity value codec
+"""
+
+import pytest
+
+from app.services.clarity import (
+    MAX_DEPTH, ClarityError, Err, bool_cv, buffer_cv, c32_address, c32_address_decode, decode_hex,
+    deserialize, encode_hex, err_cv, int_cv, list_cv, none_cv, ok_cv, principal_cv, serialize, some_cv,
+    string_ascii_cv, string_utf8_cv, tuple_cv, uint_cv
+)
+
+BOOT = "SP000000000000000000002Q6VF78"
+TESTNET_BOOT = "ST000000000000000000002AMW42H"
+ADDRESS = "SP2J6ZY48GV1EZ5V2V5RB9MP66SW86PYKKNRV9EJ7"
+ADDRESS_HASH = bytes.fromhex("a46ff88886c2ef9762d970b4d2c63678835bd39d")
+
+# (value, encoding, decoded) for every type id
+SAMPLES = [
+    (int_cv(-2), "0x00" + "ff" * 15 + "fe", -2),
+    (uint_cv(1), "0x01" + "00" * 15 + "01", 1),
+    (buffer_cv(b"\x01\x02"), "0x02000000020102", b"\x01\x02"),
+    (bool_cv(True), "0x03", True),
+    (bool_cv(False), "0x04", False),
+    (principal_cv(BOOT), "0x0516" + "00" * 20, BOOT),
+    (principal_cv(f"{BOOT}.pox"), "0x0616" + "00" * 20 + "03706f78", f"{BOOT}.pox"),
+    (ok_cv(uint_cv(1)), "0x07" + "01" + "00" * 15 + "01", 1),
+    (err_cv(uint_cv(3)), "0x08" + "01" + "00" * 15 + "03", Err(3)),
+    (none_cv(), "0x09", None),
+    (some_cv(bool_cv(True)), "0x0a03", True),
+    (list_cv([]), "0x0b00000000", []),
+    (tuple_cv({"b": bool_cv(False), "a": bool_cv(True)}), "0x0c000000020161030162" + "04", {"a": True, "b": False}),
+    (string_ascii_cv("hi"), "0x0d000000026869", "hi"),
+    (string_utf8_cv("é"), "0x0e00000002c3a9", "é"),
+]
+
+
+@pytest.mark.parametrize("value, encoded, decoded", SAMPLES)
+def test_each_type_round_trips(value, encoded, decoded):
+    assert encode_hex(value) == encoded
+    assert decode_hex(encoded) == decoded
+
+
+@pytest.mark.parametrize("address, version, hash160", [
+    (BOOT, 22, bytes(20)),
+    (TESTNET_BOOT, 26, bytes(20)),
+    (ADDRESS, 22, ADDRESS_HASH),
+])
+def test_known_addresses(address, version, hash160):
+    assert c32_address_decode(address) == (version, hash160)
+    assert c32_address(version, hash160) == address
+
+
+def test_contract_principal_keeps_its_name():
+    principal = f"{ADDRESS}.dataset-registry"
+    assert decode_hex(encode_hex(principal_cv(f"'{principal}"))) == principal
+
+
+@pytest.mark.parametrize("address", [
+    ADDRESS[:-1] + ("8" if ADDRESS[-1] != "8" else "9"),  # checksum
+    "SX" + ADDRESS[2:],  # not a c32 version character
+    "S",
+    ADDRESS + "0000",
+])
+def test_bad_addresses_raise(address):
+    with pytest.raises(ClarityError):
+        principal_cv(address)
+
+
+def test_out_of_range_version_byte_raises():
+    with pytest.raises(ClarityError):
+        deserialize(bytes([0x05, 0x20]) + bytes(20))
+
+
+@pytest.mark.parametrize("value, encoded, decoded", SAMPLES)
+def test_truncated_input_raises(value, encoded, decoded):
+    data = bytes.fromhex(encoded[2:])
+    for cut in range(len(data)):
+        with pytest.raises(ClarityError):
+            deserialize(data[:cut])
+
+
+def test_trailing_bytes_raise():
+    with pytest.raises(ClarityError):
+        deserialize(serialize(uint_cv(1)) + b"\x00")
+
+
+def test_mixed_lists_leave_the_uint_fast_path():
+    value = list_cv([
+        uint_cv(1), uint_cv(2), int_cv(-3), uint_cv(4),
+        tuple_cv({"ids": list_cv([uint_cv(5), string_ascii_cv("x")])}),
+        uint_cv(6)
+    ])
+    assert decode_hex(encode_hex(value)) == [1, 2, -3, 4, {"ids": [5, "x"]}, 6]
+
+
+def test_list_of_tuples_with_repeated_field_names():
+    records = [{"id": index, "owner": ADDRESS} for index in range(3)]
+    value = list_cv(tuple_cv({"id": uint_cv(r["id"]), "owner": principal_cv(r["owner"])}) for r in records)
+    assert decode_hex(encode_hex(value)) == records
+
+
+def test_nesting_limit():
+    def nested(levels):
+        value = uint_cv(7)
+        for _ in range(levels):
+            value = some_cv(value)
+        return serialize(value)
+
+    assert deserialize(nested(MAX_DEPTH)) == 7
+    with pytest.raises(ClarityError):
+        deserialize(nested(MAX_DEPTH + 1))
+
+
+def test_ambiguous_python_values_are_refused():
+    with pytest.raises(ClarityError):
+        serialize(5)
+    with pytest.raises(ClarityError):
+        uint_cv(-1)
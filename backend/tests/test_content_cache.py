@@ -0,0 +1,46 @@
+"""
+Local IPFS object cache
+"""
+
+import os
+import time
+
+from app.services.content_cache import ContentCache
+
+
+def _hash(index: int) -> str:
+    return f"Qm{index:044d}"
+
+
+def test_limit_is_shared_by_workers(tmp_path):
+    # Two workers (separate instances) on one directory
+    first = ContentCache(str(tmp_path), max_bytes=250, max_object_bytes=100)
+    second = ContentCache(str(tmp_path), max_bytes=250, max_object_bytes=100)
+    first.load()
+    second.load()
+
+    for index in range(6):
+        worker = first if index % 2 else second
+        assert worker.put(_hash(index), bytes(100))
+        time.sleep(0.01)  # distinct mtimes for LRU order
+
+    on_disk = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(tmp_path) for name in names if not name.endswith(".sha256")
+    )
+    assert on_disk <= 250
+    # The most recently written objects survive, whichever worker wrote them
+    assert first.read(_hash(5)) == bytes(100)
+    assert first.read(_hash(4)) == bytes(100)
+    assert first.read(_hash(0)) is None
+
+
+def test_damaged_object_is_dropped(tmp_path):
+    cache = ContentCache(str(tmp_path), max_bytes=1000, max_object_bytes=1000)
+    cache.load()
+    cache.put(_hash(1), b"payload")
+    with open(cache.object_path(_hash(1)), "wb") as handle:
+        handle.write(b"damaged")
+
+    assert cache.read(_hash(1)) is None
+    assert not os.path.exists(cache.object_path(_hash(1)))
@@ -0,0 +1,153 @@
+"""
+ReadOnlyCallCache with a stubbed chain tip and call-read
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import contract_cache
+from app.services.contract_cache import ReadOnlyCallCache, is_negative
+
+POSITIVE = {"okay": True, "result": "0x0703"}  # (ok true)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(contract_cache, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def cache(clock):
+    cache = ReadOnlyCallCache(ttl_seconds=300, negative_ttl_seconds=5, tip_seconds=0, max_entries=100)
+    cache.tip = 100
+
+    async def read_tip():
+        return cache.tip
+
+    cache._read_tip = read_tip
+    return cache
+
+
+class Call:
+    """Stub call-read that counts invocations and can be held open"""
+
+    def __init__(self, response=POSITIVE, on_call=None):
+        self.response = response
+        self.on_call = on_call
+        self.count = 0
+        self.release = None
+
+    async def __call__(self):
+        self.count += 1
+        if self.on_call is not None:
+            await self.on_call()
+        if self.release is not None:
+            await self.release.wait()
+        return self.response
+
+
+@pytest.mark.parametrize("response, negative", [
+    ({"okay": True, "result": "0x09"}, True),
+    ({"okay": True, "result": "0x080100000000000000000000000000000001"}, True),
+    ({"okay": True, "result": "0x0704"}, True),
+    ({"okay": False, "cause": "Unchecked(NoSuchContract)"}, True),
+    ({"okay": True, "result": "0x0703"}, False),
+    ({"okay": True, "result": "0x0a0100000000000000000000000000000005"}, False),
+])
+def test_is_negative(response, negative):
+    assert is_negative(response) is negative
+
+
+def test_tip_change_invalidates(cache):
+    call = Call()
+
+    async def run():
+        await cache.get_or_call("key", call)
+        await cache.get_or_call("key", call)
+        assert call.count == 1
+        cache.tip = 101
+        await cache.get_or_call("key", call)
+        assert call.count == 2
+
+    asyncio.run(run())
+
+
+def test_concurrent_calls_are_coalesced(cache):
+    call = Call()
+
+    async def run():
+        call.release = asyncio.Event()
+        waiting = [asyncio.create_task(cache.get_or_call("key", call)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        call.release.set()
+        return await asyncio.gather(*waiting)
+
+    assert asyncio.run(run()) == [POSITIVE] * 5
+    assert call.count == 1
+
+
+@pytest.mark.parametrize("result", ["0x09", "0x0704"])
+def test_negative_answers_use_the_short_ttl(cache, clock, result):
+    negative = Call({"okay": True, "result": result})
+    positive = Call()
+
+    async def run():
+        for call in (negative, positive):
+            await cache.get_or_call(id(call), call)
+        clock.now += 4.9
+        for call in (negative, positive):
+            await cache.get_or_call(id(call), call)
+        assert (negative.count, positive.count) == (1, 1)
+
+        clock.now += 0.1
+        for call in (negative, positive):
+            await cache.get_or_call(id(call), call)
+        assert (negative.count, positive.count) == (2, 1)
+
+    asyncio.run(run())
+
+
+def test_result_read_across_a_tip_change_is_not_stored(cache):
+    async def new_block():
+        # Another request sees the next block while this read is in flight
+        cache.tip = 101
+        await cache.get_or_call("other", Call())
+
+    call = Call(on_call=new_block)
+
+    async def run():
+        assert await cache.get_or_call("key", call) == POSITIVE
+        call.on_call = None
+        await cache.get_or_call("key", call)
+        assert call.count == 2
+        await cache.get_or_call("key", call)
+        assert call.count == 2
+
+    asyncio.run(run())
+
+
+def test_failed_calls_are_not_cached(cache):
+    attempts = []
+
+    async def broken():
+        attempts.append(1)
+        raise ConnectionError("stacks down")
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await cache.get_or_call("key", broken)
+
+    asyncio.run(run())
+    assert len(attempts) == 2
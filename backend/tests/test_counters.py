@@ -0,0 +1,54 @@
+"""
+Write-behind counters: requests journal deltas, the flusher folds them in
+"""
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import sync_session
+from app.core.security import create_access_token
+from app.models import CounterDelta, User
+from app.services.counters import counter_flusher
+
+UPLOADER = "SP2C2YFP12AJZB4MABJBAJ55XECVS7E4PMMZ89YZR"
+CSV = b"make,model,year,price\nNissan,Sunny,2009,2100000\n"
+
+
+@pytest.fixture
+def paused_flusher(client):
+    """Stop the background flush (applying what is already queued) so the test decides when it runs"""
+    client.portal.call(counter_flusher.stop)
+    yield
+    client.portal.call(counter_flusher.start)
+
+
+def counters(user_id):
+    with sync_session() as db:
+        uploads = db.get(User, user_id).total_uploads
+        pending = db.scalar(select(func.count()).select_from(CounterDelta).where(
+            CounterDelta.target_table == "users", CounterDelta.target_id == user_id
+        ))
+        return uploads, pending
+
+
+def test_uploads_are_counted_after_flush(client, paused_flusher):
+    headers = {"Authorization": f"Bearer {create_access_token(UPLOADER)}"}
+    client.get("/api/v1/users/me", headers=headers)  # First sign-in creates the user
+    user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+
+    for index in range(3):
+        response = client.post(
+            "/api/v1/datasets/upload",
+            data={"title": f"Onitsha sales {index}", "description": "Nissan sales", "price": "2"},
+            files={"file": ("onitsha.csv", CSV, "text/csv")},
+            headers=headers
+        )
+        assert response.status_code == 200, response.text
+
+    # Journaled, not yet applied to the row
+    assert counters(user_id) == (0, 3)
+
+    assert client.portal.call(counter_flusher.flush) >= 3
+    assert counters(user_id) == (3, 0)
+    with sync_session() as db:
+        assert db.scalar(select(func.count()).select_from(CounterDelta)) == 0
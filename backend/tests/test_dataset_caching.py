@@ -0,0 +1,33 @@
+"""
+Conditional GETs on dataset resources
+"""
+
+from app.core.pagination import listing_count_cache
+
+
+def test_listing_revalidates_without_loading_rows(client, seed):
+    listing_count_cache.clear()
+    first = client.get("/api/v1/datasets/", params={"per_page": 5})
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith("W/")
+
+    revalidated = client.get("/api/v1/datasets/", params={"per_page": 5}, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    # Count (cached) and page versions only: the full rows are never loaded
+    assert int(revalidated.headers["x-query-count"]) < int(first.headers["x-query-count"])
+
+
+def test_empty_search_is_cacheable(client, seed):
+    response = client.get("/api/v1/datasets/", params={"search": "zzzunmatched"})
+    assert response.status_code == 200
+    assert response.json()["datasets"] == [] and response.json()["total"] == 0
+    assert response.headers["etag"].startswith("W/")
+    assert "max-age" in response.headers["cache-control"]
+
+
+def test_dataset_revalidates(client, seed):
+    path = f"/api/v1/datasets/{seed['dataset_id']}"
+    etag = client.get(path).headers["etag"]
+    assert etag.startswith("W/")
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
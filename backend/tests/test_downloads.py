@@ -0,0 +1,107 @@
+"""
+Dataset download streaming
+"""
+
+import pytest
+
+from app.api.v1.datasets import download_limiter
+from app.services.storage import IPFSService
+
+
+class FailingStream:
+    """Yields one chunk, then fails like a dropped upstream connection"""
+
+    def __init__(self):
+        self.closed = False
+
+    async def __aiter__(self):
+        yield b'{"data": ['
+        raise ConnectionError("upstream reset")
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_download_completes(client, seed):
+    response = client.get(f"/api/v1/datasets/{seed['dataset_id']}/download", headers=seed["buyer_headers"])
+    assert response.status_code == 200
+    assert response.json()["data"][0]["make"] == "Toyota"
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=2-9", 2, 9),
+    ("bytes=10-", 10, None),
+    ("bytes=-5", -5, None),
+    ("bytes=0-100000", 0, None),
+])
+def test_range_is_answered_with_partial_content(client, seed, header, start, end):
+    url = f"/api/v1/datasets/{seed['dataset_id']}/download"
+    full = client.get(url, headers=seed["buyer_headers"])
+    content = full.content
+    expected = content[start:] if end is None else content[start:end + 1]
+    first = start % len(content)
+
+    response = client.get(url, headers={**seed["buyer_headers"], "Range": header})
+
+    assert full.headers["accept-ranges"] == "bytes"
+    assert response.status_code == 206
+    assert response.content == expected
+    assert response.headers["content-range"] == f"bytes {first}-{first + len(expected) - 1}/{len(content)}"
+    assert response.headers["content-length"] == str(len(expected))
+
+
+@pytest.mark.parametrize("header", ["bytes=100000-", "bytes=-0"])
+def test_unsatisfiable_range_is_416(client, seed, header):
+    url = f"/api/v1/datasets/{seed['dataset_id']}/download"
+    size = len(client.get(url, headers=seed["buyer_headers"]).content)
+
+    response = client.get(url, headers={**seed["buyer_headers"], "Range": header})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{size}"
+
+
+@pytest.mark.parametrize("headers", [
+    {"Range": "bytes=0-1,4-5"},
+    {"Range": "items=0-1"},
+    {"Range": "bytes=2-9", "If-Range": '"stale-etag"'},
+])
+def test_ignored_range_sends_everything(client, seed, headers):
+    url = f"/api/v1/datasets/{seed['dataset_id']}/download"
+    full = client.get(url, headers=seed["buyer_headers"])
+
+    response = client.get(url, headers={**seed["buyer_headers"], **headers})
+
+    assert response.status_code == 200
+    assert response.content == full.content
+    assert "content-range" not in response.headers
+
+
+def test_matching_if_range_allows_the_range(client, seed):
+    url = f"/api/v1/datasets/{seed['dataset_id']}/download"
+    etag = client.get(url, headers=seed["buyer_headers"]).headers["etag"]
+
+    response = client.get(url, headers={**seed["buyer_headers"], "Range": "bytes=0-0", "If-Range": etag})
+
+    assert response.status_code == 206
+    assert response.content == b"{"
+
+
+def test_stream_failure_releases_slot(client, seed, monkeypatch):
+    stream = FailingStream()
+
+    async def open_stream(self, ipfs_hash, offset=0, length=None, chunk_size=None):
+        return stream
+
+    async def get_file_size(self, ipfs_hash):
+        return None
+
+    monkeypatch.setattr(IPFSService, "open_stream", open_stream)
+    monkeypatch.setattr(IPFSService, "get_file_size", get_file_size)
+    buyer_id = client.get("/api/v1/users/me", headers=seed["buyer_headers"]).json()["id"]
+
+    with pytest.raises(ConnectionError):
+        client.get(f"/api/v1/datasets/{seed['dataset_id']}/download", headers=seed["buyer_headers"])
+
+    assert stream.closed
+    assert download_limiter.active(buyer_id) == 0
@@ -0,0 +1,81 @@
+"""
+BoundedExecutor admission control and timeouts
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.executors import BoundedExecutor, ExecutorSaturated
+
+
+@pytest.fixture
+def executor():
+    bounded = BoundedExecutor("test", max_workers=2, max_queue=1)
+    yield bounded
+    bounded.shutdown()
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_saturates_at_workers_plus_queue(executor):
+    release = threading.Event()
+
+    async def run():
+        calls = [asyncio.create_task(executor.run("block", release.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert executor._admitted == 3
+
+        with pytest.raises(ExecutorSaturated):
+            await executor.run("block", release.wait)
+
+        release.set()
+        assert await asyncio.gather(*calls) == [True] * 3
+
+    asyncio.run(run())
+    wait_until(lambda: executor._admitted == 0)
+    assert executor._running == 0
+
+
+def test_admitted_count_recovers_after_timeouts(executor):
+    release = threading.Event()
+
+    async def run():
+        results = await asyncio.gather(
+            *(executor.run("block", release.wait, timeout=0.05) for _ in range(3)),
+            return_exceptions=True
+        )
+        assert all(isinstance(result, TimeoutError) for result in results)
+
+    asyncio.run(run())
+    # The queued call was cancelled; the two running ones hold their slots until they return
+    wait_until(lambda: executor._admitted == 2)
+
+    release.set()
+    wait_until(lambda: executor._admitted == 0)
+
+    async def admitted_again():
+        return await executor.run("add", lambda a, b: a + b, 1, 2)
+
+    assert asyncio.run(admitted_again()) == 3
+    wait_until(lambda: executor._admitted == 0)
+
+
+def test_errors_release_their_slot(executor):
+    def broken():
+        raise ValueError("broken")
+
+    async def run():
+        for _ in range(5):
+            with pytest.raises(ValueError):
+                await executor.run("broken", broken)
+
+    asyncio.run(run())
+    wait_until(lambda: executor._admitted == 0)
@@ -0,0 +1,77 @@
+"""
+/health status from cached probe results and breaker states
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.core.circuit_breaker import BreakerRegistry
+from app.services import health
+from app.services.health import ProbeResult, health_monitor
+
+
+@pytest.fixture
+def monitor(client, monkeypatch):
+    """The app's monitor with its loop stopped, fresh breakers and probes that only count calls"""
+    client.portal.call(health_monitor.stop)
+    calls = []
+
+    def probe(name):
+        async def run():
+            calls.append(name)
+        return run
+
+    monkeypatch.setattr(health, "breakers", BreakerRegistry())
+    monkeypatch.setattr(health_monitor, "probes", {name: probe(name) for name in ("database", "blockchain", "ipfs")})
+    monkeypatch.setattr(health_monitor, "results", {})
+    yield calls
+    client.portal.call(health_monitor.start)
+
+
+def cache(**up):
+    for name, is_up in up.items():
+        health_monitor.results[name] = ProbeResult(is_up, 1.0, datetime.utcnow(), None if is_up else "down")
+
+
+def test_probes_once_when_nothing_is_cached(client, monitor):
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert sorted(monitor) == ["blockchain", "database", "ipfs"]
+
+
+def test_cached_results_are_served_without_probing(client, monitor):
+    cache(database=True, blockchain=True, ipfs=True)
+    assert client.get("/health").json()["status"] == "healthy"
+    assert monitor == []
+
+
+def test_optional_dependency_down_is_degraded(client, monitor):
+    cache(database=True, blockchain=True, ipfs=False)
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "degraded"
+    assert response.json()["services"]["ipfs"] == "disconnected"
+    assert monitor == []
+
+
+def test_open_breaker_is_degraded(client, monitor):
+    cache(database=True, blockchain=True, ipfs=True)
+    breaker = health.breakers.get("test", failure_threshold=1)
+    breaker.record_failure(ConnectionError("down"))
+
+    body = client.get("/health").json()
+    assert body["status"] == "degraded"
+    assert body["breakers"]["test"]["state"] == "open"
+
+
+def test_database_down_is_unhealthy(client, monitor):
+    cache(database=False, blockchain=True, ipfs=True)
+    response = client.get("/health")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "unhealthy"
+    assert monitor == []
@@ -0,0 +1,37 @@
+"""
+The emulator's object stores behind their shared writer interface
+"""
+
+import pytest
+
+from scripts.ipfs_emulator import CHUNK_SIZE, DiskStore, MemoryStore
+
+
+@pytest.fixture(params=["memory", "disk"])
+def store(request, tmp_path):
+    return MemoryStore() if request.param == "memory" else DiskStore(str(tmp_path))
+
+
+def test_committed_objects_are_addressed_by_content(store):
+    data = bytes(range(256)) * (CHUNK_SIZE // 128)
+    writer = store.writer()
+    for start in range(0, len(data), 1000):
+        writer.write(data[start:start + 1000])
+    cid = writer.commit()
+
+    again = store.writer()
+    again.write(data)
+    assert again.commit() == cid
+
+    assert store.count() == 1
+    assert store.size(cid) == writer.size == len(data)
+    assert b"".join(store.read(cid)) == data
+    assert b"".join(store.read(cid, CHUNK_SIZE - 5, 10)) == data[CHUNK_SIZE - 5:CHUNK_SIZE + 5]
+
+
+def test_aborted_writes_leave_nothing_behind(store):
+    writer = store.writer()
+    writer.write(b"partial upload")
+    writer.abort()
+
+    assert store.count() == 0
@@ -0,0 +1,57 @@
+"""
+Bulk listing import (scripts/import_listings.py)
+"""
+
+import argparse
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import get_sync_engine
+from app.models.listing import Listing
+from scripts.import_listings import run
+
+HEADER = "Price,Car Name,Region,Condition,Mileage\n"
+
+
+def _write_csv(path, first: int, count: int):
+    rows = [
+        f'"₦ {1000000 + index}",Toyota Camry {2000 + index % 20} Black,"Lagos State, Ajah",Local Used,{index} km\n'
+        for index in range(first, first + count)
+    ]
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+    return str(path)
+
+
+def _import(paths, source, replace):
+    args = argparse.Namespace(paths=paths, source=source, dataset_id=None, replace=replace, chunk_size=3)
+    return asyncio.run(run(args))
+
+
+def _count(source: str) -> int:
+    with get_sync_engine().connect() as conn:
+        return conn.scalar(select(func.count()).select_from(Listing.__table__).where(Listing.source == source))
+
+
+def test_replace_keeps_every_file_of_the_source(client, tmp_path):
+    paths = [_write_csv(tmp_path / "a.csv", 0, 7), _write_csv(tmp_path / "b.csv", 7, 5)]
+
+    assert _import(paths, "nightly", replace=True) == 12
+    assert _count("nightly") == 12
+
+    # A second replace swaps the rows instead of adding to them
+    assert _import(paths, "nightly", replace=True) == 12
+    assert _count("nightly") == 12
+
+
+def test_failed_replace_leaves_previous_rows(client, tmp_path):
+    good = _write_csv(tmp_path / "good.csv", 0, 4)
+    assert _import([good], "rollback", replace=True) == 4
+
+    bad = tmp_path / "bad.txt"
+    bad.write_text("not a listing file")
+    with pytest.raises(ValueError):
+        _import([good, str(bad)], "rollback", replace=True)
+
+    assert _count("rollback") == 4
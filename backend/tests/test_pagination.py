@@ -0,0 +1,91 @@
+"""
+Keyset pagination of dataset listings
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.api.v1.datasets import SORT_COLUMNS
+from app.core.pagination import decode_cursor, encode_cursor
+from app.services.search import search_index
+
+SEARCH = "paginated"
+
+
+@pytest.fixture(scope="module")
+def listing(seed):
+    """Extra datasets with tied sort values; timestamps come from the column defaults"""
+    from app.core.database import sync_session
+    from app.models import Dataset
+
+    db = sync_session()
+    try:
+        for index in range(7):
+            db.add(Dataset(
+                title=f"Paginated sales {index}",
+                description="paginated listing fixture",
+                filename="sales.csv",
+                file_type="csv",
+                file_size=10,
+                ipfs_hash=f"Qm{index:044d}",
+                price=float(index % 3),
+                records_count=index % 2,
+                columns_count=1,
+                quality_score=0.5,
+                owner_id=seed["owner_id"]
+            ))
+            db.flush()
+        # Identical timestamps: created_at ties are broken by id
+        tied = datetime(2024, 1, 1, 12, 0, 0)
+        db.add_all([
+            Dataset(title=f"Paginated tie {index}", filename="t.csv", file_type="csv", file_size=1,
+                    ipfs_hash=f"Qt{index:044d}", price=1.0, records_count=1, columns_count=1,
+                    owner_id=seed["owner_id"], created_at=tied)
+            for index in range(3)
+        ])
+        db.commit()
+        search_index.sync(db, force=True)
+        active = set(db.scalars(select(Dataset.id).where(Dataset.is_active == True)))
+        matching = set(db.scalars(select(Dataset.id).where(Dataset.title.like("Paginated%"))))
+        return active, matching
+    finally:
+        db.close()
+
+
+def _walk(client, params):
+    seen, cursor = [], None
+    for _ in range(100):
+        response = client.get("/api/v1/datasets/", params={**params, "per_page": 1, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        seen.extend(dataset["id"] for dataset in body["datasets"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return seen
+    pytest.fail(f"paging did not end: {seen[-10:]}")
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+@pytest.mark.parametrize("sort_by", sorted(SORT_COLUMNS))
+def test_every_row_appears_once(client, listing, sort_by, sort_order):
+    active, _ = listing
+    seen = _walk(client, {"sort_by": sort_by, "sort_order": sort_order})
+    assert sorted(seen) == sorted(active)
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_relevance_pages_cover_matches_once(client, listing, sort_order):
+    _, matching = listing
+    seen = _walk(client, {"search": SEARCH, "sort_order": sort_order})
+    assert sorted(seen) == sorted(matching)
+
+
+def test_cursor_round_trip_and_sort_mismatch():
+    value = datetime(2024, 1, 1, 12, 0, 0, 5)
+    cursor = encode_cursor("created_at", "desc", value, 42)
+    assert decode_cursor(cursor, "created_at", "desc") == (value, 42)
+    with pytest.raises(Exception) as error:
+        decode_cursor(cursor, "price", "desc")
+    assert error.value.status_code == 400
@@ -0,0 +1,121 @@
+"""
+Queued pinning against the IPFS emulator
+
+The lifespan's background loop is stopped for these tests so each one
+drives the queue itself through the app's event loop.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal, sync_session
+from app.models import Dataset, PinJob
+from app.services.pinning import PIN, UNPIN, claim_pin_jobs, pin_manager, queue_pins, settle_pin_jobs
+
+CSV = b"make,model,year,price\nKia,Rio,2015,2900000\nKia,Picanto,2016,2400000\n"
+
+
+@pytest.fixture(scope="module")
+def portal(client):
+    client.portal.call(pin_manager.stop)
+    yield client.portal
+    client.portal.call(pin_manager.start)
+
+
+def queue(portal, hashes, action=PIN):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await queue_pins(db, hashes, action)
+            await db.commit()
+
+    portal.call(run)
+
+
+def job(ipfs_hash):
+    with sync_session() as db:
+        return db.scalar(select(PinJob).where(PinJob.ipfs_hash == ipfs_hash))
+
+
+def test_upload_queues_a_pin_that_the_manager_applies(client, seed, ipfs, portal):
+    response = client.post(
+        "/api/v1/datasets/upload",
+        data={"title": "Kano sales", "description": "Kia sales", "price": "3", "tags": "kano"},
+        files={"file": ("kano.csv", CSV, "text/csv")},
+        headers=seed["owner_headers"]
+    )
+    assert response.status_code == 200, response.text
+    ipfs_hash = response.json()["ipfs_hash"]
+
+    assert job(ipfs_hash).action == PIN
+    assert ipfs_hash not in ipfs.store.pins
+
+    assert portal.call(pin_manager.process_due) >= 1
+    assert ipfs_hash in ipfs.store.pins
+    assert job(ipfs_hash) is None
+
+
+def test_failing_batch_is_retried_per_hash(ipfs, portal):
+    present = ipfs.add(b"present, not yet pinned", pin=False)
+    missing = "bafkreimissingmissingmissingmissingmissingmissingmissingmiss"
+    queue(portal, [present, missing])
+
+    portal.call(pin_manager.process_due)
+
+    assert present in ipfs.store.pins
+    assert job(present) is None
+    failed = job(missing)
+    assert failed.attempts == 1
+    assert failed.next_attempt_at > datetime.utcnow()
+    assert "not found" in failed.last_error
+
+
+def test_job_requeued_while_leased_survives_settlement(ipfs, portal):
+    ipfs_hash = ipfs.add(b"requeued while in flight")
+    queue(portal, [ipfs_hash], UNPIN)
+
+    with sync_session() as db:
+        jobs = [claimed for claimed in claim_pin_jobs(db, 1000) if claimed[1] == ipfs_hash]
+    assert jobs
+
+    # A new intent arrives while the unpin is in flight
+    queue(portal, [ipfs_hash], PIN)
+    with sync_session() as db:
+        settle_pin_jobs(db, jobs, {ipfs_hash: None})
+
+    requeued = job(ipfs_hash)
+    assert requeued is not None
+    assert requeued.action == PIN
+    assert requeued.attempts == 0
+
+
+def test_reconciliation_queues_missing_pins_and_retired_unpins(seed, ipfs, portal):
+    unpinned = ipfs.add(b"active dataset whose pin was lost", pin=False)
+    retired = ipfs.add(b"content of a retired dataset")
+    shared = ipfs.add(b"content of a retired and a live dataset")
+
+    with sync_session() as db:
+        for title, ipfs_hash, active in [
+            ("Pin lost", unpinned, True),
+            ("Retired", retired, False),
+            ("Retired copy", shared, False),
+            ("Live copy", shared, True),
+        ]:
+            db.add(Dataset(
+                title=title, filename="pins.csv", file_type="csv", file_size=1, ipfs_hash=ipfs_hash,
+                price=1.0, is_active=active, records_count=1, columns_count=1, owner_id=seed["owner_id"]
+            ))
+        db.commit()
+
+    summary = portal.call(pin_manager.reconcile)
+
+    assert summary[PIN] >= 1 and summary[UNPIN] >= 1
+    assert job(unpinned).action == PIN
+    assert job(retired).action == UNPIN
+    assert job(shared) is None
+
+    portal.call(pin_manager.process_due)
+    assert unpinned in ipfs.store.pins
+    assert retired not in ipfs.store.pins
+    assert shared in ipfs.store.pins
@@ -0,0 +1,67 @@
+"""
+Every endpoint in ENDPOINT_QUERY_BUDGETS is called with QUERY_BUDGET_MODE
+set to "enforce" and cold caches, so its X-Query-Count must stay within
+the budget (an overrun comes back as a 500 naming the endpoint).
+"""
+
+import pytest
+
+from app.core.pagination import listing_count_cache
+from app.core.query_budget import ENDPOINT_QUERY_BUDGETS
+from app.core.security import principal_cache
+
+CSV = b"make,model,year,price\nToyota,Camry,2010,4500000\nHonda,Civic,2012,3800000\n"
+
+# endpoint -> (path, request options, user whose token is sent)
+REQUESTS = {
+    "POST /api/v1/auth/wallet": ("/api/v1/auth/wallet", {"json": {
+        "wallet_address": "SP3GWX3NE58KXHESRYE4DYQ1S31PQJTCRXB3PE9SB", "signature": "sig", "message": "login"
+    }}, None),
+    "GET /api/v1/auth/me": ("/api/v1/auth/me", {}, "buyer"),
+    "GET /api/v1/datasets/": ("/api/v1/datasets/", {"params": {"per_page": 10}}, None),
+    "GET /api/v1/datasets/{dataset_id}": ("/api/v1/datasets/{dataset_id}", {}, None),
+    "GET /api/v1/datasets/{dataset_id}/download": ("/api/v1/datasets/{dataset_id}/download", {}, "buyer"),
+    "POST /api/v1/datasets/upload": ("/api/v1/datasets/upload", {
+        "data": {"title": "Abuja sales", "description": "Q1 sales", "price": "5", "tags": "abuja"},
+        "files": {"file": ("abuja.csv", CSV, "text/csv")}
+    }, "owner"),
+    "GET /api/v1/users/me": ("/api/v1/users/me", {}, "owner"),
+    "PUT /api/v1/users/me": ("/api/v1/users/me", {"json": {"display_name": "Ada", "bio": "Dealer"}}, "owner"),
+    "GET /api/v1/users/me/datasets": ("/api/v1/users/me/datasets", {}, "owner"),
+    "GET /api/v1/users/me/purchases": ("/api/v1/users/me/purchases", {}, "buyer"),
+    "GET /api/v1/users/{user_id}": ("/api/v1/users/{owner_id}", {}, None),
+    "GET /api/v1/analytics/marketplace-stats": ("/api/v1/analytics/marketplace-stats", {}, None),
+    "GET /api/v1/analytics/price-trends": ("/api/v1/analytics/price-trends", {}, None),
+    "GET /api/v1/analytics/category-distribution": ("/api/v1/analytics/category-distribution", {}, None),
+    "GET /api/v1/analytics/quality-metrics": ("/api/v1/analytics/quality-metrics", {}, None),
+    "GET /api/v1/analytics/user-activity": ("/api/v1/analytics/user-activity", {}, None),
+}
+
+
+def test_every_budgeted_endpoint_is_exercised():
+    assert set(REQUESTS) == set(ENDPOINT_QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("endpoint", sorted(ENDPOINT_QUERY_BUDGETS))
+def test_endpoint_within_query_budget(client, seed, endpoint):
+    path, options, user = REQUESTS[endpoint]
+    method = endpoint.split(" ", 1)[0]
+    headers = seed[f"{user}_headers"] if user else {}
+
+    # Worst case: nothing served from the principal or listing-count caches
+    principal_cache.clear()
+    listing_count_cache.clear()
+    response = client.request(method, path.format(**seed), headers=headers, **options)
+
+    assert response.status_code < 400, response.text
+    count = int(response.headers["x-query-count"])
+    assert count <= ENDPOINT_QUERY_BUDGETS[endpoint], f"{endpoint}: {count} statements"
+
+
+def test_overrun_fails_the_request(client, seed, monkeypatch):
+    monkeypatch.setitem(ENDPOINT_QUERY_BUDGETS, "GET /api/v1/auth/me", 0)
+    principal_cache.clear()
+    response = client.get("/api/v1/auth/me", headers=seed["buyer_headers"])
+
+    assert response.status_code == 500
+    assert "GET /api/v1/auth/me executed" in response.json()["detail"]
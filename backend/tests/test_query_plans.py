@@ -0,0 +1,41 @@
+"""
+Hot queries must use indexes (the check from scripts/check_query_plans.py,
+on the test database with a smaller seed)
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    from sqlalchemy import delete
+
+    from app.core.database import get_sync_engine
+    from app.core.query_plans import seed
+    from app.models import Dataset, DatasetAccess, User
+
+    engine = get_sync_engine()
+    first = seed(engine, users=500, datasets=2000, accesses=10000)
+    yield engine
+    with engine.begin() as conn:
+        for model in (DatasetAccess, Dataset, User):
+            conn.execute(delete(model).where(model.id >= first[model.__tablename__]))
+
+
+def test_hot_queries_use_indexes(seeded):
+    from app.core.query_plans import check
+
+    with seeded.connect() as conn:
+        results = check(conn)
+
+    assert results
+    failures = {name: plan for name, plan, scanned in results if scanned}
+    assert not failures, failures
+
+
+def test_sequential_scans_are_detected():
+    from app.core.query_plans import sequential_scans
+
+    plan = ["SCAN datasets", "SEARCH users USING INDEX ix_users_id (id=?)", "SCAN TABLE ratings"]
+    assert sequential_scans("sqlite", plan, {"datasets", "users"}) == ["datasets"]
+    assert sequential_scans("postgresql", ["Seq Scan on users  (cost=0.00..1.05 rows=5)"], {"users"}) == ["users"]
@@ -0,0 +1,89 @@
+"""
+Primary pinning after writes (ReadYourWritesMiddleware)
+"""
+
+import itertools
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import LAST_WRITE_COOKIE, LAST_WRITE_HEADER, ReadSession, async_database_url, wrote_recently
+from app.models import Base, User
+
+OWNER = "SP2J6ZY48GV1EZ5V2V5RB9MP66SW86PYKKNRV9EJ7"
+
+
+def _request(headers):
+    return Request({
+        "type": "http",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    })
+
+
+def test_write_returns_cookie_and_header(client, seed):
+    response = client.put("/api/v1/users/me", json={"display_name": "Owner"}, headers=seed["owner_headers"])
+    assert response.status_code == 200
+    assert response.headers[LAST_WRITE_HEADER] == response.cookies[LAST_WRITE_COOKIE]
+
+
+def test_read_only_request_sets_neither(client, seed):
+    response = client.get("/api/v1/users/me", headers=seed["owner_headers"])
+    assert LAST_WRITE_HEADER not in response.headers
+    assert "set-cookie" not in response.headers
+
+
+def test_echoed_header_or_cookie_pins_reads():
+    recent = f"{time.time():.3f}"
+    assert wrote_recently(_request({LAST_WRITE_HEADER: recent}))
+    assert wrote_recently(_request({"cookie": f"{LAST_WRITE_COOKIE}={recent}"}))
+    assert not wrote_recently(_request({LAST_WRITE_HEADER: "0"}))
+    assert not wrote_recently(_request({LAST_WRITE_HEADER: "garbage"}))
+
+
+@pytest.fixture
+def replica(client, seed, tmp_path, monkeypatch):
+    """A second SQLite file routed to as the only replica, holding a stale copy of the owner"""
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(replica_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=seed["owner_id"], wallet_address=OWNER, display_name="Replica copy"))
+        db.commit()
+    engine.dispose()
+
+    replica_engine = create_async_engine(async_database_url(replica_url))
+    session_factory = async_sessionmaker(replica_engine, sync_session_class=ReadSession, expire_on_commit=False)
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([session_factory]))
+    client.cookies.clear()
+    yield
+    client.cookies.clear()
+    client.portal.call(replica_engine.dispose)
+
+
+def test_reads_follow_the_write_window(client, seed, replica, monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_LAG_SECONDS", 5)
+
+    def display_name(headers=None):
+        response = client.get("/api/v1/users/me", headers={**seed["owner_headers"], **(headers or {})})
+        assert response.status_code == 200, response.text
+        return response.json()["display_name"]
+
+    assert display_name() == "Replica copy"
+
+    written = client.put("/api/v1/users/me", json={"display_name": "Primary copy"}, headers=seed["owner_headers"])
+    last_write = written.headers[LAST_WRITE_HEADER]
+
+    # Inside the window: the cookie or the echoed header pins reads to the primary
+    assert display_name() == "Primary copy"
+    client.cookies.clear()
+    assert display_name({LAST_WRITE_HEADER: last_write}) == "Primary copy"
+
+    # Outside it (or with no marker at all) reads go back to the replica
+    assert display_name() == "Replica copy"
+    assert display_name({LAST_WRITE_HEADER: f"{float(last_write) - 6:.3f}"}) == "Replica copy"
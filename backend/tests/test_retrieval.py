@@ -0,0 +1,121 @@
+"""
+HedgedFetcher.race with stub attempts instead of IPFS sources
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.retrieval import FAILURE_THRESHOLD, HedgedFetcher, RetrievalSource
+
+
+@pytest.fixture(autouse=True)
+def hedging(monkeypatch):
+    monkeypatch.setattr(settings, "IPFS_HEDGE_DELAY_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "IPFS_HEDGE_MIN_DELAY_SECONDS", 0.02)
+    monkeypatch.setattr(settings, "IPFS_HEDGE_MAX_PARALLEL", 2)
+
+
+def source(name, *latencies):
+    measured = RetrievalSource(name, "gateway", f"http://{name}", name)
+    measured.latencies.extend(latencies)
+    return measured
+
+
+class Stub:
+    """attempt() for race: each source sleeps, then returns its name or raises"""
+
+    def __init__(self, **behaviour):
+        self.behaviour = behaviour  # name -> (seconds, fails)
+        self.started = {}
+        self.discarded = []
+
+    async def attempt(self, source):
+        self.started[source.name] = time.perf_counter()
+        seconds, fails = self.behaviour[source.name]
+        await asyncio.sleep(seconds)
+        if fails:
+            raise ConnectionError(f"{source.name} failed")
+        return source.name
+
+    async def discard(self, result):
+        self.discarded.append(result)
+
+
+def race(fetcher, stub):
+    async def run():
+        start = time.perf_counter()
+        winner = await fetcher.race(stub.attempt, stub.discard)
+        return winner, time.perf_counter() - start, start
+
+    return asyncio.run(run())
+
+
+def test_slow_leader_is_hedged_after_its_delay():
+    leader, backup = source("leader", 0.1), source("backup", 0.3)
+    stub = Stub(leader=(5, False), backup=(0, False))
+
+    winner, elapsed, start = race(HedgedFetcher([leader, backup]), stub)
+
+    assert winner == (backup, "backup")
+    assert stub.started["backup"] - start >= leader.hedge_delay() == pytest.approx(0.1)
+    assert elapsed < 1
+
+
+def test_failure_starts_the_next_source_immediately():
+    stub = Stub(leader=(0, True), backup=(0, False))
+
+    winner, elapsed, start = race(HedgedFetcher([source("leader", 0.1), source("backup", 0.3)]), stub)
+
+    assert winner[1] == "backup"
+    assert stub.started["backup"] - start < 0.1
+
+
+def test_next_hedge_is_timed_from_the_quickest_running_source(monkeypatch):
+    monkeypatch.setattr(settings, "IPFS_HEDGE_MAX_PARALLEL", 3)
+    sources = [source("a", 0.05), source("b", 0.1), source("c", 2.0), source("d", 3.0)]
+    stub = Stub(a=(0.08, True), b=(5, False), c=(5, False), d=(0, False))
+
+    winner, elapsed, start = race(HedgedFetcher(sources), stub)
+
+    # a fails, c starts in its place, and d is hedged on b's delay rather than c's
+    assert winner[1] == "d"
+    assert elapsed < 0.6
+
+
+def test_losing_results_are_discarded():
+    release = asyncio.Event()
+
+    class PhotoFinish(Stub):
+        async def attempt(self, source):
+            if source.name == "backup":
+                release.set()
+            await release.wait()
+            return source.name
+
+    stub = PhotoFinish()
+    winner, elapsed, start = race(HedgedFetcher([source("leader", 0.02), source("backup", 0.3)]), stub)
+
+    assert sorted([winner[1], *stub.discarded]) == ["backup", "leader"]
+
+
+def test_failing_source_is_benched():
+    flaky, steady = source("flaky", 0.01), source("steady", *[0.05] * 10)
+    fetcher = HedgedFetcher([flaky, steady])
+
+    for _ in range(FAILURE_THRESHOLD):
+        stub = Stub(flaky=(0, True), steady=(0, False))
+        assert race(fetcher, stub)[0][1] == "steady"
+        assert min(stub.started, key=stub.started.get) == "flaky"
+
+    assert fetcher.ranked()[0] is steady
+    stub = Stub(flaky=(0, True), steady=(0, False))
+    race(fetcher, stub)
+    assert list(stub.started) == ["steady"]
+
+
+def test_every_source_failing_returns_none():
+    stub = Stub(leader=(0, True), backup=(0, True))
+    assert race(HedgedFetcher([source("leader"), source("backup")]), stub)[0] is None
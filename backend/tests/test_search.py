@@ -0,0 +1,72 @@
+"""
+Dataset search: index sync from the datasets table and BM25 ranking
+"""
+
+import pytest
+
+from app.core.config import settings
+from app.core.database import sync_session
+from app.models import Dataset
+from app.services.search import SearchIndex
+
+
+@pytest.fixture
+def always_sync(monkeypatch):
+    """Let every search pull changed rows instead of waiting out the refresh interval"""
+    monkeypatch.setattr(settings, "SEARCH_INDEX_REFRESH_SECONDS", 0)
+
+
+def add_dataset(owner_id, title, description=None, tags=None):
+    """Insert a row directly, as another worker would, bypassing this process's index"""
+    with sync_session() as db:
+        dataset = Dataset(
+            title=title, description=description, tags=tags or [], filename="search.csv", file_type="csv",
+            file_size=1, ipfs_hash="QmSearch", price=1.0, records_count=1, columns_count=1, owner_id=owner_id
+        )
+        db.add(dataset)
+        db.commit()
+        return dataset.id
+
+
+def search(client, query):
+    response = client.get("/api/v1/datasets/", params={"search": query})
+    assert response.status_code == 200, response.text
+    return [dataset["id"] for dataset in response.json()["datasets"]]
+
+
+def test_written_rows_become_searchable_after_sync(client, seed, always_sync):
+    dataset_id = add_dataset(seed["owner_id"], "Zanzibar dhow freight")
+    assert search(client, "zanzibar") == [dataset_id]
+
+    with sync_session() as db:
+        db.get(Dataset, dataset_id).title = "Mombasa dhow freight"
+        db.commit()
+    assert search(client, "zanzibar") == []
+    assert search(client, "mombasa") == [dataset_id]
+
+    with sync_session() as db:
+        db.get(Dataset, dataset_id).is_active = False
+        db.commit()
+    assert search(client, "mombasa") == []
+
+
+def test_multi_term_ranking(client, seed, always_sync):
+    both_in_title = add_dataset(seed["owner_id"], "Kaduna Peugeot auctions", tags=["kaduna", "peugeot"])
+    split = add_dataset(seed["owner_id"], "Kaduna motorcycle sales", description="a few peugeot listings")
+    one_term = add_dataset(seed["owner_id"], "Peugeot spare parts")
+
+    assert search(client, "kaduna peugeot") == [both_in_title, split]
+    # Prefixes match too; every term must still match
+    assert search(client, "kadu peug") == [both_in_title, split]
+    assert one_term in search(client, "peugeot")
+
+
+def test_exact_matches_outrank_prefix_matches():
+    index = SearchIndex()
+    index.add_document(1, "Carburettor rebuild kits")
+    index.add_document(2, "Car auctions")
+
+    assert [doc_id for doc_id, _ in index.search("car")] == [2, 1]
+    index.remove_document(2)
+    assert [doc_id for doc_id, _ in index.search("car")] == [1]
+    assert index.search("") == []
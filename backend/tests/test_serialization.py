@@ -0,0 +1,34 @@
+"""
+The direct ORM encoders against the routes' response models
+"""
+
+import pytest
+
+from app.core.config import settings
+from app.services.counters import counter_flusher
+
+
+@pytest.fixture(scope="module", autouse=True)
+def settled_counters(client):
+    """Pause the counter flusher (applying what is queued) so rows cannot change between the two requests"""
+    client.portal.call(counter_flusher.stop)
+    yield
+    client.portal.call(counter_flusher.start)
+
+
+@pytest.mark.parametrize("path, user", [
+    ("/api/v1/datasets/", None),
+    ("/api/v1/datasets/{dataset_id}", None),
+    ("/api/v1/users/me", "owner_headers"),
+    ("/api/v1/users/{owner_id}", None),
+])
+def test_fast_path_matches_response_model(client, seed, monkeypatch, path, user):
+    path = path.format(**seed)
+    headers = seed[user] if user else {}
+
+    fast = client.get(path, headers=headers)
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION_ENABLED", False)
+    validated = client.get(path, headers=headers)
+
+    assert fast.status_code == validated.status_code == 200
+    assert fast.json() == validated.json()